@@ -0,0 +1,10 @@
+# benchmarks live next to the code they measure, in src/bench_*.py
+python src/bench_inline.py
+python src/bench_nodes.py
+python src/bench_blocks.py
+python src/bench_build.py
+# needs the generated site in ./public
+python src/main.py > /dev/null && python src/bench_server.py
+python src/bench_sendfile.py
+python src/bench_search.py
+python src/bench_frontmatter.py
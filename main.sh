@@ -1,2 +1,5 @@
 python src/main.py
-python server.py --dir public
+# rebuild whatever changes in content, static or the template while the server is running
+python src/main.py --incremental --watch &
+trap "kill $!" EXIT
+python server.py --dir public --livereload
@@ -1,31 +1,647 @@
+import io
 import os
+import json
+import time
+import hashlib
+import email.utils
+import socket
 import argparse
+import selectors
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 
+# endpoint of the Server-Sent Events stream that tells browsers to reload
+LIVERELOAD_PATH = "/__livereload"
+# written into the served directory by `src/main.py --watch` after every rebuild (see src/livereload.py)
+BUILD_CHANGES_FILE = ".build-changes.json"
+# `src/main.py --compress` writes gzip compressed copies of the outputs next to them, see src/compress.py
+GZIP_SUFFIX = ".gz"
+# injected before </body> of every served html page when live reload is on
+LIVERELOAD_SNIPPET = b"""<script>
+(function () {
+    // live reload, injected by server.py --livereload
+    var page = decodeURIComponent(location.pathname);
+    if (page.endsWith("/")) page += "index.html";
+    var candidates = [page, page + ".html", page + "/index.html"];
+    new EventSource("/__livereload").onmessage = function (event) {
+        var data = JSON.parse(event.data);
+        if (data.full) {
+            location.reload();
+            return;
+        }
+        var changed = data.changed;
+        for (var i = 0; i < changed.length; i++) {
+            // any stylesheet or image may be used by this page, other html pages never are
+            if (!changed[i].endsWith(".html") || candidates.indexOf(changed[i]) !== -1) {
+                location.reload();
+                return;
+            }
+        }
+    };
+})();
+</script>
+"""
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    '''
+    Parses the Range header of a request for a file of `size` bytes into the (first, last) byte offsets, both inclusive.
+    Returns None when there is no header, or one this server ignores (other units, multiple ranges, bad syntax): the whole file is sent then.
+    Raises ValueError when the range starts past the end of the file.
+    '''
+    if header is None or not header.startswith("bytes=") or "," in header:
+        return None
+    first, separator, last = header[len("bytes="):].strip().partition("-")
+    if not separator or not (first.isdigit() or first == "") or not (last.isdigit() or last == "") or first == last == "":
+        return None
+    if first == "":
+        # suffix range, the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError(f"range {header} of an empty suffix")
+        return max(0, size - int(last)), size - 1
+    if last != "" and int(last) < int(first):
+        return None
+    if int(first) >= size:
+        raise ValueError(f"range {header} starts past the end of {size} bytes")
+    return int(first), size - 1 if last == "" else min(int(last), size - 1)
+
+
+def gzip_is_fresh(path: str) -> bool:
+    '''
+    True when `path` has a gzip sibling written from its current content: `src/compress.py` gives a sibling the mtime of its file,
+    so a sibling left behind by a build without --compress (or whose file was removed) is never served
+    '''
+    try:
+        return os.stat(path + GZIP_SUFFIX).st_mtime_ns == os.stat(path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def inject_livereload(body: bytes) -> bytes:
+    index = body.rfind(b"</body>")
+    return body + LIVERELOAD_SNIPPET if index == -1 else body[:index] + LIVERELOAD_SNIPPET + body[index:]
+
+
+class LiveReloadHub:
+    '''
+    Polls the build changes file written by the generator and sends every build to the open live reload streams.
+    A stream is a socket handed over by its request handler once the headers are sent (see `add_stream`):
+    the watch thread writes to every stream itself, so an open browser tab holds no thread and no pool worker.
+    Every callable in `listeners` is called with the (changed urls, full) of each build, the file cache uses it for invalidation.
+    '''
+    def __init__(self, changes_path: str, interval: float = 0.1, keepalive: float = 15):
+        self.changes_path = changes_path
+        self.interval = interval
+        self.keepalive = keepalive
+        self.build = None
+        self.listeners: list = []
+        # sockets of the open live reload streams
+        self.streams: list[socket.socket] = []
+        self.streams_lock = threading.Lock()
+        self.last_write = time.monotonic()
+        self.mtime = self._mtime()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.changes_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            if time.monotonic() - self.last_write >= self.keepalive:
+                # comment line, keeps proxies from closing an idle connection and finds the streams of closed tabs
+                self.broadcast(b": keepalive\n\n")
+            mtime = self._mtime()
+            if mtime is None or mtime == self.mtime:
+                continue
+            self.mtime = mtime
+            try:
+                with open(self.changes_path, 'r') as f:
+                    changes = json.load(f)
+            except (OSError, ValueError):
+                continue
+            full = changes.get("full", False)
+            for listener in self.listeners:
+                listener(changes["changed"], full)
+            self.build = changes["build"]
+            self.broadcast(f"data: {json.dumps({'build': self.build, 'changed': changes['changed'], 'full': full})}\n\n".encode())
+
+    def add_stream(self, connection: socket.socket):
+        'Takes over the socket of a live reload stream whose headers were sent, it gets every build from now on'
+        connection.setblocking(False)
+        with self.streams_lock:
+            self.streams.append(connection)
+
+    def broadcast(self, message: bytes):
+        '''
+        Writes `message` to every stream, without ever blocking: a stream whose client is gone, or too slow to take a few bytes,
+        is closed (a browser's EventSource reconnects on its own).
+        '''
+        self.last_write = time.monotonic()
+        with self.streams_lock:
+            streams = self.streams
+            self.streams = []
+        alive = []
+        for connection in streams:
+            try:
+                sent = connection.send(message)
+            except OSError:
+                sent = 0
+            if sent == len(message):
+                alive.append(connection)
+            else:
+                connection.close()
+        with self.streams_lock:
+            # streams added while writing are kept too
+            self.streams.extend(alive)
+
+
+class CachedFile:
+    '''
+    A served file: its body (with the live reload snippet, if any) and the validators sent with it.
+    `gzip` is the cached gzip sibling of the file, served to clients that accept it, with its own ETag.
+    '''
+    __slots__ = ("body", "etag", "mtime", "last_modified", "content_type", "gzip")
+
+    def __init__(self, body: bytes, mtime: float, content_type: str, gzip_body: bytes | None = None):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        self.mtime = mtime
+        self.last_modified = email.utils.formatdate(mtime, usegmt=True)
+        self.content_type = content_type
+        self.gzip = None if gzip_body is None else CachedFile(gzip_body, mtime, content_type)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + (0 if self.gzip is None else len(self.gzip.body))
+
+
+class FileCache:
+    '''
+    Thread safe LRU cache of served files, bounded by the total size of their bodies.
+    Entries are never checked against the disk, they are dropped when the generator announces a build that rewrote them
+    (see `LiveReloadHub`), so a hit doesn't touch the filesystem.
+    '''
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        # bigger files are sent from disk with sendfile, straight out of the kernel's page cache, a copy here would only pin memory
+        self.max_file_bytes = min(max_bytes // 8, 1024 * 1024)
+        self.entries: OrderedDict[str, CachedFile] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        # bumped by every invalidation, a file read before one may be stale and is not cached
+        self.generation = 0
+
+    def get(self, path: str) -> CachedFile | None:
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None:
+                self.entries.move_to_end(path)
+            return entry
+
+    def put(self, path: str, entry: CachedFile, generation: int):
+        'Caches `entry`, unless it was read before the latest invalidation, evicting the least recently used files to make room'
+        if entry.size > self.max_file_bytes:
+            return
+        with self.lock:
+            if generation != self.generation:
+                return
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.size -= old.size
+            self.entries[path] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def invalidate(self, paths: list[str]):
+        with self.lock:
+            self.generation += 1
+            for path in paths:
+                entry = self.entries.pop(path, None)
+                if entry is not None:
+                    self.size -= entry.size
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.size = 0
+
+    def invalidate_build(self, changed: list[str], full: bool):
+        'Listener of `LiveReloadHub`, the changed urls are resolved against the served (working) directory'
+        if full:
+            self.clear()
+        else:
+            self.invalidate([os.path.abspath(url.lstrip("/")) for url in changed])
+
+
+class PooledHTTPServer(HTTPServer):
+    '''
+    HTTPServer that hands every request to a fixed pool of worker threads, so one slow client no longer stalls everyone.
+    Idle keep-alive connections don't hold a worker: they are parked on a selector and handed back to the pool when the next request arrives,
+    or closed once they have been idle for the handler's `timeout`.
+    Connections beyond `max_connections` (served, parked or waiting for a worker) are refused with a 503 instead of piling up.
+    '''
+    # listen backlog, the default of 5 drops connections under a modest burst
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers: int = 16, max_connections: int = 128):
+        # created before binding: a failed bind calls `server_close`, which must find them to close them and re-raise the bind error
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self.connections = threading.BoundedSemaphore(max_connections)
+        self.idle = selectors.DefaultSelector()
+        self.idle_lock = threading.Lock()
+        # a byte on this pair wakes the idle thread up, so it starts selecting on a freshly parked connection
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.idle.register(self.wakeup_recv, selectors.EVENT_READ, None)
+        super().__init__(server_address, handler_class)
+        threading.Thread(target=self.serve_idle, daemon=True).start()
+
+    def process_request(self, request, client_address):
+        if not self.connections.acquire(blocking=False):
+            self.refuse_request(request)
+            return
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        'Like `ThreadingMixIn.process_request_thread`, but an idle keep-alive connection is parked instead of closed'
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+            if handler.idle:
+                self.park_request(request, client_address)
+                return
+            if handler.detached:
+                # a live reload stream, its socket belongs to the hub now and takes neither a worker nor a connection slot
+                self.connections.release()
+                return
+        except Exception:
+            self.handle_error(request, client_address)
+        self.shutdown_request(request)
+        self.connections.release()
+
+    def park_request(self, request, client_address):
+        with self.idle_lock:
+            self.idle.register(request, selectors.EVENT_READ, (client_address, time.monotonic()))
+        self.wakeup_send.send(b"\0")
+
+    def serve_idle(self):
+        'Hands parked connections back to the pool when their next request arrives, closes the ones idle for too long'
+        while True:
+            for key, _ in self.idle.select(timeout=1):
+                if key.data is None:
+                    self.wakeup_recv.recv(4096)
+                    continue
+                with self.idle_lock:
+                    self.idle.unregister(key.fileobj)
+                self.executor.submit(self.process_request_thread, key.fileobj, key.data[0])
+            deadline = time.monotonic() - self.RequestHandlerClass.timeout
+            with self.idle_lock:
+                expired = [key.fileobj for key in self.idle.get_map().values() if key.data is not None and key.data[1] < deadline]
+                for request in expired:
+                    self.idle.unregister(request)
+            for request in expired:
+                self.shutdown_request(request)
+                self.connections.release()
+
+    def refuse_request(self, request):
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.wakeup_recv.close()
+        self.wakeup_send.close()
+
 
 class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests, every response carries a Content-Length
+    protocol_version = "HTTP/1.1"
+    # seconds an idle keep-alive connection is kept open
+    timeout = 5
+    # headers and body are separate writes, without this every response waits on a delayed ACK
+    disable_nagle_algorithm = True
+    # set by `run` when live reload is on
+    livereload: LiveReloadHub | None = None
+    # set by `run` unless --cache-size is 0
+    cache: FileCache | None = None
+    # set by `run` with --quiet
+    quiet = False
+    # turned off by `run` with --no-sendfile
+    use_sendfile = True
+    # set by `send_head` when the response has a gzip variant
+    vary_encoding = False
+    # set by `send_head` to the length of a partial response, `copyfile` stops there
+    copy_length: int | None = None
+
     def end_headers(self):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "*")
+        if self.vary_encoding:
+            self.send_header("Vary", "Accept-Encoding")
         super().end_headers()
 
     def do_OPTIONS(self):
         self.send_response(200, "OK")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def handle(self):
+        '''
+        Serves requests while the client keeps sending them.
+        As soon as a keep-alive connection has no request waiting it is marked idle, and the server parks it instead of keeping a worker busy
+        '''
+        self.idle = False
+        self.detached = False
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self.request_pending():
+                self.idle = True
+                return
+            self.handle_one_request()
+
+    def request_pending(self) -> bool:
+        'True when the next request is already buffered or has arrived on the socket, without blocking'
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        if self.livereload is not None and self.path == LIVERELOAD_PATH:
+            self.stream_livereload()
+            return
+        super().do_GET()
+
+    def stream_livereload(self):
+        '''
+        Answers with the headers of a Server-Sent Events stream, then hands the connection over to the hub,
+        which sends it the changed urls of every rebuild: the worker is free as soon as this returns
+        '''
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        # the stream has no length, it ends when the connection does
+        self.send_header("Connection", "close")
+        self.close_connection = True
+        self.end_headers()
+        self.wfile.flush()
+        self.detached = True
+        self.livereload.add_stream(self.connection)
+
+    def send_head(self):
+        '''
+        Serves files from the cache when it is on, the gzip sibling of a file to clients accepting gzip,
+        and html pages with the live reload snippet injected when live reload is on.
+        Directory redirects and listings and missing files are left to `SimpleHTTPRequestHandler`
+        '''
+        self.vary_encoding = False
+        self.copy_length = None
+        path = self.translate_path(self.path)
+        if self.path.split("?", 1)[0].split("#", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        # range requests are answered from the uncompressed file
+        gzip_ok = self.headers.get("Range") is None and self.accepts_gzip()
+        if self.cache is not None:
+            entry = self.cache.get(path) or self.load_file(path)
+            if entry is not None:
+                self.vary_encoding = entry.gzip is not None
+                if self.vary_encoding and gzip_ok:
+                    return self.send_cached(entry.gzip, "gzip")
+                return self.send_cached(entry)
+        inject = self.livereload is not None and path.endswith(".html")
+        # the snippet can't be injected into a compressed page
+        if not inject and gzip_is_fresh(path):
+            self.vary_encoding = True
+            if gzip_ok:
+                return self.send_file(path + GZIP_SUFFIX, self.guess_type(path), "gzip")
+        if not inject and os.path.isfile(path):
+            return self.send_file(path, self.guess_type(path))
+        if not inject or not os.path.isfile(path):
+            return super().send_head()
+        with open(path, 'rb') as f:
+            body = inject_livereload(f.read())
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        # the injected page must never be cached, the next rebuild changes it
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_file(self, path: str, content_type: str, encoding: str | None = None):
+        '''
+        Sends the headers for a file served from disk and returns it open, positioned at the start of the requested range.
+        The ETag is made of the mtime and size, so no byte of the file is read before `copyfile` sends it
+        '''
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return super().send_head()
+        stat = os.fstat(f.fileno())
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if self.not_modified(etag, stat.st_mtime):
+            f.close()
+            self.send_not_modified(etag)
+            return None
+        byte_range = self.requested_range(stat.st_size, etag)
+        if byte_range is False:
+            f.close()
+            return None
+        if byte_range is None:
+            self.send_response(200)
+            length = stat.st_size
+        else:
+            first, last = byte_range
+            f.seek(first)
+            length = self.copy_length = last - first + 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{stat.st_size}")
+        self.send_header("Content-Type", content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(stat.st_mtime))
         self.end_headers()
+        return f
+
+    def requested_range(self, size: int, etag: str) -> tuple[int, int] | None | bool:
+        '''
+        The (first, last) bytes asked for by the Range header, or None to send the whole file:
+        when there is no Range or If-Range names another version of the file.
+        An unsatisfiable range is answered with a 416 here, and returns False
+        '''
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range.strip() != etag:
+            return None
+        try:
+            return parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return False
+
+    def copyfile(self, source, outputfile):
+        '''
+        Sends the body returned by `send_head`, up to `copy_length` bytes of it for a partial response.
+        Files go out with `socket.sendfile` (`os.sendfile`, from the page cache straight to the socket, no copy through Python),
+        which falls back to plain sends where it isn't supported; in memory bodies go out in a single write
+        '''
+        length = self.copy_length
+        if isinstance(source, io.BytesIO):
+            # read() of an untouched BytesIO returns its bytes without a copy
+            outputfile.write(source.read() if length is None else source.read(length))
+        elif self.use_sendfile:
+            self.connection.sendfile(source, source.tell(), length)
+        elif length is None:
+            super().copyfile(source, outputfile)
+        else:
+            while length > 0:
+                chunk = source.read(min(length, 64 * 1024))
+                if not chunk:
+                    break
+                outputfile.write(chunk)
+                length -= len(chunk)
+
+    def accepts_gzip(self) -> bool:
+        'True when the Accept-Encoding header of the request allows gzip (or any coding) with a non zero quality'
+        for coding in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = coding.partition(";")
+            if name.strip().lower() not in ("gzip", "*"):
+                continue
+            params = params.strip().replace(" ", "")
+            if not params.startswith("q="):
+                return True
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return False
+
+    def load_file(self, path: str) -> CachedFile | None:
+        'Reads a file (and its gzip sibling) into the cache, returns None when it is not a readable file or too big to cache'
+        generation = self.cache.generation
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size > self.cache.max_file_bytes:
+                    return None
+                body = f.read()
+        except OSError:
+            return None
+        gzip_body = None
+        if self.livereload is not None and path.endswith(".html"):
+            body = inject_livereload(body)
+        else:
+            try:
+                with open(path + GZIP_SUFFIX, 'rb') as f:
+                    # a sibling without the mtime of its file is stale, see `gzip_is_fresh`
+                    if os.fstat(f.fileno()).st_mtime_ns == stat.st_mtime_ns:
+                        gzip_body = f.read()
+            except OSError:
+                pass
+        entry = CachedFile(body, stat.st_mtime, self.guess_type(path), gzip_body)
+        self.cache.put(path, entry, generation)
+        return entry
+
+    def not_modified(self, etag: str, mtime: float) -> bool:
+        'True when the conditional headers of the request match the version of a file, If-None-Match wins over If-Modified-Since'
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        if since.tzinfo is None:
+            return False
+        # Last-Modified has whole seconds
+        return int(mtime) <= since.timestamp()
+
+    def send_not_modified(self, etag: str):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+    def send_cached(self, entry: CachedFile, encoding: str | None = None):
+        if self.not_modified(entry.etag, entry.mtime):
+            self.send_not_modified(entry.etag)
+            return None
+        byte_range = self.requested_range(len(entry.body), entry.etag)
+        if byte_range is False:
+            return None
+        if byte_range is None:
+            self.send_response(200)
+            body = entry.body
+        else:
+            first, last = byte_range
+            body = entry.body[first:last + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(entry.body)}")
+        self.send_header("Content-Type", entry.content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", entry.last_modified)
+        # revalidate every time, any rebuild may change the file and a 304 is cheap
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        return io.BytesIO(body)
 
 
 def run(
-    server_class=HTTPServer,
+    server_class=PooledHTTPServer,
     handler_class=CORSHTTPRequestHandler,
     port=8000,
     directory=None,
+    livereload=False,
+    workers=16,
+    max_connections=128,
+    quiet=False,
+    cache_size=64 * 1024 * 1024,
+    sendfile=True,
 ):
     if directory:  # Change the current working directory if directory is specified
         os.chdir(directory)
+    hub = LiveReloadHub(BUILD_CHANGES_FILE) if livereload or cache_size else None
+    if livereload:
+        handler_class.livereload = hub
+    if cache_size:
+        handler_class.cache = FileCache(cache_size)
+        hub.listeners.append(handler_class.cache.invalidate_build)
+    handler_class.quiet = quiet
+    handler_class.use_sendfile = sendfile
     server_address = ("", port)
-    httpd = server_class(server_address, handler_class)
-    print(f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
+    httpd = server_class(server_address, handler_class, workers=workers, max_connections=max_connections)
+    print(f"Serving HTTP on http://localhost:{port} from directory '{directory}' with {workers} workers...")
     httpd.serve_forever()
 
 
@@ -35,6 +651,33 @@ if __name__ == "__main__":
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--livereload", action="store_true",
+        help="Reload browsers when `src/main.py --watch` rebuilds the page they show"
+    )
+    parser.add_argument("--workers", type=int, help="Number of threads serving connections", default=16)
+    parser.add_argument(
+        "--max-connections", type=int, default=128,
+        help="Connections served or waiting for a worker at once, more are refused with a 503"
+    )
+    parser.add_argument("--quiet", action="store_true", help="Don't log every request")
+    parser.add_argument(
+        "--cache-size", type=int, default=64,
+        help="MiB of file contents kept in memory, invalidated by the builds of `src/main.py` (0 turns the cache off)"
+    )
+    parser.add_argument(
+        "--no-sendfile", action="store_true",
+        help="Copy files from disk through Python buffers instead of `os.sendfile` (for comparison)"
+    )
     args = parser.parse_args()
 
-    run(port=args.port, directory=args.dir)
+    run(
+        port=args.port,
+        directory=args.dir,
+        livereload=args.livereload,
+        workers=args.workers,
+        max_connections=args.max_connections,
+        quiet=args.quiet,
+        cache_size=args.cache_size * 1024 * 1024,
+        sendfile=not args.no_sendfile,
+    )
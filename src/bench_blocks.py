@@ -0,0 +1,112 @@
+import re
+import random
+import argparse
+import time
+from corpus import CorpusGenerator, default_block_mix
+from markdown_blocks import (
+    block_type_paragraph,
+    block_type_heading,
+    block_type_code,
+    block_type_quote,
+    block_type_ol,
+    block_type_ul,
+    block_to_block_type,
+    block_to_html_node,
+    classify_block,
+    paragraph_to_html_node,
+    heading_to_html_node,
+    code_to_html_node,
+    quote_to_html_node,
+    ol_to_html_node,
+    ul_to_html_node,
+)
+
+
+# "before": block typing prior to the dispatch table, a chain of prefix checks with a regex compiled on the fly
+def chain_block_to_block_type(block: str) -> str:
+    block = block.strip("\n")
+    block = block.strip("    ")
+    if (
+        block.startswith("# ")
+        or block.startswith("## ")
+        or block.startswith("### ")
+        or block.startswith("#### ")
+        or block.startswith("##### ")
+        or block.startswith("###### ")
+    ):
+        return block_type_heading
+    if block[:3] == "```" and block[-3:] == "```":
+        return block_type_code
+    if block[:2] == "> ":
+        return block_type_quote
+    if block[:2] == "- " or block[:2] == "* ":
+        return block_type_ul
+    if re.match(r'\d+', block[0]) and (block[1] == "." or block[1] == ")"):
+        return block_type_ol
+    return block_type_paragraph
+
+
+# "before": conversion prior to the dispatch table, the converters scan the prefix again (heading level, marker width)
+def chain_block_to_html_node(block: str):
+    block_type = chain_block_to_block_type(block)
+    if block_type is block_type_paragraph:
+        return paragraph_to_html_node(block)
+    if block_type is block_type_heading:
+        return heading_to_html_node(block)
+    if block_type is block_type_code:
+        return code_to_html_node(block)
+    if block_type is block_type_ol:
+        return ol_to_html_node(block)
+    if block_type is block_type_ul:
+        return ul_to_html_node(block)
+    if block_type is block_type_quote:
+        return quote_to_html_node(block)
+    raise ValueError("Invalid block type")
+
+
+def make_blocks(count: int, seed: int) -> list[str]:
+    'Returns `count` blocks drawn from the default block mix of the synthetic corpus'
+    generator = CorpusGenerator(seed=seed)
+    rng = random.Random(seed)
+    block_types = list(default_block_mix)
+    weights = [default_block_mix[block_type] for block_type in block_types]
+    return [generator.block(rng, rng.choices(block_types, weights)[0]) for _ in range(count)]
+
+
+def measure(function, blocks: list[str], repeat: int) -> float:
+    'Returns the blocks per second of `function`, best of `repeat` runs'
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for block in blocks:
+            function(block)
+        best = min(best, time.perf_counter() - start)
+    return len(blocks) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block typing and conversion throughput over a mix of block types")
+    parser.add_argument("--blocks", type=int, default=100000, help="Blocks per measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best one is reported")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the block mix")
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks, args.seed)
+    for block in blocks:
+        if chain_block_to_block_type(block) != block_to_block_type(block):
+            raise ValueError(f"block typed differently: {block!r}")
+
+    benchmarks = [
+        ("typing before (if chain)", chain_block_to_block_type),
+        ("typing, classify_block", classify_block),
+        ("conversion before (if chain, rescan)", chain_block_to_html_node),
+        ("conversion, dispatch table", block_to_html_node),
+    ]
+    print(f"{args.blocks:,} blocks, mix {', '.join(f'{block_type} {weight}' for block_type, weight in default_block_mix.items())}")
+    print(f"{'stage':<40}{'blocks/sec':>14}")
+    for name, function in benchmarks:
+        print(f"{name:<40}{measure(function, blocks, args.repeat):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
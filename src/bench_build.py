@@ -0,0 +1,177 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+from contextlib import redirect_stdout
+import markdown_blocks
+from corpus import CorpusGenerator, default_block_mix
+from gencontent import extract_title_markdown, generate_pages_recursive
+from htmlnode import ParentNode
+from markdown_blocks import markdown_to_blocks, block_to_block_type, block_to_html_node
+from sitemodel import SiteModel
+from template import Template
+
+stages = ["read", "block_split", "block_typing", "inline_parsing", "block_conversion", "html_serialization", "template_fill", "disk_write"]
+
+benchmark_template = "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body><article>{{ Content }}</article></body></html>"
+
+
+def run_stages(pages: list[tuple[str, str]], template: Template) -> dict[str, float]:
+    '''
+    Builds every page step by step, timing each stage of the pipeline separately.
+    `inline_parsing` is measured inside `block_conversion` and subtracted from it, `block_typing` is timed on its own
+    (block conversion classifies the block again).
+    '''
+    timings = dict.fromkeys(stages, 0.0)
+    inline_time = [0.0]
+    text_to_textnodes = markdown_blocks.text_to_textnodes
+
+    def timed_text_to_textnodes(text):
+        start = time.perf_counter()
+        nodes = text_to_textnodes(text)
+        inline_time[0] += time.perf_counter() - start
+        return nodes
+
+    markdown_blocks.text_to_textnodes = timed_text_to_textnodes
+    try:
+        for src_path, dst_path in pages:
+            t0 = time.perf_counter()
+            with open(src_path, 'r') as f:
+                md = f.read()
+            t1 = time.perf_counter()
+            blocks = markdown_to_blocks(md)
+            t2 = time.perf_counter()
+            for block in blocks:
+                block_to_block_type(block)
+            t3 = time.perf_counter()
+            root = ParentNode("div", children=[block_to_html_node(block) for block in blocks])
+            t4 = time.perf_counter()
+            html = root.to_html()
+            t5 = time.perf_counter()
+            page = template.render(Content=html, Title=extract_title_markdown(md))
+            t6 = time.perf_counter()
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            with open(dst_path, 'w') as f:
+                f.write(page)
+            t7 = time.perf_counter()
+            timings["read"] += t1 - t0
+            timings["block_split"] += t2 - t1
+            timings["block_typing"] += t3 - t2
+            timings["block_conversion"] += t4 - t3
+            timings["html_serialization"] += t5 - t4
+            timings["template_fill"] += t6 - t5
+            timings["disk_write"] += t7 - t6
+    finally:
+        markdown_blocks.text_to_textnodes = text_to_textnodes
+    timings["inline_parsing"] = inline_time[0]
+    timings["block_conversion"] -= inline_time[0]
+    return timings
+
+
+def parse_block_mix(value: str) -> dict[str, int]:
+    'Parses "paragraph=6,code=1" into a block mix'
+    block_mix = {}
+    for item in value.split(","):
+        block_type, weight = item.split("=")
+        if block_type not in default_block_mix:
+            raise argparse.ArgumentTypeError(f"Invalid block type: {block_type}")
+        block_mix[block_type] = int(weight)
+    return block_mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build benchmark on a deterministic synthetic corpus")
+    parser.add_argument("--pages", type=int, default=1000, help="Number of pages to generate")
+    parser.add_argument("--depth", type=int, default=2, help="Directory levels the pages are spread over")
+    parser.add_argument("--blocks", type=int, default=40, help="Blocks per page")
+    parser.add_argument("--block-mix", type=parse_block_mix, default=None, help='Relative block type weights, e.g. "paragraph=6,heading=2,code=1"')
+    parser.add_argument("--inline-density", type=float, default=0.1, help="Share of words wrapped in inline markup")
+    parser.add_argument("--links", type=int, default=5, help="Links to other pages per page")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the corpus generator")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for the end to end build")
+    parser.add_argument("--json", type=str, default=None, help="Write the results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    corpus = CorpusGenerator(
+        pages=args.pages,
+        depth=args.depth,
+        blocks=args.blocks,
+        block_mix=args.block_mix,
+        inline_density=args.inline_density,
+        links=args.links,
+        seed=args.seed,
+    )
+    work_dir = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        content_path = os.path.join(work_dir, "content")
+        public_path = os.path.join(work_dir, "public")
+        template_path = os.path.join(work_dir, "template.html")
+        with open(template_path, 'w') as f:
+            f.write(benchmark_template)
+        start = time.perf_counter()
+        corpus.write(content_path)
+        corpus_time = time.perf_counter() - start
+        pages = [(page.src_path, page.dst_path) for page in SiteModel(content_path, public_path).pages]
+        corpus_bytes = sum(os.path.getsize(src) for src, _ in pages)
+
+        # per stage timings, single process
+        timings = run_stages(pages, Template(benchmark_template, template_path))
+        staged_total = sum(timings.values())
+
+        # end to end build through the real entry point
+        shutil.rmtree(public_path)
+        os.mkdir(public_path)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content_path, template_path, public_path, jobs=args.jobs)
+        build_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir)
+
+    results = {
+        "corpus": {
+            "pages": args.pages,
+            "depth": args.depth,
+            "blocks": args.blocks,
+            "block_mix": corpus.block_mix,
+            "inline_density": args.inline_density,
+            "links": args.links,
+            "seed": args.seed,
+            "bytes": corpus_bytes,
+            "generation_seconds": corpus_time,
+        },
+        "stages": timings,
+        "staged_pages_per_second": args.pages / staged_total,
+        "build": {
+            "jobs": args.jobs,
+            "seconds": build_time,
+            "pages_per_second": args.pages / build_time,
+        },
+        # ru_maxrss is in kilobytes on linux and bytes on macOS
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+        "python": sys.version.split()[0],
+    }
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"corpus: {args.pages} pages, {corpus_bytes / 1e6:.1f} MB")
+    print(f"{'stage':<22}{'total ms':>12}{'share':>8}")
+    for stage in stages:
+        print(f"{stage:<22}{timings[stage] * 1e3:>12.1f}{timings[stage] / staged_total:>8.1%}")
+    print(f"{'staged pages/sec':<22}{results['staged_pages_per_second']:>12,.0f}")
+    print(f"{'build pages/sec':<22}{results['build']['pages_per_second']:>12,.0f}  (jobs={args.jobs})")
+    print(f"{'peak rss':<22}{results['peak_rss_bytes'] / 1e6:>12.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
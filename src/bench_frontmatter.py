@@ -0,0 +1,58 @@
+import time
+import shutil
+import argparse
+import tempfile
+from corpus import CorpusGenerator
+from frontmatter import read_page_meta, split_front_matter
+from sitemodel import SiteModel
+
+
+def read_whole(paths: list[str]) -> list[dict]:
+    'The front matter of every page, reading and splitting each file whole (what a header-less reader costs)'
+    metas = []
+    for path in paths:
+        with open(path, 'r') as f:
+            metas.append(split_front_matter(f.read())[0])
+    return metas
+
+
+def read_headers(paths: list[str]) -> list[dict]:
+    'The front matter of every page, reading only up to its closing delimiter'
+    return [read_page_meta(path)[0] for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time reading the front matter of many pages, header only vs whole files")
+    parser.add_argument("--pages", type=int, default=20000, help="Pages generated")
+    parser.add_argument("--blocks", type=int, default=40, help="Blocks per page (the body the header only reader skips)")
+    parser.add_argument("--front-matter", type=float, default=1.0, help="Share of pages with front matter")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each reader, the best one is reported")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        content_path = f"{work_dir}/content"
+        paths = CorpusGenerator(pages=args.pages, blocks=args.blocks, links=0, front_matter=args.front_matter).write(content_path)
+        results = {}
+        for name, reader in (("whole files", read_whole), ("header only", read_headers)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                metas = reader(paths)
+                best = min(best, time.perf_counter() - start)
+            results[name] = (best, metas)
+        if results["whole files"][1] != results["header only"][1]:
+            raise ValueError("the readers disagree on the front matter")
+        start = time.perf_counter()
+        site = SiteModel(content_path, f"{work_dir}/public")
+        scanned = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir)
+    print(f"{args.pages:,} pages of {args.blocks} blocks, {args.front_matter:.0%} with front matter")
+    for name, (seconds, _) in results.items():
+        print(f"{name:<16}{seconds * 1e3:>8.0f} ms{args.pages / seconds:>12,.0f} pages/s")
+    print(f"{'site scan':<16}{scanned * 1e3:>8.0f} ms  {len(site.pages):,} pages, {len(site.drafts):,} drafts skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import time
+from inline_markdown import (
+    split_nodes_image,
+    split_nodes_link,
+    split_text_to_textnodes,
+    scan_text_to_textnodes,
+)
+from textnode import TextNode, text_type_text
+
+
+def link_dense_text(links: int) -> str:
+    'A single paragraph line with `links` links and images, like the auto-generated index pages'
+    parts = []
+    for i in range(links):
+        if i % 10 == 0:
+            parts.append(f"![thumbnail {i}](/images/{i}.png)")
+        else:
+            parts.append(f"[page {i}](/pages/{i})")
+    return " | ".join(parts)
+
+
+def best_time(func, text: str, repeat: int) -> float:
+    'Returns the best wall time in seconds of `func(text)` over `repeat` runs'
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline markdown benchmark on link-dense paragraphs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Number of links per paragraph")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement, the best one is kept")
+    args = parser.parse_args()
+
+    benchmarks = {
+        "split_nodes_image": lambda text: split_nodes_image([TextNode(text, text_type_text)]),
+        "split_nodes_link": lambda text: split_nodes_link([TextNode(text, text_type_text)]),
+        "split_text_to_textnodes": split_text_to_textnodes,
+        "scan_text_to_textnodes": scan_text_to_textnodes,
+    }
+    print(f"{'benchmark':<26}{'links':>8}{'total ms':>12}{'us/link':>10}{'scaling':>10}")
+    for name, func in benchmarks.items():
+        previous = None
+        for size in args.sizes:
+            elapsed = best_time(func, link_dense_text(size), args.repeat)
+            per_link = elapsed / size * 1e6
+            # linear code keeps the time per link flat as the paragraph grows, so this ratio stays close to 1.0
+            scaling = "" if previous is None else f"{per_link / previous:.2f}x"
+            previous = per_link
+            print(f"{name:<26}{size:>8}{elapsed * 1e3:>12.2f}{per_link:>10.2f}{scaling:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import time
+import tracemalloc
+from htmlnode import LeafNode, ParentNode, set_validation
+from textnode import TextNode, text_type_text
+
+
+# "before": the node layout prior to __slots__, with a per-instance __dict__ and validation on every construction
+class DictLeafNode:
+    def __init__(self, tag: str | None, value: str | None, props: dict[str, str | None] | None = None):
+        if not isinstance(tag, str) and tag is not None:
+            raise TypeError("Tag must be a string")
+        if not isinstance(value, str) and value is not None:
+            raise TypeError("Value must be a string")
+        if not isinstance(props, dict) and props is not None:
+            raise TypeError("Props must be a dictionary")
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+class DictTextNode:
+    def __init__(self, text: str, text_type: str, url: str | None = None):
+        if not isinstance(text, str):
+            raise TypeError("text must be a string")
+        if not isinstance(text_type, str):
+            raise TypeError("text_type must be a string")
+        if not isinstance(url, str) and url is not None:
+            raise TypeError("url must be a list")
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def measure(factory, count: int) -> tuple[float, float]:
+    'Returns (bytes per node, nodes per second) for building `count` nodes with `factory`'
+    # shared text so only the nodes themselves are counted
+    values = ["x"] * count
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(value) for value in values]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the nodes costs one pointer per node, which isn't part of the node
+    per_node = (after - before) / count - 8
+    del nodes
+    start = time.perf_counter()
+    nodes = [factory(value) for value in values]
+    elapsed = time.perf_counter() - start
+    return per_node, count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and construction throughput of the node classes")
+    parser.add_argument("--count", type=int, default=200000, help="Nodes built per measurement")
+    args = parser.parse_args()
+
+    benchmarks = [
+        ("TextNode before (dict, validated)", lambda v: DictTextNode(v, text_type_text), False),
+        ("TextNode slots, validated", lambda v: TextNode(v, text_type_text), True),
+        ("TextNode slots", lambda v: TextNode(v, text_type_text), False),
+        ("LeafNode before (dict, validated)", lambda v: DictLeafNode("b", v), False),
+        ("LeafNode slots, validated", lambda v: LeafNode("b", v), True),
+        ("LeafNode slots", lambda v: LeafNode("b", v), False),
+        ("ParentNode slots (+ empty children)", lambda v: ParentNode("p", [], None), False),
+    ]
+    print(f"{'node':<36}{'bytes/node':>12}{'nodes/sec':>14}")
+    for name, factory, validate in benchmarks:
+        set_validation(validate)
+        per_node, throughput = measure(factory, args.count)
+        print(f"{name:<36}{per_node:>12.0f}{throughput:>14,.0f}")
+    set_validation(False)
+
+
+if __name__ == "__main__":
+    main()
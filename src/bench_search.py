@@ -0,0 +1,43 @@
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+from corpus import words
+from search import SearchIndex, default_max_postings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and peak memory of building the search index of many pages")
+    parser.add_argument("--pages", type=int, default=20000, help="Pages indexed")
+    parser.add_argument("--terms", type=int, default=60, help="Distinct terms per page")
+    parser.add_argument("--vocabulary", type=int, default=10000, help="Distinct terms over the whole site")
+    parser.add_argument("--max-postings", type=int, default=default_max_postings, help="Postings held in memory before spilling to disk")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the page terms")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = [f"{words[i % len(words)]}{i}" for i in range(args.vocabulary)]
+    public_path = tempfile.mkdtemp()
+    try:
+        search = SearchIndex(public_path, max_postings=args.max_postings)
+        start = time.perf_counter()
+        for i in range(args.pages):
+            terms = {term: rng.randint(1, 5) for term in rng.sample(vocabulary, args.terms)}
+            search.add_page(f"{public_path}/section{i % 100}/page{i}.html", f"Page {i}", terms)
+        added = time.perf_counter()
+        shards = search.save()
+        saved = time.perf_counter()
+    finally:
+        shutil.rmtree(public_path)
+    postings = args.pages * args.terms
+    print(f"{args.pages:,} pages, {postings:,} postings, {shards} shards, spilling past {args.max_postings:,} postings")
+    print(f"{'add pages':<16}{added - start:>8.1f} s{postings / (added - start):>14,.0f} postings/s")
+    print(f"{'write shards':<16}{saved - added:>8.1f} s{postings / (saved - added):>14,.0f} postings/s")
+    # ru_maxrss is in KiB on Linux
+    print(f"{'peak RSS':<16}{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:>8.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
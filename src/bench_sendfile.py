@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from bench_server import server_script, free_port, wait_for_port
+
+
+def write_files(public_path: str, count: int, size: int) -> list[str]:
+    'Writes `count` files of random bytes, returns their urls'
+    os.makedirs(f"{public_path}/media")
+    urls = []
+    for i in range(count):
+        with open(f"{public_path}/media/{i}.bin", 'wb') as f:
+            f.write(os.urandom(size))
+        urls.append(f"/media/{i}.bin")
+    return urls
+
+
+def client(port: int, urls: list[str], offset: int, deadline: float, received: list[int]):
+    'Downloads `urls` round robin over one keep-alive connection until `deadline`, counting the bytes'
+    conn = http.client.HTTPConnection("localhost", port, timeout=30)
+    buffer = bytearray(1024 * 1024)
+    total = 0
+    i = offset
+    while time.monotonic() < deadline:
+        conn.request("GET", urls[i % len(urls)])
+        i += 1
+        response = conn.getresponse()
+        while True:
+            n = response.readinto(buffer)
+            if not n:
+                break
+            total += n
+    conn.close()
+    received.append(total)
+
+
+def run(public_path: str, urls: list[str], sendfile: bool, concurrency: int, duration: float) -> tuple[float, float, float]:
+    'Loads a fresh server, returns (MiB/s, server cpu seconds per GiB sent, server peak RSS in MiB)'
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, server_script, "--dir", public_path, "--port", str(port), "--quiet"] + ([] if sendfile else ["--no-sendfile"]),
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        received: list[int] = []
+        deadline = time.monotonic() + duration
+        threads = [threading.Thread(target=client, args=(port, urls, i, deadline, received)) for i in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        # wait4 instead of wait, for the resource usage of the server process
+        _, _, usage = os.wait4(server.pid, 0)
+        server.returncode = -1
+    total = sum(received)
+    cpu = usage.ru_utime + usage.ru_stime
+    # ru_maxrss is in KiB on Linux
+    return total / elapsed / 2**20, cpu / max(total / 2**30, 1e-9), usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare server.py throughput on multi-MB files with and without sendfile")
+    parser.add_argument("--files", type=int, default=4, help="Number of files")
+    parser.add_argument("--size", type=int, default=16, help="MiB per file")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=3, help="Seconds of load per mode")
+    args = parser.parse_args()
+
+    public_path = tempfile.mkdtemp()
+    try:
+        urls = write_files(public_path, args.files, args.size * 2**20)
+        print(f"{args.files} files of {args.size} MiB, {args.concurrency} connections, {args.duration:.0f}s per mode")
+        print(f"{'mode':<12}{'MiB/s':>10}{'cpu s/GiB':>12}{'peak RSS MiB':>16}")
+        for name, sendfile in (("copy", False), ("sendfile", True)):
+            throughput, cpu, rss = run(public_path, urls, sendfile, args.concurrency, args.duration)
+            print(f"{name:<12}{throughput:>10,.0f}{cpu:>12.3f}{rss:>16.1f}")
+    finally:
+        shutil.rmtree(public_path)
+
+
+if __name__ == "__main__":
+    main()
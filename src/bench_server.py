@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+import urllib.parse
+
+server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server.py")
+
+
+def site_urls(public_path: str) -> list[str]:
+    'Every file of the generated site as a percent-encoded url path (search shards have non ascii names, e.g. "eä.json")'
+    urls = []
+    for dir_path, _, files in os.walk(public_path):
+        for file in sorted(files):
+            rel_path = os.path.relpath(os.path.join(dir_path, file), public_path)
+            urls.append(urllib.parse.quote("/" + rel_path.replace(os.sep, "/")))
+    return sorted(urls)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise ValueError(f"server didn't start on port {port}")
+
+
+def client(host: str, port: int, urls: list[str], offset: int, deadline: float, keepalive: bool, latencies: list[float], errors: list[str]):
+    'Requests `urls` round robin until `deadline`, over one keep-alive connection (or a new connection per request)'
+    conn = None
+    i = offset
+    while time.monotonic() < deadline:
+        url = urls[i % len(urls)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+            conn.request("GET", url, headers={} if keepalive else {"Connection": "close"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(f"{url}: {response.status}")
+            if not keepalive or response.will_close:
+                conn.close()
+                conn = None
+        # any failure is counted, a dying thread would silently lower the load instead
+        except Exception as e:
+            errors.append(f"{url}: {type(e).__name__}")
+            if conn is not None:
+                conn.close()
+            conn = None
+            continue
+        latencies.append(time.perf_counter() - start)
+    if conn is not None:
+        conn.close()
+
+
+def percentile(values: list[float], share: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server.py against the generated site")
+    parser.add_argument("--public", type=str, default="./public", help="Generated site to serve (run src/main.py first)")
+    parser.add_argument("--url", type=str, default=None, help="host:port of an already running server, instead of starting one")
+    parser.add_argument("--workers", type=int, default=16, help="--workers of the started server")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds of load")
+    parser.add_argument("--no-keepalive", action="store_true", help="Open a new connection for every request")
+    parser.add_argument("--server-arg", action="append", default=[], help="Extra argument for the started server (repeatable)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.public):
+        raise ValueError(f"{args.public} doesn't exist, build the site first")
+    urls = site_urls(args.public)
+    server = None
+    if args.url is None:
+        host, port = "localhost", free_port()
+        server = subprocess.Popen(
+            [sys.executable, server_script, "--dir", args.public, "--port", str(port), "--workers", str(args.workers), "--quiet"]
+            + args.server_arg,
+            stdout=subprocess.DEVNULL,
+        )
+    else:
+        host, port_text = args.url.split(":")
+        port = int(port_text)
+    try:
+        wait_for_port(port)
+        latencies: list[float] = []
+        errors: list[str] = []
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=client, args=(host, port, urls, i, deadline, not args.no_keepalive, latencies, errors))
+            for i in range(args.concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"{len(urls)} urls, {args.concurrency} connections, keep-alive {'off' if args.no_keepalive else 'on'}, {args.duration:.0f}s")
+    if not latencies:
+        print(f"no successful requests, {len(errors)} errors")
+        return
+    print(f"{'requests/sec':<16}{len(latencies) / elapsed:>12,.0f}")
+    print(f"{'p50 latency':<16}{percentile(latencies, 0.50) * 1e3:>12.2f} ms")
+    print(f"{'p99 latency':<16}{percentile(latencies, 0.99) * 1e3:>12.2f} ms")
+    print(f"{'errors':<16}{len(errors):>12}")
+
+
+if __name__ == "__main__":
+    main()
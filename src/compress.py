@@ -0,0 +1,91 @@
+import os
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+
+# `server.py` serves "<file>.gz" instead of "<file>" to clients accepting gzip
+gzip_suffix = ".gz"
+# formats that are compressed already, gzip would only make them bigger
+precompressed_extensions = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".ico",
+    ".woff", ".woff2", ".mp3", ".mp4", ".webm", ".ogg",
+    ".zip", ".gz", ".br", ".zst", ".bz2", ".xz", ".pdf",
+})
+
+
+def compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() not in precompressed_extensions
+
+
+def remove_stale(gz_path: str):
+    if os.path.exists(gz_path):
+        os.remove(gz_path)
+
+
+def compress_file(path: str) -> tuple[int, int] | None:
+    '''
+    Writes a gzip sibling "`path`.gz" carrying the mtime of `path`, so a sibling with the same mtime is known to be current and skipped.
+    Returns the (size, compressed size) when a sibling was written, None when it was current or not worth it.
+    A sibling that doesn't shrink the file, or whose file was removed, is deleted.
+    '''
+    gz_path = path + gzip_suffix
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        remove_stale(gz_path)
+        return None
+    if not compressible(path):
+        remove_stale(gz_path)
+        return None
+    try:
+        if os.stat(gz_path).st_mtime_ns == stat.st_mtime_ns:
+            return None
+    except FileNotFoundError:
+        pass
+    with open(path, 'rb') as f:
+        data = f.read()
+    # mtime=0 keeps the output identical between builds
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) >= len(data):
+        remove_stale(gz_path)
+        return None
+    # write then rename, so the server never serves a half written file
+    with open(f"{gz_path}.tmp", 'wb') as f:
+        f.write(compressed)
+    os.utime(f"{gz_path}.tmp", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(f"{gz_path}.tmp", gz_path)
+    return len(data), len(compressed)
+
+
+def compress_outputs(paths: list[str], jobs: int = 1):
+    'Brings the gzip siblings of the given outputs up to date, compressing on `jobs` threads (zlib releases the GIL)'
+    paths = [path for path in paths if not path.endswith(gzip_suffix)]
+    if jobs > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(compress_file, paths))
+    else:
+        results = [compress_file(path) for path in paths]
+    # printed here in order, not from the threads
+    for path, result in zip(paths, results):
+        if result is not None:
+            size, compressed_size = result
+            print(f" * {path} -> {path}{gzip_suffix} ({size} -> {compressed_size} bytes)")
+
+
+def compress_tree(public_path: str, jobs: int = 1):
+    'Brings every gzip sibling in the public dir up to date and removes the ones whose file is gone'
+    paths: list[str] = []
+    dirs = [public_path]
+    while dirs:
+        with os.scandir(dirs.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    dirs.append(entry.path)
+                # hidden files like the build changes file are not served to browsers
+                elif entry.name.startswith("."):
+                    continue
+                elif entry.name.endswith(gzip_suffix):
+                    if not os.path.exists(entry.path[:-len(gzip_suffix)]):
+                        os.remove(entry.path)
+                else:
+                    paths.append(entry.path)
+    compress_outputs(sorted(paths), jobs)
@@ -1,20 +1,174 @@
 import os
 import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from manifest import BuildManifest
+from compress import gzip_suffix, remove_stale
 
-def copy_files_recursively(src_path: str, dst_path: str):
-    'Will copy over all nested directories and files from a target directory, specifically set to the "static" dir'
+# how static files get into the public dir
+copy_strategy_copy = "copy"
+# hard links share the bytes (and the inode) with the static file, nothing is written
+copy_strategy_hardlink = "hardlink"
+# `os.copy_file_range` shares the extents on filesystems that support reflinks (btrfs, xfs) and copies inside the kernel elsewhere
+copy_strategy_reflink = "reflink"
+# copies only when the public file differs: by size and mtime first, by content hash when only the mtime differs
+copy_strategy_changed = "changed"
+copy_strategies = (copy_strategy_copy, copy_strategy_hardlink, copy_strategy_reflink, copy_strategy_changed)
+
+
+class CopyReport:
+    'Number of files and bytes of a static copy, per action: "copied", "linked" or "skipped"'
+    actions = ("copied", "linked", "skipped")
+
+    def __init__(self):
+        # action => [files, bytes]
+        self.totals: dict[str, list] = {action: [0, 0] for action in self.actions}
+
+    def add(self, action: str, size: int):
+        totals = self.totals[action]
+        totals[0] += 1
+        totals[1] += size
+
+    def summary(self) -> str:
+        return ", ".join(f"{action} {files} files ({size / 2**20:.1f} MiB)" for action, (files, size) in self.totals.items())
+
+
+def copy_files_recursively(
+        src_path: str,
+        dst_path: str,
+        manifest: BuildManifest | None = None,
+        strategy: str = copy_strategy_copy,
+        jobs: int = 1
+    ) -> CopyReport:
+    '''
+    Will copy over all nested directories and files from a target directory, specifically set to the "static" dir.
+    When a `manifest` is given, files whose content is unchanged since the last build are not copied again.
+    Every file is copied with `strategy` (see `copy_file`), on `jobs` threads, and the returned report tells the bytes copied, linked and skipped.
+    '''
     if not os.path.exists(src_path):
         raise ValueError("src path doesn't exist")
     if not os.path.exists(dst_path):
         raise ValueError("dst path doesn't exist")
-    src_list = []
+    if strategy not in copy_strategies:
+        raise ValueError(f"unknown copy strategy {strategy}, expected one of {', '.join(copy_strategies)}")
+    files: list[tuple[str, str]] = []
+    collect_files(src_path, dst_path, files)
+    report = CopyReport()
+    pending: list[tuple[str, str]] = []
+    for src, dst in files:
+        if manifest is not None and manifest.is_current(src, dst):
+            report.add("skipped", os.path.getsize(src))
+        else:
+            pending.append((src, dst))
+    # copies are mostly waiting on the disk, threads are enough to overlap them
+    if jobs > 1 and len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            actions = list(executor.map(lambda item: copy_file(item[0], item[1], strategy), pending))
+    else:
+        actions = [copy_file(src, dst, strategy) for src, dst in pending]
+    # logged and recorded here, in the order of a serial copy
+    for (src, dst), action in zip(pending, actions):
+        if action != "skipped":
+            print(f" * {src} -> {dst}")
+        report.add(action, os.path.getsize(src))
+        if manifest is not None:
+            manifest.record(src, dst)
+    return report
+
+
+def collect_files(src_path: str, dst_path: str, files: list[tuple[str, str]]):
+    'Appends the (src, dst) path of every file under `src_path` to `files`, creating the directories under `dst_path` on the way'
     for item in os.listdir(path=src_path):
         extended_src = os.path.join(src_path, item)
         extended_dst = os.path.join(dst_path, item)
         if os.path.isfile(extended_src):
-            print(f" * {extended_src} -> {extended_dst}")
-            shutil.copy(extended_src, extended_dst)
-            src_list.append(extended_src)
+            files.append((extended_src, extended_dst))
         else:
-            os.mkdir(extended_dst)
-            copy_files_recursively(extended_src, extended_dst)
+            if not os.path.exists(extended_dst):
+                os.mkdir(extended_dst)
+            collect_files(extended_src, extended_dst, files)
+
+
+def copy_file(src_path: str, dst_path: str, strategy: str = copy_strategy_copy) -> str:
+    '''
+    Copies a single static file with `strategy`, creating its parent directories if needed.
+    Hard links and reflinks fall back to a plain copy where the filesystem can't do them.
+    Returns how the bytes got there: "copied", "linked" or "skipped".
+    The gzip sibling of a replaced file is deleted, `--compress` writes it again.
+    '''
+    dst_dir_path = os.path.dirname(dst_path)
+    if dst_dir_path != "":
+        os.makedirs(dst_dir_path, exist_ok=True)
+    # a public file linked by an earlier `hardlink` build is the static file itself, writing into it would truncate the source
+    if strategy != copy_strategy_hardlink and is_same_file(src_path, dst_path):
+        os.remove(dst_path)
+    if strategy == copy_strategy_changed and is_unchanged(src_path, dst_path):
+        return "skipped"
+    remove_stale(dst_path + gzip_suffix)
+    if strategy == copy_strategy_changed:
+        # keeps the mtime, so the next build can tell it is unchanged without hashing
+        shutil.copy2(src_path, dst_path)
+        return "copied"
+    if strategy == copy_strategy_hardlink:
+        try:
+            link_file(src_path, dst_path)
+            return "linked"
+        except OSError:
+            pass
+    elif strategy == copy_strategy_reflink:
+        try:
+            reflink_file(src_path, dst_path)
+            return "copied"
+        except (OSError, AttributeError):
+            pass
+    shutil.copy(src_path, dst_path)
+    return "copied"
+
+
+def is_unchanged(src_path: str, dst_path: str) -> bool:
+    'True when `dst_path` has the content of `src_path`, only hashing both when their sizes match but their mtimes differ'
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_path)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    with open(src_path, 'rb') as src, open(dst_path, 'rb') as dst:
+        if hashlib.file_digest(src, "sha256").digest() != hashlib.file_digest(dst, "sha256").digest():
+            return False
+    # same content, take over the mtime so the next check is a stat
+    os.utime(dst_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+
+def is_same_file(src_path: str, dst_path: str) -> bool:
+    'True when `dst_path` exists and is a hard link to `src_path`'
+    try:
+        return os.path.samefile(src_path, dst_path)
+    except FileNotFoundError:
+        return False
+
+
+def link_file(src_path: str, dst_path: str):
+    'Hard links `dst_path` to `src_path`, replacing any existing file'
+    # renaming over another link to the same file would do nothing and leave the temporary link behind
+    if is_same_file(src_path, dst_path):
+        return
+    tmp_path = f"{dst_path}.tmp-link"
+    os.link(src_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+
+
+def reflink_file(src_path: str, dst_path: str):
+    'Copies `src_path` with `os.copy_file_range` (Linux only), so the bytes never go through user space'
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copymode(src_path, dst_path)
@@ -0,0 +1,134 @@
+import os
+import random
+from markdown_blocks import (
+    block_type_paragraph,
+    block_type_heading,
+    block_type_code,
+    block_type_quote,
+    block_type_ol,
+    block_type_ul,
+)
+
+# relative weight of every block type on a synthetic page
+default_block_mix = {
+    block_type_paragraph: 6,
+    block_type_heading: 2,
+    block_type_code: 1,
+    block_type_quote: 1,
+    block_type_ul: 1,
+    block_type_ol: 1,
+}
+
+words = (
+    "the quick brown fox jumps over lazy dog hobbit ring wizard shire river mountain forest road "
+    "elves dwarves dragon treasure journey council tower gate bridge valley king return night star"
+).split()
+
+
+class CorpusGenerator:
+    '''
+    Generates a deterministic synthetic content tree for benchmarks: the same arguments and seed always give byte for byte the same pages.
+
+    `pages`: number of markdown files, `depth`: how many directory levels they are spread over,
+    `blocks`: blocks per page, `block_mix`: relative weight of each block type,
+    `inline_density`: share of words wrapped in inline markup, `links`: links to other pages per page,
+    `front_matter`: share of pages starting with front matter (title, date, tags, and "draft: true" on every tenth of them).
+    '''
+    def __init__(
+            self,
+            pages: int = 1000,
+            depth: int = 2,
+            blocks: int = 40,
+            block_mix: dict[str, int] | None = None,
+            inline_density: float = 0.1,
+            links: int = 5,
+            front_matter: float = 0.0,
+            seed: int = 0
+        ):
+        self.pages = pages
+        self.depth = depth
+        self.blocks = blocks
+        self.block_mix = block_mix if block_mix is not None else default_block_mix
+        self.inline_density = inline_density
+        self.links = links
+        self.front_matter = front_matter
+        self.seed = seed
+
+    def page_paths(self) -> list[str]:
+        'Relative paths of every page, spread evenly over `depth` levels of at most 10 directories each'
+        paths = []
+        for i in range(self.pages):
+            dirs = []
+            n = i
+            for _ in range(self.depth):
+                dirs.append(f"section{n % 10}")
+                n //= 10
+            paths.append("/".join(dirs + [f"page{i}.md"]))
+        return paths
+
+    def write(self, content_path: str) -> list[str]:
+        'Writes the corpus under `content_path` and returns the paths of the written files'
+        rng = random.Random(self.seed)
+        paths = self.page_paths()
+        written = []
+        for i, path in enumerate(paths):
+            src_path = os.path.join(content_path, path)
+            os.makedirs(os.path.dirname(src_path), exist_ok=True)
+            with open(src_path, 'w') as f:
+                f.write(self.page(rng, i, paths))
+            written.append(src_path)
+        return written
+
+    def page(self, rng: random.Random, index: int, paths: list[str]) -> str:
+        'Returns the markdown of a single page'
+        block_types = list(self.block_mix)
+        weights = [self.block_mix[block_type] for block_type in block_types]
+        blocks = [f"# Page {index}"]
+        for _ in range(self.blocks):
+            block_type = rng.choices(block_types, weights)[0]
+            blocks.append(self.block(rng, block_type))
+        # links to other pages of the corpus, as absolute urls of their html output
+        for _ in range(self.links):
+            target = rng.choice(paths)[:-3]
+            blocks.append(f"See [{target}](/{target}.html) for more.")
+        # the rng is only drawn from with front matter, so corpora without it stay the same
+        if self.front_matter and rng.random() < self.front_matter:
+            draft = "true" if index % 10 == 0 else "false"
+            tags = ", ".join(rng.sample(words, 3))
+            header = f"---\ntitle: Page {index}\ndate: 2024-01-{index % 28 + 1:02d}\ntags: [{tags}]\ndraft: {draft}\n---\n"
+            return header + "\n\n".join(blocks) + "\n"
+        return "\n\n".join(blocks) + "\n"
+
+    def block(self, rng: random.Random, block_type: str) -> str:
+        'Returns a single block of the given type'
+        if block_type == block_type_heading:
+            return f"{'#' * rng.randint(2, 6)} {self.text(rng, 5)}"
+        if block_type == block_type_code:
+            lines = [" ".join(rng.choices(words, k=6)) for _ in range(rng.randint(2, 8))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        if block_type == block_type_quote:
+            return "\n".join(f"> {self.text(rng, 12)}" for _ in range(rng.randint(1, 4)))
+        if block_type == block_type_ul:
+            return "\n".join(f"- {self.text(rng, 8)}" for _ in range(rng.randint(2, 8)))
+        if block_type == block_type_ol:
+            return "\n".join(f"{i + 1}. {self.text(rng, 8)}" for i in range(rng.randint(2, 8)))
+        return "\n".join(self.text(rng, 16) for _ in range(rng.randint(1, 5)))
+
+    def text(self, rng: random.Random, length: int) -> str:
+        'A line of `length` words, with roughly `inline_density` of them wrapped in inline markup'
+        line = []
+        for word in rng.choices(words, k=length):
+            if rng.random() < self.inline_density:
+                markup = rng.randrange(5)
+                if markup == 0:
+                    word = f"**{word}**"
+                elif markup == 1:
+                    word = f"*{word}*"
+                elif markup == 2:
+                    word = f"`{word}`"
+                elif markup == 3:
+                    word = f"[{word}](https://example.com/{word})"
+                else:
+                    word = f"![{word}](/images/{word}.png)"
+            line.append(word)
+        return " ".join(line)
@@ -0,0 +1,159 @@
+import os
+import re
+import datetime
+from typing import BinaryIO, Iterable, TextIO
+
+# the line opening and closing the front matter at the very start of a page, "---" with nothing but trailing whitespace
+front_matter_delimiter = re.compile(r"^---[ \t\r]*(?:\n|\Z)", re.MULTILINE)
+front_matter_delimiter_bytes = re.compile(front_matter_delimiter.pattern.encode(), re.MULTILINE)
+# bytes read at a time looking for the end of the front matter
+header_read_size = 4096
+# values of "draft", other keys keep every value as a string
+true_values = ("true", "yes", "on")
+false_values = ("false", "no", "off")
+
+
+def parse_front_matter(lines: Iterable[str]) -> dict:
+    '''
+    Parses the lines between the front matter delimiters, a small subset of YAML:
+    "key: value" lines, values being quoted or bare strings or "[a, b]" lists,
+    an empty value followed by "- item" lines for a block list, blank lines and "#" comments.
+    "date" must be an ISO date (2024-01-31) and is kept as written, "draft" becomes a boolean ("true", "no", ...), "tags" is always a list.
+    '''
+    meta: dict = {}
+    key = None
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        if line.startswith("- ") and key is not None and isinstance(meta[key], list):
+            meta[key].append(parse_value(line[2:].strip()))
+            continue
+        key, separator, value = line.partition(":")
+        key = key.strip()
+        if separator == "" or key == "":
+            raise ValueError(f"front matter line {number} is not \"key: value\": {line}")
+        value = value.strip()
+        # an empty value opens a block list
+        meta[key] = parse_value(value) if value != "" else []
+    if "date" in meta:
+        try:
+            datetime.date.fromisoformat(str(meta["date"]))
+        except ValueError:
+            raise ValueError(f"front matter date is not an ISO date (YYYY-MM-DD): {meta['date']}")
+    if "draft" in meta:
+        if str(meta["draft"]).lower() in true_values:
+            meta["draft"] = True
+        elif str(meta["draft"]).lower() in false_values:
+            meta["draft"] = False
+        else:
+            raise ValueError(f"front matter draft is not true or false: {meta['draft']}")
+    if isinstance(meta.get("tags"), str):
+        meta["tags"] = [tag.strip() for tag in meta["tags"].split(",") if tag.strip() != ""]
+    return meta
+
+
+def has_key_line(lines: Iterable[str]) -> bool:
+    '''
+    True when the lines between two delimiters hold a "key: value" line.
+    Without one they are markdown that happens to start with a "---" line (a horizontal rule, a heading between two rules), not front matter.
+    '''
+    for line in lines:
+        line = line.strip()
+        if line == "" or line.startswith("#") or line.startswith("- "):
+            continue
+        key, separator, _ = line.partition(":")
+        if separator != "" and key.strip() != "":
+            return True
+    return False
+
+
+def parse_value(value: str) -> str | list:
+    'A front matter value: a quoted string, a "[a, b]" list or a bare string'
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item.strip()) for item in value[1:-1].split(",") if item.strip() != ""]
+    return value
+
+
+def read_front_matter(f: BinaryIO | TextIO) -> dict:
+    '''
+    Reads the front matter at the start of an open markdown file (binary or text) and returns it,
+    leaving the file at the first line of the body. Only the header is read: a page without front matter costs one line,
+    a page with front matter stops at the closing delimiter, the body is never read.
+    A "---" first line that is never closed, or whose lines up to the next one have no "key: value" line, is markdown:
+    the file is left at its start and there is no front matter.
+    '''
+    start = f.tell()
+    line = f.readline()
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    if not front_matter_delimiter.match(line):
+        f.seek(start)
+        return {}
+    lines: list[str] = []
+    while True:
+        line = f.readline()
+        if not line:
+            f.seek(start)
+            return {}
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if front_matter_delimiter.match(line):
+            if not has_key_line(lines):
+                f.seek(start)
+                return {}
+            return parse_front_matter(lines)
+        lines.append(line)
+
+
+def read_page_meta(src_path: str) -> tuple[dict, int]:
+    '''
+    Same as `read_front_matter` for the markdown file at `src_path`, also returning the byte offset its body starts at.
+    The file is read with raw reads of `header_read_size` bytes until the closing delimiter, without a buffered file object,
+    so a page without front matter costs an open and one read. Like `read_front_matter`, a header that is never closed
+    or has no "key: value" line is no front matter, the body starts at offset 0.
+    '''
+    fd = os.open(src_path, os.O_RDONLY)
+    try:
+        head = os.read(fd, header_read_size)
+        opening = front_matter_delimiter_bytes.match(head)
+        if opening is None:
+            return {}, 0
+        # a short read is the end of the file
+        end_of_file = len(head) < header_read_size
+        closing = front_matter_delimiter_bytes.search(head, opening.end())
+        # a delimiter at the end of what was read so far may be the start of a longer line
+        while (closing is None or closing.end() == len(head)) and not end_of_file:
+            chunk = os.read(fd, header_read_size)
+            end_of_file = len(chunk) < header_read_size
+            head += chunk
+            closing = front_matter_delimiter_bytes.search(head, opening.end())
+    finally:
+        os.close(fd)
+    if closing is None:
+        return {}, 0
+    lines = head[opening.end():closing.start()].decode("utf-8").split("\n")
+    if not has_key_line(lines):
+        return {}, 0
+    try:
+        meta = parse_front_matter(lines)
+    except ValueError as e:
+        raise ValueError(f"{src_path}: {e}")
+    return meta, closing.end()
+
+
+def split_front_matter(markdown: str) -> tuple[dict, str]:
+    'Splits the md of a whole page into its front matter and its body, see `read_front_matter` for what is front matter'
+    opening = front_matter_delimiter.match(markdown)
+    # most pages have none, don't copy them
+    if opening is None:
+        return {}, markdown
+    closing = front_matter_delimiter.search(markdown, opening.end())
+    if closing is None:
+        return {}, markdown
+    lines = markdown[opening.end():closing.start()].split("\n")
+    if not has_key_line(lines):
+        return {}, markdown
+    return parse_front_matter(lines), markdown[closing.end():]
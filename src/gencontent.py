@@ -1,44 +1,414 @@
+import io
 import os
-from markdown_blocks import markdown_to_html_node
+import mmap
+import time
+import hashlib
+from typing import Iterable
+from collections import Counter
+from contextlib import ExitStack, nullcontext, redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+import htmlnode
+import inline_markdown
+from htmlnode import ParentNode
+from markdown_blocks import (
+    markdown_to_html_node,
+    markdown_to_blocks,
+    block_to_block_type,
+    block_to_html_node,
+    markdown_stream_to_html_node,
+    markdown_buffer_to_html_node,
+    buffer_has_carriage_returns,
+    release_pages,
+    release_interval,
+    collect_links,
+    collect_text,
+)
+from manifest import BuildManifest
+from compress import gzip_suffix, remove_stale
+from frontmatter import read_front_matter, split_front_matter
+from profiling import BuildProfiler
+from parsecache import ParseCache
+from links import LinkIndex
+from search import SearchIndex, PageTerms, count_terms
+from sitemodel import SiteModel, SitePage
+from template import Template, TemplateCache, load_template
 
+# parse cache of a worker process, set up by `_init_worker`
+_worker_cache: ParseCache | None = None
+# markdown files at least this big are streamed block by block instead of being read and converted whole
+stream_threshold = 16 * 1024 * 1024
+# template slots filled with the navigation of each page, see `page_slots`
+navigation_slots = ("Nav", "Breadcrumbs")
 
-def generate_pages_recursive(src_path: str, template_path: str, dst_path: str):
-    'Will convert md to html, insert title and content into an html template, and create and write content dir structure to public dir.'
-    for file in os.listdir(src_path):
-        extended_src = f"{src_path}/{file}"
-        extended_dst = f"{dst_path}/{file}"
-        if os.path.isfile(extended_src):
-            extended_dst = f"{extended_dst[:-3]}.html"
-            generate_page(extended_src, template_path, extended_dst)
+
+def generate_pages_recursive(
+        src_path: str,
+        template_path: str,
+        dst_path: str,
+        *,
+        manifest: BuildManifest | None = None,
+        jobs: int = 1,
+        profiler: BuildProfiler | None = None,
+        cache: ParseCache | None = None,
+        links: LinkIndex | None = None,
+        search: SearchIndex | None = None,
+        site: SiteModel | None = None,
+        drafts: bool = False,
+        templates: TemplateCache | None = None
+    ):
+    '''
+    Will convert md to html, insert title and content into an html template, and create and write content dir structure to public dir.
+    The pages come from the `site` model of the content dir, scanned here when not given (with the drafts too when `drafts` is set).
+    Every page is rendered with its template from `templates` (see `TemplateCache.select`), all of them `template_path` when not given.
+    When a `manifest` is given, pages whose markdown and template (and navigation, see `page_slots`) are unchanged since the last build are skipped,
+    so a changed template only renders the pages using it again.
+    With `jobs` > 1 the pages are rendered in parallel by a pool of worker processes.
+    When a `profiler` is given, every stage of every page is timed.
+    When a parse `cache` is given, pages and blocks converted before are taken from it.
+    When a `links` index is given, the link and image targets of every page generated are recorded in it.
+    When a `search` index is given, the terms of every page generated are added to it.
+    '''
+    if site is None:
+        site = SiteModel(src_path, dst_path, drafts)
+    # every template is read and compiled once, then shared by its pages
+    if templates is None:
+        templates = TemplateCache(template_path)
+    pages = [
+        (page.src_path, page.dst_path, template, slots, page_key)
+        for page, template, slots, page_key in render_plan(site, templates, manifest)
+        if manifest is None or not manifest.is_current(page.src_path, page.dst_path, page_key, page.stat)
+    ]
+    if not pages:
+        return
+    if jobs > 1 and len(pages) > 1:
+        generate_pages_parallel(pages, jobs, manifest, profiler, cache, links, search)
+        return
+    for extended_src, extended_dst, template, slots, page_key in pages:
+        generate_page(extended_src, template, extended_dst, profiler, cache, links, search, slots)
+        if manifest is not None:
+            manifest.record(extended_src, extended_dst, page_key)
+
+
+def render_plan(
+        site: SiteModel,
+        templates: TemplateCache,
+        manifest: BuildManifest | None = None
+    ) -> list[tuple[SitePage, Template, dict[str, str], str | None]]:
+    '''
+    Returns every page of `site` with its template, the values of its navigation slots and the template key recorded in the `manifest` for it:
+    the hash of its template, combined with the navigation when the template has any,
+    so a page is rendered again when its template or its navigation changes. Without a `manifest` there are no keys.
+    '''
+    page_templates: list[Template] = []
+    # a site has a handful of templates, each is checked against its file once per plan rather than once per page
+    loaded: dict[str, Template] = {}
+    for page in site.pages:
+        try:
+            template_path = templates.select(page.src_path[len(site.content_path) + 1:], page.meta)
+        except ValueError as e:
+            raise ValueError(f"{page.src_path}: {e}")
+        if template_path not in loaded:
+            loaded[template_path] = templates.load(template_path)
+        page_templates.append(loaded[template_path])
+    if any(slot in template.slots for template in set(page_templates) for slot in navigation_slots):
+        site.load_titles(read_title)
+    plan = []
+    for page, template in zip(site.pages, page_templates):
+        slots = page_slots(site, page, template)
+        page_key = manifest.digest(template.path) if manifest is not None else None
+        if page_key is not None and slots:
+            page_key = hashlib.sha256("\0".join([page_key, *slots.values()]).encode()).hexdigest()
+        plan.append((page, template, slots, page_key))
+    return plan
+
+
+def page_slots(site: SiteModel, page: SitePage, template: Template) -> dict[str, str]:
+    'The html of the navigation slots of `template` for a page: "{{ Nav }}" (see `SiteModel.nav_html`) and "{{ Breadcrumbs }}"'
+    slots = {}
+    if "Nav" in template.slots:
+        slots["Nav"] = site.nav_html(page)
+    if "Breadcrumbs" in template.slots:
+        slots["Breadcrumbs"] = site.breadcrumbs_html(page)
+    return slots
+
+
+def generate_pages_parallel(
+        pages: list[tuple[str, str, Template, dict[str, str], str | None]],
+        jobs: int,
+        manifest: BuildManifest | None = None,
+        profiler: BuildProfiler | None = None,
+        cache: ParseCache | None = None,
+        links: LinkIndex | None = None,
+        search: SearchIndex | None = None
+    ):
+    '''
+    Fans `generate_page` out across a process pool, `pages` being (src path, dst path, template, navigation slots, template key) tuples.
+    Log lines are printed in the same order as a serial build, and a failing page doesn't stop the others:
+    every failure is reported with its src path and raised together once all pages are done.
+    Each worker profiles its pages on its own and the results are merged into `profiler`.
+    Each worker also starts its own parse cache from the persisted one, the entries it converts are merged back into `cache`.
+    The link targets and search terms of each page are sent back the same way and recorded in `links` and `search`.
+    '''
+    failures: list[str] = []
+    # hand out pages in chunks so tiny pages don't drown in inter-process overhead
+    chunksize = max(1, len(pages) // (jobs * 4))
+    page_jobs = [
+        (src, template, dst, slots, profiler is not None, links is not None, search is not None)
+        for src, dst, template, slots, _ in pages
+    ]
+    cache_settings = (cache.max_bytes, cache.path) if cache is not None else None
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(inline_markdown.inline_parser, htmlnode.validate_nodes, cache_settings)
+    ) as executor:
+        # results come back in the order of `pages`
+        results = executor.map(_generate_page_job, page_jobs, chunksize=chunksize)
+        for (_, _, _, _, page_key), (src, dst, log, error, profile, cache_changes, page_links, page_terms) in zip(pages, results):
+            print(log, end="")
+            if profiler is not None and profile is not None:
+                profiler.merge(*profile)
+            if cache is not None and cache_changes is not None:
+                cache.merge(*cache_changes)
+            if links is not None and page_links is not None:
+                links.merge(page_links)
+            if search is not None and page_terms is not None:
+                search.merge(page_terms)
+            if error is not None:
+                print(f" ! {src}: {error}")
+                failures.append(f"{src}: {error}")
+            elif manifest is not None:
+                manifest.record(src, dst, page_key)
+    if failures:
+        raise ValueError(f"{len(failures)} page(s) failed to build:\n" + "\n".join(failures))
+
+
+def _init_worker(inline_parser: str, validate_nodes: bool, cache_settings: tuple[int, str | None] | None = None):
+    'Gives a worker process the same parser settings (and parse cache settings) as the parent process, whatever the start method'
+    global _worker_cache
+    inline_markdown.set_inline_parser(inline_parser)
+    htmlnode.set_validation(validate_nodes)
+    if cache_settings is not None:
+        max_bytes, cache_path = cache_settings
+        _worker_cache = ParseCache(max_bytes, cache_path, track_added=True)
+
+
+def _generate_page_job(
+        job: tuple[str, Template, str, dict[str, str], bool, bool, bool]
+    ) -> tuple[str, str, str, str | None, tuple | None, tuple | None, dict | None, list | None]:
+    '''
+    Runs `generate_page` inside a worker process, capturing its log output and any error instead of letting them escape.
+    When profiling, the events and block totals recorded for the page are sent back along with the log,
+    and so are the parse cache entries converted for the page and its hit and miss counts, and the page's link targets and search terms.
+    '''
+    src_path, template, dst_path, slots, profile, collect_links, index = job
+    profiler = BuildProfiler() if profile else None
+    links = LinkIndex() if collect_links else None
+    search = PageTerms() if index else None
+    log = io.StringIO()
+    error = None
+    try:
+        with redirect_stdout(log):
+            generate_page(src_path, template, dst_path, profiler, _worker_cache, links, search, slots)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    profile_data = (profiler.events, profiler.block_totals) if profiler is not None else None
+    cache_changes = _worker_cache.take_changes() if _worker_cache is not None else None
+    page_links = links.pages if links is not None else None
+    page_terms = search.pages if search is not None else None
+    return src_path, dst_path, log.getvalue(), error, profile_data, cache_changes, page_links, page_terms
+
+
+def generate_page(
+        src_path: str,
+        template: Template | str,
+        dst_path: str,
+        profiler: BuildProfiler | None = None,
+        cache: ParseCache | None = None,
+        links: LinkIndex | None = None,
+        search: SearchIndex | PageTerms | None = None,
+        slots: dict[str, str] | None = None
+    ):
+    '''
+    Used by `generate_pages_recursive` in order to convert md to html.
+    `template` is either a compiled `Template` or the path of a template file to load, `slots` fills its other slots (e.g. "{{ Nav }}").
+    With a parse `cache`, the content html is taken from it (see `ParseCache.content_html`) instead of converting every block.
+    With a `links` index, the link and image targets met while converting the page are recorded under `dst_path`.
+    With a `search` index, the terms of the text met while converting the page (or kept by the parse `cache`) are added to it, along with its title.
+    The front matter of the page is never converted, its "title" is used instead of the main h1 when given.
+    '''
+    if isinstance(template, str):
+        template = load_template(template)
+    print(f" * [{template.path}]: {src_path} -> {dst_path}")
+    targets = None
+    terms = Counter()
+    with ExitStack() as collecting:
+        if links is not None:
+            targets = collecting.enter_context(collect_links())
+        if search is not None:
+            collecting.enter_context(collect_text(lambda text: count_terms(terms, text)))
+        title = _generate_page_content(src_path, template, dst_path, profiler, cache, targets, slots or {})
+    # the gzip sibling has the old page, `--compress` writes it again
+    remove_stale(dst_path + gzip_suffix)
+    if links is not None:
+        links.record(dst_path, targets)
+    if search is not None:
+        search.add_page(dst_path, title, terms)
+
+
+def _generate_page_content(
+        src_path: str,
+        template: Template,
+        dst_path: str,
+        profiler: BuildProfiler | None,
+        cache: ParseCache | None,
+        targets: list[str] | None,
+        slots: dict[str, str]
+    ) -> str:
+    '''
+    The conversion and write of `generate_page`, `targets` is the list collecting the link targets of the page, if any.
+    With a `profiler`, the stages of this same path are timed: "read", "markdown_to_html_node" (or the parse `cache`),
+    and "write", which streams the html through the template into the page; a page streamed block by block is one "streamed" stage.
+    Returns the title of the page.
+    '''
+    def stage(name: str):
+        return profiler.stage(name, src_path) if profiler is not None else nullcontext()
+
+    if os.path.getsize(src_path) >= stream_threshold:
+        with stage("streamed"):
+            return _generate_page_streamed(src_path, template, dst_path, slots)
+    with stage("read"):
+        with open(src_path, 'r') as f:
+            md = f.read()
+        meta, md = split_front_matter(md)
+    # convert before touching dst_path, so a markdown error never leaves a half written page behind
+    with stage("markdown_to_html_node"):
+        if cache is not None:
+            content = cache.content_html(md, targets)
+        elif profiler is not None:
+            content = _markdown_to_html_node_profiled(md, profiler)
         else:
-            generate_pages_recursive(extended_src, template_path, extended_dst)
-
-
-def generate_page(src_path: str, template_path: str, dst_path: str):
-    'Used by `generate_pages_recursive` in order to convert md to html'
-    print(f" * [{template_path}]: {src_path} -> {dst_path}")
-    with open(src_path, 'r') as f:
-        md = f.read()
-    with open(template_path, 'r') as f:
-        template = f.read()
-    # template with "{{ Content }}" replaced with src file converted html content
-    template = template.replace("{{ Content }}", markdown_to_html_node(md).to_html())
-    # completed template file with "{{ Title }}"
-    template = template.replace("{{ Title }}", extract_title_markdown(md))
-    # check if directory exists, if not create directory
+            content = markdown_to_html_node(md)
+    with stage("write"):
+        title = meta.get("title") or extract_title_markdown(md)
+        # check if directory exists, if not create directory
+        dst_dir_path = os.path.dirname(dst_path)
+        if dst_dir_path != "":
+            os.makedirs(dst_dir_path, exist_ok=True)
+        # create file at dst_path and stream the template, filling "{{ Content }}" with the converted html and "{{ Title }}" with the main h1
+        with open(dst_path, 'w') as f:
+            template.write(f.write, Content=content, Title=title, **slots)
+    return title
+
+
+def _generate_page_streamed(src_path: str, template: Template, dst_path: str, slots: dict[str, str] | None = None) -> str:
+    '''
+    Same as `generate_page` for a huge markdown file, with memory bounded by its largest block instead of its size.
+    The file is memory mapped: only its front matter is read, the title is found by searching back from its end to the body,
+    then the blocks are decoded, converted and written out one at a time.
+    Files with "\r" line endings (translated by text mode reads) or that can't be mapped are streamed through a text file object instead,
+    with a first pass over the lines for the title.
+    The page goes to a temporary file renamed over `dst_path` once complete, so a markdown error still leaves no half written page behind.
+    '''
+    slots = slots or {}
     dst_dir_path = os.path.dirname(dst_path)
     if dst_dir_path != "":
         os.makedirs(dst_dir_path, exist_ok=True)
-    # create file at dst_path and write template to it
-    with open(dst_path, 'w') as f:
-        f.write(template)
+    try:
+        with open(src_path, 'rb') as src:
+            try:
+                buffer = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # empty files can't be mapped
+                buffer = None
+            if buffer is not None and not buffer_has_carriage_returns(buffer):
+                with buffer, open(f"{dst_path}.tmp", 'w') as dst:
+                    # the mapping doesn't move the file position, the body starts where the front matter reader stopped
+                    meta = read_front_matter(src)
+                    body_start = src.tell()
+                    title = meta.get("title") or extract_title_buffer(buffer, body_start=body_start)
+                    template.write(dst.write, Content=markdown_buffer_to_html_node(buffer, body_start), Title=title, **slots)
+            else:
+                if buffer is not None:
+                    buffer.close()
+                with open(src_path, 'r') as f:
+                    meta = read_front_matter(f)
+                    title = meta.get("title") or extract_title_lines(f)
+                with open(src_path, 'r') as text, open(f"{dst_path}.tmp", 'w') as dst:
+                    read_front_matter(text)
+                    template.write(dst.write, Content=markdown_stream_to_html_node(text), Title=title, **slots)
+    except Exception:
+        if os.path.exists(f"{dst_path}.tmp"):
+            os.remove(f"{dst_path}.tmp")
+        raise
+    os.replace(f"{dst_path}.tmp", dst_path)
+    return title
+
+
+def _markdown_to_html_node_profiled(markdown: str, profiler: BuildProfiler) -> ParentNode:
+    'Same as `markdown_to_html_node`, adding the conversion time of every block to the totals of its block type'
+    children = []
+    for block in markdown_to_blocks(markdown):
+        start = time.perf_counter()
+        children.append(block_to_html_node(block))
+        profiler.add_block(block_to_block_type(block), time.perf_counter() - start)
+    return ParentNode("div", children=children)
 
 
 def extract_title_markdown(markdown: str) -> str:
-    'Used by generate page in order to extract the main h1 of the md'
-    lines = markdown.split("\n")
+    '''
+    Used by generate page in order to extract the main h1 of the md: the last line starting with "# ".
+    Searches back from the end of the md for it, instead of splitting the whole md into lines.
+    '''
+    start = markdown.rfind("\n# ") + 1
+    if start == 0 and not markdown.startswith("# "):
+        return ""
+    end = markdown.find("\n", start)
+    return markdown[start + 2:end] if end != -1 else markdown[start + 2:]
+
+
+def extract_title_buffer(buffer: bytes | mmap.mmap, window: int = release_interval, body_start: int = 0) -> str:
+    '''
+    Same as `extract_title_markdown` over the utf-8 bytes of the md, e.g. a read only `mmap` of the file, only the title itself is decoded.
+    The search goes back from the end `window` bytes at a time, releasing the pages of an mmap behind it,
+    and stops at `body_start` so a "# comment" of the front matter is never taken for the title.
+    '''
+    start = -1
+    window_end = len(buffer)
+    while window_end > body_start and start == -1:
+        window_start = max(body_start, window_end - window)
+        # the windows overlap by the length of the pattern, so a match across two of them is found,
+        # and by the "\n" ending the front matter, so is a title on the first line of the body
+        start = buffer.rfind(b"\n# ", max(0, window_start - 1), window_end + 2)
+        release_pages(buffer, window_end, window_start)
+        window_end = window_start
+    start += 1
+    if start == 0 and buffer[:2] != b"# ":
+        return ""
+    end = buffer.find(b"\n", start)
+    return buffer[start + 2:end if end != -1 else len(buffer)].decode("utf-8")
+
+
+def read_title(src_path: str, body_start: int = 0) -> str:
+    '''
+    The title of a markdown file (see `extract_title_markdown`), only reading the file from its end back to the title,
+    or back to `body_start`, the end of its front matter.
+    '''
+    with open(src_path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files can't be mapped
+            return ""
+        with buffer:
+            # text mode reads drop the "\r" of "\r\n" line endings
+            return extract_title_buffer(buffer, body_start=body_start).rstrip("\r")
+
+
+def extract_title_lines(lines: Iterable[str]) -> str:
+    'Same as `extract_title_markdown` over the lines of the md, with or without their line endings (e.g. a file object)'
     title = ""
     for line in lines:
         if line.startswith("# "):
-            title = line[2:]
+            title = line[2:-1] if line.endswith("\n") else line[2:]
     return title
@@ -1,20 +1,44 @@
+import os
+from sys import intern
+from typing import Callable
+
+# Runtime type checks on node arguments cost four `isinstance` calls per node, so they are off in the hot path.
+# Debug mode turns them back on: set SSG_DEBUG=1 in the environment or call `set_validation(True)`.
+validate_nodes = os.environ.get("SSG_DEBUG", "") not in ("", "0")
+
+
+def set_validation(enabled: bool):
+    'Turns runtime type validation of HTMLNode and TextNode arguments on (debug mode) or off'
+    global validate_nodes
+    validate_nodes = enabled
+
+
+def validate_node_args(tag, value, children, props):
+    'The runtime type checks run on every node argument in debug mode'
+    if not isinstance(tag, str) and tag is not None:
+        raise TypeError("Tag must be a string")
+    if not isinstance(value, str) and value is not None:
+        raise TypeError("Value must be a string")
+    if not isinstance(children, list) and children is not None:
+        raise TypeError("Children must be a list")
+    if not isinstance(props, dict) and props is not None:
+        raise TypeError("Props must be a dictionary")
+
+
 class HTMLNode:
+    # no per-instance __dict__, pages create hundreds of thousands of short-lived nodes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
             self, tag: str | None = None,
             value: str | None = None,
             children: list['ParentNode'] | list['LeafNode'] | None = None,
             props: dict[str, str | None] | None = None
         ):
-        if not isinstance(tag, str) and tag is not None:
-            raise TypeError("Tag must be a string")
-        if not isinstance(value, str) and value is not None:
-            raise TypeError("Value must be a string")
-        if not isinstance(children, list) and children is not None:
-            raise TypeError("Children must be a list")
-        if not isinstance(props, dict) and props is not None:
-            raise TypeError("Props must be a dictionary")
-        # A string representing the HTML tag name (e.g. "p", "a", "h1", etc.)
-        self.tag = tag
+        if validate_nodes:
+            validate_node_args(tag, value, children, props)
+        # A string representing the HTML tag name (e.g. "p", "a", "h1", etc.), interned so every node shares one copy of each name
+        self.tag = intern(tag) if tag is not None else None
         # A string representing the value of the HTML tag (e.g. the text inside a paragraph)
         self.value = value
         # A list of HTMLNode objects representing the children of this node
@@ -23,8 +47,17 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
-        'To be overwritten by a childclass'
-        raise NotImplementedError("to_html method not implemented")
+        'Renders the node as an HTML string by collecting the chunks emitted by `write_html`'
+        chunks: list[str] = []
+        self.write_html(chunks.append)
+        return "".join(chunks)
+
+    def write_html(self, write: Callable[[str], object]):
+        '''
+        To be overwritten by a childclass.
+        Streams the node's HTML as string chunks into `write`, e.g. `list.append`, `io.StringIO.write` or a file's `write`
+        '''
+        raise NotImplementedError("write_html method not implemented")
 
     def props_to_html(self):
         'Returns a stringified version of the props argument dictionary'
@@ -43,13 +76,21 @@ class HTMLNode:
 
 # It's a "leaf" in the tree of HTML nodes. It's a node with no children.
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self,
             tag: str | None,
             value: str | None,
             props: dict[str, str | None] | None = None
         ):
-        super().__init__(tag, value, props=props)
+        # sets the slots directly instead of going through `HTMLNode.__init__`, this is the hottest constructor of a build
+        if validate_nodes:
+            validate_node_args(tag, value, None, props)
+        self.tag = intern(tag) if tag is not None else None
+        self.value = value
+        self.children = None
+        self.props = props
 
     def to_html(self):
         'Will render a leaf node as an HTML string'
@@ -59,6 +100,10 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def write_html(self, write: Callable[[str], object]):
+        'A leaf node is small enough to be emitted as a single chunk'
+        write(self.to_html())
+
     def __repr__(self):
         # give myself a way to print out an LeafNode object and see its arguments
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
@@ -67,6 +112,8 @@ class LeafNode(HTMLNode):
 
 # We need to be able to recurse through nested HTML nodes
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self,
             tag: str | None,
@@ -75,18 +122,21 @@ class ParentNode(HTMLNode):
         ):
         super().__init__(tag, children=children, props=props)
 
-    def to_html(self):
-        'Will recurse through nested parent nodes and pass on leaf nodes to be rendered into html'
+    def write_html(self, write: Callable[[str], object]):
+        '''
+        Will recurse through nested parent nodes and pass on leaf nodes to be rendered into html.
+        Every node emits its own tags straight into `write`, so no level ever copies the html of its subtree.
+        '''
         if self.tag is None:
             raise ValueError("Invalid HTML: no tag")
         if self.children is None:
             raise ValueError("Invalid HTML: no children")
-        branch_results = ""
+        write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
             # when child is of a ParentNode object it will recurse until it reaches a LeafNode object
-            # the act of running the `.to_html` method on a LeafNode object is essentially the base case for the recursion
-            branch_results += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{branch_results}</{self.tag}>"
+            # the act of running the `.write_html` method on a LeafNode object is essentially the base case for the recursion
+            child.write_html(write)
+        write(f"</{self.tag}>")
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
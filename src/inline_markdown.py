@@ -9,9 +9,37 @@ from textnode import (
     text_type_link,
 )
 
+# precompiled patterns shared by the extractors and the scanner
+image_pattern = re.compile(r"!\[(.*?)\]\((.*?)\)")
+link_pattern = re.compile(r"\[(.*?)\]\((.*?)\)")
+
+
+# names of the two interchangeable inline parsers, selectable with `set_inline_parser()`
+inline_parser_scan = "scan"
+inline_parser_split = "split"
+inline_parser = inline_parser_scan
+
+
+def set_inline_parser(name: str):
+    'Selects which parser `text_to_textnodes` uses, so the output of both can be compared on the same content'
+    global inline_parser
+    if name == inline_parser_scan:
+        inline_parser = inline_parser_scan
+    elif name == inline_parser_split:
+        inline_parser = inline_parser_split
+    else:
+        raise ValueError(f"Invalid inline parser: {name}")
+
 
-# sequencially parse through the md text line
 def text_to_textnodes(text: str) -> list[TextNode]:
+    'Parse the md text line applying inline md syntax where needed and splitting md into TextNodes, using the selected inline parser'
+    if inline_parser is inline_parser_split:
+        return split_text_to_textnodes(text)
+    return scan_text_to_textnodes(text)
+
+
+# sequencially parse through the md text line
+def split_text_to_textnodes(text: str) -> list[TextNode]:
     'Sequencially parse though the md text line applying inline md syntax where needed and splitting md into TextNodes'
     nodes = [TextNode(text, text_type_text)]
     # we want this order specifically based on precedence in markdown syntax
@@ -23,6 +51,77 @@ def text_to_textnodes(text: str) -> list[TextNode]:
     return nodes
 
 
+# single walk over the md text line
+def scan_text_to_textnodes(text: str) -> list[TextNode]:
+    '''
+    Produces the same TextNodes as `split_text_to_textnodes()`, but in one left to right walk over the string instead of five passes over lists of nodes.
+    Each layer only hands the plain spans between its own matches to the next one (code => image => link => bold => italic),
+    so code spans suppress every other markup natively and no intermediate TextNode lists are built.
+    '''
+    nodes: list[TextNode] = []
+    _scan_delimited(text, 0, len(text), "`", text_type_code, nodes, _scan_images)
+    return nodes
+
+
+def _scan_delimited(text: str, start: int, end: int, delimiter: str, text_type: str, nodes: list[TextNode], scan_plain):
+    '''
+    Scans `text[start:end]` for spans wrapped in `delimiter`, mirroring `split_nodes_delimiter()`:
+    spans alternate between plain and delimited, and a lone delimiter is an error.
+    Plain spans are handed to `scan_plain`, the next layer of the scanner.
+    '''
+    first = text.find(delimiter, start, end)
+    if first == -1:
+        scan_plain(text, start, end, nodes)
+        return
+    if text.find(delimiter, first + len(delimiter), end) == -1:
+        raise ValueError("Markdown Error: unclosed delimiter")
+    pos = start
+    delimited = False
+    while True:
+        found = text.find(delimiter, pos, end)
+        stop = end if found == -1 else found
+        if not delimited:
+            scan_plain(text, pos, stop, nodes)
+        # remove spans with empty text (if there is a delimiter at the begining/end, this will happen)
+        elif stop > pos:
+            nodes.append(TextNode(text[pos:stop], text_type))
+        if found == -1:
+            return
+        pos = found + len(delimiter)
+        delimited = not delimited
+
+
+def _scan_images(text: str, start: int, end: int, nodes: list[TextNode]):
+    'Scans `text[start:end]` for images, handing the spans between them to `_scan_links()`'
+    pos = start
+    for match in image_pattern.finditer(text, start, end):
+        _scan_links(text, pos, match.start(), nodes)
+        nodes.append(TextNode(match.group(1), text_type_image, match.group(2)))
+        pos = match.end()
+    _scan_links(text, pos, end, nodes)
+
+
+def _scan_links(text: str, start: int, end: int, nodes: list[TextNode]):
+    'Scans `text[start:end]` for links, handing the spans between them to the bold layer'
+    pos = start
+    for match in link_pattern.finditer(text, start, end):
+        _scan_delimited(text, pos, match.start(), "**", text_type_bold, nodes, _scan_italic)
+        nodes.append(TextNode(match.group(1), text_type_link, match.group(2)))
+        pos = match.end()
+    _scan_delimited(text, pos, end, "**", text_type_bold, nodes, _scan_italic)
+
+
+def _scan_italic(text: str, start: int, end: int, nodes: list[TextNode]):
+    'Scans `text[start:end]` for italic spans, the last layer of the scanner'
+    _scan_delimited(text, start, end, "*", text_type_italic, nodes, _scan_text)
+
+
+def _scan_text(text: str, start: int, end: int, nodes: list[TextNode]):
+    'Appends `text[start:end]` as plain text, skipping empty spans'
+    if end > start:
+        nodes.append(TextNode(text[start:end], text_type_text))
+
+
 
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_types: str) -> list[TextNode]:
     'Will split up text nodes based on `text_types` and return a list of new text nodes'
@@ -56,33 +155,7 @@ def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_types:
 
 def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
     'Similar to `split_nodes_delimiter()`, but will split out image details and return a list of text and image TextNode objects'
-    new_nodes: list[TextNode] = []
-    for on in old_nodes:
-        # load in list of tuples with image details
-        image_tup = extract_markdown_images(on.text)
-        # if image details are present in any of the old_nodes
-        # doubles as the base case for the recursive call
-        if image_tup:
-            # we will only split once per recursion in order to properly sequence nodes
-            split_text = on.text.split(f"![{image_tup[0][0]}]({image_tup[0][1]})", 1)
-            # the image details will always be at the second index of the split_text list
-            processed_text = [ TextNode(split_text[0], text_type_text) , TextNode(image_tup[0][0], text_type_image, image_tup[0][1]) ]
-            # if the image details are at the start of the node, then the split will create a blank list item before the image details
-            if processed_text[0].text == "":
-                new_nodes.append(processed_text[1])
-            else:
-                # we want to `extend` both items onto the new_nodes list, not append a list into the new_nodes list
-                new_nodes.extend(processed_text)
-            # RECURSION: extend each recursion layer's `new_nodes` where the second half of split_text (unprocessed half) is the argument
-            new_nodes.extend(split_nodes_image([TextNode(split_text[1], text_type_text)]))
-        else:
-            # deepest layer of recursion, if TextNode().text is empty, then return empty string instead of TextNode object with empty string
-            if on.text == "":
-                return []
-            # append TextNode object to new_nodes list without processing if there are no images present in the object
-            else:
-                new_nodes.append(on)
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, image_pattern, text_type_image)
 
 
 def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
@@ -90,36 +163,35 @@ def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
     # TODO: feat: image links
     # Allow for image links (image nested in a link)
     # see unittest (NOTE) for details
+    return _split_nodes_pattern(old_nodes, link_pattern, text_type_link)
+
+
+def _split_nodes_pattern(old_nodes: list[TextNode], pattern: re.Pattern, text_types: str) -> list[TextNode]:
+    '''
+    Splits every "text" type node around the matches of an image or link `pattern` in a single `finditer` pass,
+    turning each match into a node of `text_types` with the url as its second group.
+    '''
     new_nodes: list[TextNode] = []
     for on in old_nodes:
         # for instances when our old_node is not a text_type "text"
         if on.text_type != text_type_text:
             new_nodes.append(on)
             continue
-        # load in list of tuples with link details
-        link_tup = extract_markdown_links(on.text)
-        # if link details are present in any of the old_nodes
-        # doubles as the base case for the recursive call
-        if link_tup:
-            # we will only split once per recursion in order to properly sequence nodes
-            split_text = on.text.split(f"[{link_tup[0][0]}]({link_tup[0][1]})", 1)
-            # the link details will always be at the second index of the split_text list
-            processed_text = [ TextNode(split_text[0], text_type_text) , TextNode(link_tup[0][0], text_type_link, link_tup[0][1]) ]
-            # if the link details are at the start of the node, then the split will create a blank list item before the link details
-            if processed_text[0].text == "":
-                new_nodes.append(processed_text[1])
-            else:
-                # we want to `extend` both items onto the new_nodes list, not append a list into the new_nodes list
-                new_nodes.extend(processed_text)
-            # RECURSION: extend each recursion layer's `new_nodes` where the second half of split_text (unprocessed half) is the argument
-            new_nodes.extend(split_nodes_link([TextNode(split_text[1], text_type_text)]))
-        else:
-            # deepest layer of recursion, if TextNode().text is empty, then return empty list instead of TextNode object with empty string
-            if on.text == "":
-                return []
-            # append TextNode object to new_nodes list without processing if there are no links present in the object
-            else:
+        text = on.text
+        # end of the previous match, everything before it has already been split out
+        pos = 0
+        for match in pattern.finditer(text):
+            # if the match is at the start of the node (or right after the previous one), there is no text to keep before it
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos:match.start()], text_type_text))
+            new_nodes.append(TextNode(match.group(1), text_types, match.group(2)))
+            pos = match.end()
+        # append the node without processing if there are no matches, otherwise append whatever text is left after the last match
+        if pos == 0:
+            if text != "":
                 new_nodes.append(on)
+        elif pos < len(text):
+            new_nodes.append(TextNode(text[pos:], text_type_text))
     return new_nodes
 
 
@@ -133,7 +205,7 @@ def extract_markdown_images(text: str) -> list[tuple[str, str]]:
     `extract_markdown_links(text)`
     `[ ("image", url), ("another", url2) ]``
     '''
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    return image_pattern.findall(text)
 
 
 # this will extract a list of tuples of anchor text and urls
@@ -143,4 +215,4 @@ def extract_markdown_links(text: str) -> list[tuple[str, str]]:
 
     *See `extract_markdown_images()` for info on behavior*
     '''
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    return link_pattern.findall(text)
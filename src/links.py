@@ -0,0 +1,89 @@
+import os
+import json
+import posixpath
+
+# targets with one of these prefixes leave the site and are never checked
+external_prefixes = ("http://", "https://", "//", "mailto:", "tel:", "data:", "javascript:", "ftp://")
+
+
+class LinkIndex:
+    '''
+    Index of the link and image targets of every page, keyed by the page's output path, filled while the pages are converted.
+    Internal targets are resolved against the outputs of the build to report broken links and orphan pages (pages no other page links to).
+    With a `path`, the index is persisted between builds so an incremental build still knows the links of the pages it skipped.
+    '''
+    def __init__(self, path: str | None = None):
+        self.path = path
+        # output path => link and image targets, in page order
+        self.pages: dict[str, list[str]] = {}
+        if path is not None and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.pages = json.load(f)
+
+    def record(self, dst_path: str, targets: list[str]):
+        self.pages[dst_path] = targets
+
+    def forget(self, dst_path: str):
+        self.pages.pop(dst_path, None)
+
+    def merge(self, pages: dict[str, list[str]]):
+        'Merges the pages recorded by another index, e.g. in a worker process'
+        self.pages.update(pages)
+
+    def save(self):
+        if self.path is None:
+            return
+        with open(self.path, 'w') as f:
+            json.dump(self.pages, f)
+
+    def check(self, public_path: str, outputs: set[str]) -> tuple[list[tuple[str, str]], list[str]]:
+        '''
+        Resolves every internal target against `outputs` (the paths of every page and static file of the build) in one pass.
+        Pages that are no longer among the outputs are dropped from the index first.
+        Returns the broken (page, target) pairs and the orphan pages, the root index page is never an orphan.
+        '''
+        for dst_path in [dst for dst in self.pages if dst not in outputs]:
+            del self.pages[dst_path]
+        # normalized path => output path, "./public/a/../b.html" and "public/b.html" are the same output
+        known = {posixpath.normpath(output): output for output in outputs}
+        broken: list[tuple[str, str]] = []
+        linked: set[str] = set()
+        for dst_path, targets in self.pages.items():
+            for target in targets:
+                resolved = resolve_target(public_path, dst_path, target, known)
+                if resolved is None:
+                    broken.append((dst_path, target))
+                elif resolved != dst_path:
+                    linked.add(resolved)
+        root_page = f"{public_path}/index.html"
+        orphans = [dst for dst in self.pages if dst not in linked and dst != root_page]
+        return broken, orphans
+
+    def report(self, public_path: str, outputs: set[str]) -> str:
+        'The result of `check` as printable lines, ending with a one line summary'
+        broken, orphans = self.check(public_path, outputs)
+        lines = [f" ! broken link in {dst_path}: {target}" for dst_path, target in broken]
+        lines.extend(f" ? orphan page {dst_path}" for dst_path in orphans)
+        targets = sum(len(targets) for targets in self.pages.values())
+        lines.append(f"Links: {targets} targets in {len(self.pages)} pages, {len(broken)} broken, {len(orphans)} orphan pages")
+        return "\n".join(lines)
+
+
+def resolve_target(public_path: str, dst_path: str, target: str, known: dict[str, str]) -> str | None:
+    '''
+    Returns the output a link or image target of the page at `dst_path` points at, or None when no such output exists.
+    `known` maps the normalized path of every output to the output path.
+    Absolute targets start at `public_path`, relative ones at the page's directory, and a directory target means its index.html
+    (as served by `server.py`). External targets and pure fragments resolve to the page itself.
+    '''
+    if target.startswith(external_prefixes) or target.startswith("#"):
+        return dst_path
+    # the fragment and query don't change which file is served
+    path = target.split("#", 1)[0].split("?", 1)[0]
+    if path.startswith("/"):
+        path = posixpath.normpath(f"{public_path}{path}")
+    else:
+        path = posixpath.normpath(f"{posixpath.dirname(dst_path)}/{path}")
+    if path in known:
+        return known[path]
+    return known.get(f"{path}/index.html")
@@ -0,0 +1,29 @@
+import os
+import json
+import time
+
+# Written into the public dir after every rebuild in watch mode, and after a build run with --announce.
+# Production builds don't write it, so it never ships with the deployed site.
+# `server.py` polls it: it drops the changed urls from its file cache and, with --livereload,
+# pushes them to the connected browsers, which reload if their page is one of them.
+build_changes_file = ".build-changes.json"
+
+
+def notify_build(public_path: str, outputs: list[str], full: bool = False):
+    '''
+    Tells a running `server.py` which outputs were written or removed by the last rebuild.
+    `full` announces a build that may have rewritten anything in the public dir.
+    '''
+    urls = ["/" + os.path.relpath(path, public_path).replace(os.sep, "/") for path in outputs]
+    changes_path = os.path.join(public_path, build_changes_file)
+    # write then rename, so the server never reads a half written file
+    with open(f"{changes_path}.tmp", 'w') as f:
+        json.dump({"build": time.time_ns(), "changed": urls, "full": full}, f)
+    os.replace(f"{changes_path}.tmp", changes_path)
+
+
+def clear_build_changes(public_path: str):
+    'Removes the announcement left in the public dir by an earlier build, so an unannounced build does not ship it'
+    changes_path = os.path.join(public_path, build_changes_file)
+    if os.path.exists(changes_path):
+        os.remove(changes_path)
@@ -1,15 +1,192 @@
 import os
+import time
 import shutil
-from copystatic import copy_files_recursively
+import cProfile
+import argparse
+from contextlib import nullcontext
+from copystatic import copy_files_recursively, copy_strategies, copy_strategy_copy
 from gencontent import generate_pages_recursive
+from inline_markdown import set_inline_parser, inline_parser_scan, inline_parser_split
+from manifest import BuildManifest
+from htmlnode import set_validation
+from profiling import BuildProfiler
+from watch import TreeWatcher, rebuild_changes
+from livereload import notify_build, clear_build_changes
+from compress import compress_tree, compress_outputs
+from parsecache import ParseCache
+from links import LinkIndex
+from search import SearchIndex
+from sitemodel import SiteModel
+from template import TemplateCache
+
+static_content_path = "./static"
+content_path = "./content"
+template_path = "./template.html"
+templates_path = "./templates"
+public_content_path = "./public"
+manifest_path = "./.build-manifest.json"
+link_index_path = "./.link-index.json"
+search_state_path = "./.search-index.json"
 
 def main():
-    static_content_path = "./static"
-    content_path = "./content"
-    template_path = "./template.html"
-    public_content_path = "./public"
+    parser = argparse.ArgumentParser(description="Static Site Generator")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Keep the public dir and only rebuild pages and static files that changed since the last build"
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1,
+        help="Number of worker processes used to render pages (0 uses every CPU)"
+    )
+    parser.add_argument(
+        "--inline-parser", choices=[inline_parser_scan, inline_parser_split], default=inline_parser_scan,
+        help="Inline markdown parser: the single pass scanner or the original chain of split passes"
+    )
+    parser.add_argument(
+        "--debug", action="store_true",
+        help="Validate the arguments of every node at runtime (same as SSG_DEBUG=1)"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Time every build stage and print a summary with the slowest pages and per block type totals"
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=10,
+        help="Number of slowest pages listed in the profile summary"
+    )
+    parser.add_argument(
+        "--profile-out", type=str, default=None,
+        help="Run the build under cProfile and dump the pstats to this path (only the main process is profiled)"
+    )
+    parser.add_argument(
+        "--trace", type=str, default=None,
+        help="Write every timed stage as a Chrome trace JSON file to this path (implies --profile)"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="After building, keep polling content, static and the templates and rebuild only what changed"
+    )
+    parser.add_argument(
+        "--announce", action="store_true",
+        help="Tell a running `server.py` about the build through public/.build-changes.json (implied by --watch)"
+    )
+    parser.add_argument(
+        "--copy-strategy", choices=copy_strategies, default=copy_strategy_copy,
+        help="How static files get into the public dir: copy, hardlink, reflink (copy_file_range) or copy only the changed ones"
+    )
+    parser.add_argument(
+        "--parse-cache", action="store_true",
+        help="Reuse the html of pages and blocks whose markdown was already converted, keyed by content hash"
+    )
+    parser.add_argument(
+        "--parse-cache-size", type=int, default=64,
+        help="MiB of html kept by the parse cache, least recently used entries are evicted first"
+    )
+    parser.add_argument(
+        "--parse-cache-file", type=str, default=None,
+        help="Keep the parse cache in this file between builds (implies --parse-cache)"
+    )
+    parser.add_argument(
+        "--compress", action="store_true",
+        help="Write a gzip compressed .gz sibling next to every output that shrinks, for `server.py` to serve"
+    )
+    parser.add_argument(
+        "--check-links", action="store_true",
+        help="Index the links and images of every page while converting it and report broken internal links and orphan pages "
+        "(an incremental build only knows the links of the pages it skips if the previous build checked links too)"
+    )
+    parser.add_argument(
+        "--search", action="store_true",
+        help="Write a sharded full text search index of the pages to public/search, built from the text of every page as it is converted "
+        "(incremental builds and watch mode only rewrite the shards of the pages they regenerate)"
+    )
+    parser.add_argument(
+        "--sitemap", type=str, default=None, metavar="BASE_URL",
+        help="Write public/sitemap.xml listing every page under BASE_URL (e.g. https://example.com)"
+    )
+    parser.add_argument(
+        "--drafts", action="store_true",
+        help="Also build the pages marked \"draft: true\" in their front matter, which are skipped otherwise"
+    )
+    args = parser.parse_args()
+    set_inline_parser(args.inline_parser)
+    if args.debug:
+        set_validation(True)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    profiler = BuildProfiler() if args.profile or args.trace else None
+    cache = None
+    if args.parse_cache or args.parse_cache_file is not None:
+        cache = ParseCache(args.parse_cache_size * 1024 * 1024, args.parse_cache_file)
+    links = None
+    if args.check_links:
+        # a full build starts from an empty index, like the manifest
+        if not args.incremental and os.path.exists(link_index_path):
+            os.remove(link_index_path)
+        links = LinkIndex(link_index_path)
+    search = None
+    if args.search:
+        if not args.incremental and os.path.exists(search_state_path):
+            os.remove(search_state_path)
+        search = SearchIndex(public_content_path, search_state_path)
+
+    if args.profile_out is not None:
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+        try:
+            build(
+                args.incremental, jobs=jobs, profiler=profiler, compress=args.compress, copy_strategy=args.copy_strategy, cache=cache,
+                links=links, search=search, sitemap_url=args.sitemap, drafts=args.drafts, announce=args.announce or args.watch
+            )
+        finally:
+            cprofiler.disable()
+            cprofiler.dump_stats(args.profile_out)
+            print(f"cProfile stats written to {args.profile_out} (python -m pstats {args.profile_out})")
+    else:
+        build(
+            args.incremental, jobs=jobs, profiler=profiler, compress=args.compress, copy_strategy=args.copy_strategy, cache=cache,
+            links=links, search=search, sitemap_url=args.sitemap, drafts=args.drafts, announce=args.announce or args.watch
+        )
+
+    if profiler is not None:
+        print(profiler.summary(args.profile_top))
+        if args.trace is not None:
+            profiler.write_chrome_trace(args.trace)
+            print(f"Chrome trace written to {args.trace}")
+
+    if args.watch:
+        watch(
+            jobs=jobs, compress=args.compress, copy_strategy=args.copy_strategy, cache=cache, links=links, search=search,
+            sitemap_url=args.sitemap, drafts=args.drafts
+        )
+
+
+def build(
+        incremental: bool,
+        *,
+        jobs: int = 1,
+        profiler: BuildProfiler | None = None,
+        compress: bool = False,
+        copy_strategy: str = copy_strategy_copy,
+        cache: ParseCache | None = None,
+        links: LinkIndex | None = None,
+        search: SearchIndex | None = None,
+        sitemap_url: str | None = None,
+        drafts: bool = False,
+        announce: bool = False
+    ):
+    '''
+    Runs one build of the site, from the static and content dirs into the public dir,
+    checking its links with a `links` index, indexing its pages with a `search` index and writing a sitemap under `sitemap_url`.
+    The content dir is scanned once, the same site model gives the pages to render and the sitemap.
+    Pages are rendered with `template.html` or the template selected for them under `/templates`.
+    Draft pages are left out, and their outputs from a previous build removed, unless `drafts` is set.
+    With `announce`, a running `server.py` is told about the build.
+    '''
     # idempotent public dir
-    if os.path.exists(public_content_path):
+    if incremental and os.path.exists(public_content_path):
+        print("Reusing public directory (incremental build)...")
+        print()
+    elif os.path.exists(public_content_path):
         print("Deleting public directory...")
         shutil.rmtree(public_content_path)
         print("Creating public directory...")
@@ -19,14 +196,124 @@ def main():
         print("Creating public directory...")
         os.mkdir(public_content_path)
         print()
+    # a full build starts from an empty manifest so that every source gets rebuilt and recorded
+    if not incremental and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    # nothing is compared during a full build, sources are recorded by size and mtime and only hashed once they change
+    manifest = BuildManifest(manifest_path, hash_content=incremental)
     # copy over static files to public dir
     print("Copying Static files to public dir...")
-    copy_files_recursively(static_content_path, public_content_path)
+    with profiler.stage("static_copy") if profiler is not None else nullcontext():
+        report = copy_files_recursively(static_content_path, public_content_path, manifest, copy_strategy, jobs)
+    print(f"Static files: {report.summary()}")
     print()
     # convert md into html, insert in html template, and create file structure in public dir
     print("Generating HTML Files in public dir...")
-    generate_pages_recursive(content_path, template_path, public_content_path)
+    site = SiteModel(content_path, public_content_path, drafts)
+    templates = TemplateCache(template_path, templates_path)
+    try:
+        generate_pages_recursive(
+            content_path, template_path, public_content_path, manifest=manifest, jobs=jobs, profiler=profiler, cache=cache, links=links,
+            search=search, site=site, drafts=drafts, templates=templates
+        )
+    except BaseException:
+        # keep the pages that did build, even if another page failed
+        manifest.save()
+        raise
+    finally:
+        if cache is not None:
+            cache.save()
+        # the next incremental build skips the pages built here, so their links and terms must be kept too
+        if links is not None:
+            links.save()
+        if search is not None:
+            shards = search.save()
+    if cache is not None:
+        print(f"Parse cache: {cache.summary()}")
+    if site.drafts:
+        print(f"Drafts: {len(site.drafts)} skipped (build them with --drafts)")
     print()
+    # remove outputs whose sources no longer exist
+    for removed_path in manifest.prune(public_content_path):
+        print(f" * removed {removed_path}")
+    manifest.save()
+    if sitemap_url is not None:
+        site.write_sitemap(sitemap_url)
+        print(f"Sitemap: {len(site.pages)} pages written to {public_content_path}/sitemap.xml")
+        print()
+    if links is not None:
+        print("Checking links...")
+        print(links.report(public_content_path, manifest.outputs()))
+        links.save()
+        print()
+    if search is not None:
+        print("Writing search index...")
+        # pages whose sources were removed leave the index too
+        search.retain(manifest.outputs())
+        shards += search.save()
+        print(f"Search index: {len(search.pages)} pages, {shards} shards rewritten")
+        print()
+    if compress:
+        # only outputs changed since their .gz was written get compressed again
+        print("Compressing public dir...")
+        with profiler.stage("compress") if profiler is not None else nullcontext():
+            compress_tree(public_content_path, jobs)
+        print()
+    if announce:
+        # a running `server.py` drops its whole file cache and reloads every browser
+        notify_build(public_content_path, [], full=True)
+    else:
+        clear_build_changes(public_content_path)
+
+
+def watch(
+        *,
+        jobs: int = 1,
+        compress: bool = False,
+        copy_strategy: str = copy_strategy_copy,
+        cache: ParseCache | None = None,
+        links: LinkIndex | None = None,
+        search: SearchIndex | None = None,
+        sitemap_url: str | None = None,
+        drafts: bool = False
+    ):
+    '''
+    Polls content, static and the templates forever, regenerating (and compressing) only the pages and static files affected by each change.
+    The templates stay compiled between rebuilds, only a changed template is compiled again and only its pages regenerated.
+    With a `links` index, the links are checked again after every rebuild, a `search` index is updated with the regenerated pages,
+    and with a `sitemap_url` the sitemap is written again. Drafts are only built with `drafts` set.
+    '''
+    manifest = BuildManifest(manifest_path)
+    templates = TemplateCache(template_path, templates_path)
+    watcher = TreeWatcher([content_path, static_content_path, template_path, templates_path])
+    print("Watching for changes (Ctrl+C to stop)...")
+    try:
+        while True:
+            changed, removed = watcher.wait_for_changes()
+            start = time.perf_counter()
+            outputs = rebuild_changes(
+                changed, removed, content_path, static_content_path, template_path, public_content_path, manifest,
+                copy_strategy=copy_strategy, cache=cache, links=links, search=search, drafts=drafts, templates=templates
+            )
+            if links is not None:
+                print(links.report(public_content_path, manifest.outputs()))
+            if search is not None:
+                search.save()
+            if sitemap_url is not None:
+                SiteModel(content_path, public_content_path, drafts).write_sitemap(sitemap_url)
+            if compress:
+                compress_outputs(outputs, jobs)
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1e3:.0f} ms")
+            # let `server.py --livereload` reload the browsers showing these outputs
+            if outputs:
+                notify_build(public_content_path, outputs)
+            # the state of the next build, written once the browsers already reload the new pages
+            manifest.save()
+            if links is not None:
+                links.save()
+    except KeyboardInterrupt:
+        print()
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+from compress import gzip_suffix, remove_stale
+
+
+class BuildManifest:
+    '''
+    Persistent record of what the previous build produced.
+    Every entry maps a source path to the hash of its content, the hash of the template it was rendered with and its output path,
+    so an incremental build can skip any source whose output is still up to date.
+    With `hash_content` off (a full build, which checks nothing) sources are recorded by size and mtime only, without a hash:
+    the next build finds them current while both are unchanged, and hashes them once either changes.
+    '''
+    def __init__(self, path: str, hash_content: bool = True):
+        self.path = path
+        self.hash_content = hash_content
+        # src path => {"output", "hash", "template", "size", "mtime_ns"}
+        self.entries: dict[str, dict] = {}
+        # src paths touched (rendered, copied or confirmed current) during this build
+        self.seen: set[str] = set()
+        # digests already computed during this build, keyed by path
+        self._digests: dict[str, str] = {}
+        # set when an entry is added, updated or removed, `save` has nothing to write otherwise
+        self.changed = False
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                try:
+                    self.entries = json.load(f)
+                except ValueError:
+                    # unreadable, every source is rebuilt and recorded again
+                    self.changed = True
+
+    def digest(self, path: str, stat: os.stat_result | None = None) -> str | None:
+        'Returns the content hash of a file, reusing the recorded hash when size and mtime (from `stat` if already taken) are unchanged'
+        if path in self._digests:
+            return self._digests[path]
+        if stat is None:
+            stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            file_hash = entry["hash"]
+        else:
+            with open(path, 'rb') as f:
+                file_hash = hashlib.file_digest(f, "sha256").hexdigest()
+        self._digests[path] = file_hash
+        return file_hash
+
+    def is_current(self, src_path: str, dst_path: str, template_hash: str | None = None, stat: os.stat_result | None = None) -> bool:
+        '''
+        True when `dst_path` was produced from the current content of `src_path` (and the current template, if any).
+        `stat` is the stat of `src_path` when the caller already has it, e.g. from a directory scan.
+        '''
+        self.seen.add(src_path)
+        entry = self.entries.get(src_path)
+        if entry is None or entry["output"] != dst_path or entry["template"] != template_hash:
+            return False
+        if not os.path.exists(dst_path):
+            return False
+        if stat is None:
+            stat = os.stat(src_path)
+        if entry["hash"] != self.digest(src_path, stat):
+            return False
+        # refresh the stat info so an unchanged but touched file isn't re-hashed on every build
+        if entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self.changed = True
+        return True
+
+    def record(self, src_path: str, dst_path: str, template_hash: str | None = None):
+        'Marks `dst_path` as freshly built from `src_path`'
+        self.seen.add(src_path)
+        stat = os.stat(src_path)
+        entry = {
+            "output": dst_path,
+            "hash": self.digest(src_path, stat) if self.hash_content else None,
+            "template": template_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if self.entries.get(src_path) != entry:
+            self.entries[src_path] = entry
+            self.changed = True
+
+    def prune(self, root_path: str) -> list[str]:
+        'Deletes the outputs of every source that was not seen during this build, returning the removed output paths'
+        removed: list[str] = []
+        for src_path in [src for src in self.entries if src not in self.seen]:
+            dst_path = self.remove(src_path, root_path)
+            if dst_path is not None:
+                removed.append(dst_path)
+        return removed
+
+    def remove(self, src_path: str, root_path: str) -> str | None:
+        'Forgets a source whose file is gone and deletes its output (and the gzip sibling of it), returning the removed output path if there was one'
+        entry = self.entries.pop(src_path, None)
+        self.seen.discard(src_path)
+        if entry is None:
+            return None
+        self.changed = True
+        dst_path = entry["output"]
+        remove_stale(dst_path + gzip_suffix)
+        if not os.path.exists(dst_path):
+            return None
+        os.remove(dst_path)
+        # clean up directories left empty by the removal, without ever removing the root itself
+        dst_dir_path = os.path.dirname(dst_path)
+        while (
+            dst_dir_path
+            and os.path.abspath(dst_dir_path) != os.path.abspath(root_path)
+            and os.path.isdir(dst_dir_path)
+            and not os.listdir(dst_dir_path)
+        ):
+            os.rmdir(dst_dir_path)
+            dst_dir_path = os.path.dirname(dst_dir_path)
+        return dst_path
+
+    def outputs(self) -> set[str]:
+        'The output paths of every recorded source, i.e. every page and static file of the public dir once pruned'
+        return {entry["output"] for entry in self.entries.values()}
+
+    def forget_digest(self, path: str):
+        'Drops the digest cached during this build, for long running builds (watch mode) where the file may have changed since'
+        self._digests.pop(path, None)
+
+    def save(self):
+        '''
+        Writes the entries to `path` when any changed since the manifest was loaded or last saved.
+        `json.dumps` instead of `json.dump`, only the former uses the C encoder, and the file is replaced whole,
+        so an interrupted save leaves the previous manifest instead of a truncated one
+        '''
+        if not self.changed and os.path.exists(self.path):
+            return
+        with open(f"{self.path}.tmp", 'w') as f:
+            f.write(json.dumps(self.entries))
+        os.replace(f"{self.path}.tmp", self.path)
+        self.changed = False
@@ -1,7 +1,10 @@
 import re
+import mmap
+from contextlib import contextmanager
+from typing import Callable, Iterator, TextIO
 from htmlnode import ParentNode, LeafNode
 from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node
+from textnode import text_node_to_html_node, text_type_link, text_type_image
 
 block_type_paragraph = "paragraph"
 block_type_heading = "heading"
@@ -10,6 +13,11 @@ block_type_quote = "quote"
 block_type_ol = "ordered_list"
 block_type_ul = "unordered_list"
 
+# while collecting (see `collect_links`), the url of every link and image TextNode converted is appended to this list
+link_targets: list[str] | None = None
+# while collecting (see `collect_text`), called with the text of every TextNode converted
+text_handler: Callable[[str], object] | None = None
+
 
 def markdown_to_html_node(markdown: str) -> ParentNode:
     '''
@@ -41,27 +49,113 @@ def markdown_to_blocks(markdown: str) -> list[str]:
     return markdown_blocks
 
 
+def iter_markdown_blocks(stream: TextIO, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    '''
+    Streaming version of `markdown_to_blocks` for a markdown file object: reads `chunk_size` characters at a time
+    and yields each block as soon as the blank line ending it has been read.
+    Yields exactly the blocks of `markdown_to_blocks(stream.read())` while holding no more than one block and one chunk in memory.
+    '''
+    buffer = ""
+    search_from = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        # same left to right matching as `str.split`, a "\n\n" cut in half by the chunk boundary is found once both halves are in
+        start = 0
+        end = buffer.find("\n\n", search_from)
+        while end != -1:
+            block = buffer[start:end]
+            if block != str(""):
+                yield block.strip()
+            start = end + 2
+            end = buffer.find("\n\n", start)
+        # only copy the remainder when a block was cut off, a huge block then grows in place instead of being copied on every chunk
+        if start > 0:
+            buffer = buffer[start:]
+        search_from = max(0, len(buffer) - 1)
+    if buffer != str(""):
+        yield buffer.strip()
+
+
+# bytes of an mmap scanned between two releases of the pages already converted
+release_interval = 16 * 1024 * 1024
+
+
+def iter_buffer_blocks(buffer: bytes | mmap.mmap, start: int = 0) -> Iterator[str]:
+    '''
+    `markdown_to_blocks` over the utf-8 bytes of a markdown file from offset `start` (e.g. past its front matter), e.g. a read only `mmap` of it.
+    Only one block at a time is decoded, the file is never copied whole: a "\n\n" byte pair can't occur inside a multi-byte character,
+    so splitting the bytes gives the same blocks as splitting the decoded text.
+    '''
+    released = 0
+    end = buffer.find(b"\n\n", start)
+    while end != -1:
+        if end > start:
+            yield buffer[start:end].decode("utf-8").strip()
+        start = end + 2
+        if start - released >= release_interval:
+            released = release_pages(buffer, start)
+        end = buffer.find(b"\n\n", start)
+    if len(buffer) > start:
+        yield buffer[start:].decode("utf-8").strip()
+
+
+def buffer_has_carriage_returns(buffer: bytes | mmap.mmap) -> bool:
+    'True when the bytes contain a "\\r", which a text mode read would translate, searched `release_interval` bytes at a time'
+    for offset in range(0, len(buffer), release_interval):
+        if buffer.find(b"\r", offset, offset + release_interval) != -1:
+            return True
+        release_pages(buffer, offset + release_interval)
+    return False
+
+
+def release_pages(buffer: bytes | mmap.mmap, end: int, start: int = 0) -> int:
+    '''
+    Drops the whole pages of an mmap between `start` and `end` from this process's memory, returns the offset they were released up to.
+    The pages of an mmap stay resident once read, but they are clean file pages, cheap to drop and read again if needed.
+    '''
+    if not isinstance(buffer, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+        return end
+    end = min(end, len(buffer))
+    end -= end % mmap.PAGESIZE
+    start += -start % mmap.PAGESIZE
+    if end > start:
+        buffer.madvise(mmap.MADV_DONTNEED, start, end - start)
+    return end
+
+
+def markdown_stream_to_html_node(stream: TextIO) -> ParentNode:
+    '''
+    Same as `markdown_to_html_node`, but for a markdown file object too big to hold in memory along with its html tree.
+    The blocks are read, converted and dropped one at a time while the returned node is written with `write_html`,
+    so it can only be written once.
+    '''
+    return blocks_to_lazy_html_node(iter_markdown_blocks(stream))
+
+
+def markdown_buffer_to_html_node(buffer: bytes | mmap.mmap, start: int = 0) -> ParentNode:
+    'Same as `markdown_stream_to_html_node`, for the utf-8 bytes of a markdown file from offset `start` (see `iter_buffer_blocks`)'
+    return blocks_to_lazy_html_node(iter_buffer_blocks(buffer, start))
+
+
+def blocks_to_lazy_html_node(blocks: Iterator[str]) -> ParentNode:
+    node = ParentNode("div", children=[])
+    # a generator instead of a list, assigned after validation (which expects a list)
+    node.children = (block_to_html_node(block) for block in blocks)
+    return node
+
+
 def block_to_html_node(block: str) -> ParentNode:
     '''
     This gives us a way to return a second-level ParentNode and its children given a md block.
-    All it is doing is pointing us to the right function based on `block_type`
+    All it is doing is pointing us to the right function based on the block type, passing on the prefix width found while typing it
 
     Used by: `markdown_to_html_node`
     '''
-    block_type = block_to_block_type(block)
-    if block_type is block_type_paragraph:
-        return paragraph_to_html_node(block)
-    if block_type is block_type_heading:
-        return heading_to_html_node(block)
-    if block_type is block_type_code:
-        return code_to_html_node(block)
-    if block_type is block_type_ol:
-        return ol_to_html_node(block)
-    if block_type is block_type_ul:
-        return ul_to_html_node(block)
-    if block_type is block_type_quote:
-        return quote_to_html_node(block)
-    raise ValueError("Invalid block type")
+    block_type, prefix = classify_block(block)
+    return block_converters[block_type](block, prefix)
 
 
 def block_to_block_type(block: str) -> str:
@@ -70,26 +164,73 @@ def block_to_block_type(block: str) -> str:
 
     Used by: `block_to_html_node`
     '''
+    return classify_block(block)[0]
+
+
+# "#" to "######" followed by a space
+heading_prefix_pattern = re.compile(r"#{1,6} ")
+
+
+def _classify_heading(block: str) -> tuple[str, int]:
+    match = heading_prefix_pattern.match(block)
+    if match is None:
+        return block_type_paragraph, 0
+    return block_type_heading, match.end() - 1
+
+
+def _classify_code(block: str) -> tuple[str, int]:
+    if block[:3] == "```" and block[-3:] == "```":
+        return block_type_code, 3
+    return block_type_paragraph, 0
+
+
+def _classify_quote(block: str) -> tuple[str, int]:
+    if block[1:2] == " ":
+        return block_type_quote, 2
+    return block_type_paragraph, 0
+
+
+def _classify_ul(block: str) -> tuple[str, int]:
+    if block[1:2] == " ":
+        return block_type_ul, 2
+    return block_type_paragraph, 0
+
+
+def _classify_ol(block: str) -> tuple[str, int]:
+    # a single digit and "." or ")", the items are cut after "1. "
+    if block[1:2] == "." or block[1:2] == ")":
+        return block_type_ol, 3
+    return block_type_paragraph, 0
+
+
+# first character of a block => the check for the only block type it can start, every other character starts a paragraph
+block_classifiers = {
+    "#": _classify_heading,
+    "`": _classify_code,
+    ">": _classify_quote,
+    "-": _classify_ul,
+    "*": _classify_ul,
+    **{digit: _classify_ol for digit in "0123456789"},
+}
+
+
+def classify_block(block: str) -> tuple[str, int]:
+    '''
+    Returns the type of a block and the width of its prefix: the level of a heading, the marker width of a list item or quote line
+    (3 for the fences of a code block, 0 for a paragraph), so the converters don't have to scan the prefix again.
+    One dictionary lookup on the first character picks the only type the block can be.
+    '''
     block = block.strip("\n")
     block = block.strip("    ")
-    if (
-        block.startswith("# ")
-        or block.startswith("## ")
-        or block.startswith("### ")
-        or block.startswith("#### ")
-        or block.startswith("##### ")
-        or block.startswith("###### ")
-    ):
-        return block_type_heading
-    if block[:3] == "```" and block[-3:] == "```":
-        return block_type_code
-    if block[:2] == "> ":
-        return block_type_quote
-    if block[:2] == "- " or block[:2] == "* ":
-        return block_type_ul
-    if re.match(r'\d+', block[0]) and (block[1] == "." or block[1] == ")"):
-        return block_type_ol
-    return block_type_paragraph
+    if block == "":
+        return block_type_paragraph, 0
+    classifier = block_classifiers.get(block[0])
+    if classifier is None:
+        # any other unicode decimal digit also starts an ordered list
+        if block[0].isdecimal():
+            return _classify_ol(block)
+        return block_type_paragraph, 0
+    return classifier(block)
 
 
 # Object Conversion Function (string => TextNode => LeafNode)
@@ -105,9 +246,48 @@ def text_to_children(text: str) -> list[LeafNode]:
         # TextNode => LeafNode
         leaf_node = text_node_to_html_node(text_node)
         children.append(leaf_node)
+    if text_handler is not None:
+        for text_node in text_nodes:
+            text_handler(text_node.text)
+    if link_targets is not None:
+        link_targets.extend(
+            text_node.url for text_node in text_nodes
+            if text_node.text_type is text_type_link or text_node.text_type is text_type_image
+        )
     return children
 
 
+@contextmanager
+def collect_text(handler: Callable[[str], object]) -> Iterator[None]:
+    '''
+    Calls `handler` with the text of every TextNode converted inside the `with` block (the alt text for images), e.g. to index the words of a page.
+    Like `collect_links`, lazily converted blocks are only seen once rendered inside the block.
+    '''
+    global text_handler
+    previous = text_handler
+    text_handler = handler
+    try:
+        yield
+    finally:
+        text_handler = previous
+
+
+@contextmanager
+def collect_links() -> Iterator[list[str]]:
+    '''
+    Collects the url of every link and image converted inside the `with` block, in order, into the yielded list.
+    The urls come from the TextNodes the conversion produces anyway, so collecting costs no extra parsing.
+    Lazily converted blocks (see `blocks_to_lazy_html_node`) are only collected once rendered inside the block.
+    '''
+    global link_targets
+    previous = link_targets
+    link_targets = []
+    try:
+        yield link_targets
+    finally:
+        link_targets = previous
+
+
 def paragraph_to_html_node(block: str) -> ParentNode:
     lines = block.split("\n")
     paragraph = " ".join(lines)
@@ -115,13 +295,9 @@ def paragraph_to_html_node(block: str) -> ParentNode:
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block: str) -> ParentNode:
-    level = 0
-    for char in block:
-        if char == "#":
-            level += 1
-        else:
-            break
+def heading_to_html_node(block: str, level: int | None = None) -> ParentNode:
+    if level is None:
+        level = len(block) - len(block.lstrip("#"))
     if level + 1 >= len(block):
         raise ValueError(f"Invalid heading level: {level}")
     text = block[level + 1 :]
@@ -139,21 +315,21 @@ def code_to_html_node(block: str) -> ParentNode:
     return ParentNode("pre", [code])
 
 
-def ol_to_html_node(block: str) -> ParentNode:
+def ol_to_html_node(block: str, marker_width: int = 3) -> ParentNode:
     items = block.split("\n")
     html_items = []
     for item in items:
-        text = item[3:]
+        text = item[marker_width:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ul_to_html_node(block: str) -> ParentNode:
+def ul_to_html_node(block: str, marker_width: int = 2) -> ParentNode:
     items = block.split("\n")
     html_items = []
     for item in items:
-        text = item[2:]
+        text = item[marker_width:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
@@ -171,6 +347,17 @@ def quote_to_html_node(block: str) -> ParentNode:
     return ParentNode("blockquote", children)
 
 
+# block type => converter, called with the block and the prefix width returned by `classify_block`
+block_converters = {
+    block_type_paragraph: lambda block, prefix: paragraph_to_html_node(block),
+    block_type_heading: heading_to_html_node,
+    block_type_code: lambda block, prefix: code_to_html_node(block),
+    block_type_quote: lambda block, prefix: quote_to_html_node(block),
+    block_type_ul: ul_to_html_node,
+    block_type_ol: ol_to_html_node,
+}
+
+
 if __name__ == "__main__":
     block = '''
 # Heading
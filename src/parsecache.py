@@ -0,0 +1,181 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from contextlib import nullcontext
+import inline_markdown
+import markdown_blocks
+from markdown_blocks import markdown_to_blocks, block_to_html_node, collect_links, collect_text
+
+# bumped whenever the html produced for a block changes, so a cache persisted by an older version is discarded
+cache_version = 3
+# an entry starting with this character carries the link and image targets of its markdown before the html, see `pack_entry`
+links_separator = "\0"
+# an entry starting with this character carries the text of its markdown (for `collect_text`) before the rest, see `pack_entry`
+text_separator = "\x01"
+
+
+class ParseCache:
+    '''
+    Content addressed cache of converted markdown: the html of whole pages and of single blocks, keyed by the hash of their markdown.
+    A page seen before costs one hash, a new page sharing blocks with earlier ones (disclaimers, generated tables) only converts the new blocks.
+    Entries are kept in an LRU bounded by `max_bytes` of keys and html, and optionally persisted to `path` between builds.
+    '''
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, path: str | None = None, track_added: bool = False):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.size = 0
+        # "page" / "block" => count
+        self.hits = {"page": 0, "block": 0}
+        self.misses = {"page": 0, "block": 0}
+        # with `track_added`, the entries converted since the last `take_changes`, a worker process sends them back to the parent's cache
+        self.added: list[tuple[str, str]] | None = [] if track_added else None
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        # the inline parsers differ on a few edge cases, so a cache is only valid for the parser that filled it
+        if data.get("version") != cache_version or data.get("inline_parser") != inline_markdown.inline_parser:
+            return
+        for key, html in data["entries"].items():
+            self.put(key, html)
+
+    def save(self):
+        'Writes the entries to `path`, least recently used first'
+        if self.path is None:
+            return
+        with open(f"{self.path}.tmp", 'w') as f:
+            json.dump({"version": cache_version, "inline_parser": inline_markdown.inline_parser, "entries": self.entries}, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def get(self, key: str) -> str | None:
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+        return html
+
+    def put(self, key: str, html: str):
+        'Adds an entry, evicting the least recently used ones to stay under `max_bytes`'
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(key) + len(old)
+        if len(key) + len(html) > self.max_bytes:
+            return
+        self.entries[key] = html
+        self.size += len(key) + len(html)
+        while self.size > self.max_bytes:
+            old_key, old_html = self.entries.popitem(last=False)
+            self.size -= len(old_key) + len(old_html)
+
+    def lookup(self, kind: str, text: str, with_text: bool = False) -> tuple[str, str | None]:
+        '''
+        Returns the key of a page or block and its cached entry, if any, counting the hit or miss.
+        With `with_text`, an entry converted without collecting its text is a miss.
+        '''
+        key = f"{kind}:{hashlib.sha256(text.encode()).hexdigest()}"
+        html = self.get(key)
+        if html is not None and with_text and not html.startswith(text_separator):
+            html = None
+        if html is None:
+            self.misses[kind] += 1
+        else:
+            self.hits[kind] += 1
+        return key, html
+
+    def add(self, key: str, html: str):
+        self.put(key, html)
+        if self.added is not None:
+            self.added.append((key, html))
+
+    def content_html(self, markdown: str, links: list[str] | None = None) -> str:
+        '''
+        Same html as `markdown_to_html_node(markdown).to_html()`, only converting the blocks that are not cached yet.
+        Entries keep the link and image targets collected while converting, so a page taken from the cache still extends `links` with its targets.
+        Inside `collect_text` (a --search build), entries also keep the text of their markdown, which is handed to the handler in one call
+        per cached page or block; entries converted without it are converted again.
+        '''
+        text_handler = markdown_blocks.text_handler
+        with_text = text_handler is not None
+        page_key, page_entry = self.lookup("page", markdown, with_text)
+        if page_entry is not None:
+            page_html, page_links, page_text = unpack_entry(page_entry)
+            if links is not None:
+                links.extend(page_links)
+            if with_text:
+                text_handler(page_text)
+            return page_html
+        parts = ["<div>"]
+        page_links: list[str] = []
+        page_texts: list[str] = []
+        for block in markdown_to_blocks(markdown):
+            block_key, block_entry = self.lookup("block", block, with_text)
+            if block_entry is None:
+                block_texts: list[str] = []
+                with collect_links() as block_links, collect_text(block_texts.append) if with_text else nullcontext():
+                    block_html = block_to_html_node(block).to_html()
+                block_text = "\n".join(block_texts) if with_text else None
+                self.add(block_key, pack_entry(block_html, block_links, block_text))
+            else:
+                block_html, block_links, block_text = unpack_entry(block_entry)
+            parts.append(block_html)
+            page_links.extend(block_links)
+            if with_text:
+                text_handler(block_text)
+                page_texts.append(block_text)
+        parts.append("</div>")
+        page_html = "".join(parts)
+        self.add(page_key, pack_entry(page_html, page_links, "\n".join(page_texts) if with_text else None))
+        if links is not None:
+            links.extend(page_links)
+        return page_html
+
+    def take_changes(self) -> tuple[list[tuple[str, str]], dict[str, int], dict[str, int]]:
+        'Returns the (added entries, hits, misses) since the previous call and starts counting again, see `merge`'
+        changes = (self.added or [], self.hits, self.misses)
+        self.added = [] if self.added is not None else None
+        self.hits = {"page": 0, "block": 0}
+        self.misses = {"page": 0, "block": 0}
+        return changes
+
+    def merge(self, added: list[tuple[str, str]], hits: dict[str, int], misses: dict[str, int]):
+        'Merges the entries converted and the counts recorded by another cache, e.g. in a worker process'
+        for key, html in added:
+            self.put(key, html)
+        for kind in self.hits:
+            self.hits[kind] += hits[kind]
+            self.misses[kind] += misses[kind]
+
+    def summary(self) -> str:
+        return (
+            f"pages {self.hits['page']} hits / {self.misses['page']} misses, "
+            f"blocks {self.hits['block']} hits / {self.misses['block']} misses, "
+            f"{len(self.entries)} entries ({self.size / 2**20:.1f} MiB)"
+        )
+
+
+def pack_entry(html: str, links: list[str], text: str | None = None) -> str:
+    '''
+    Returns the cache entry of some html, the link targets of its markdown and its text when collected,
+    just the html when there are neither
+    '''
+    entry = html if not links else links_separator + "\n".join(links) + links_separator + html
+    if text is None:
+        return entry
+    return text_separator + text + text_separator + entry
+
+
+def unpack_entry(entry: str) -> tuple[str, list[str], str | None]:
+    '''
+    Returns the (html, link targets, text or None) of a cache entry written by `pack_entry`.
+    The html never starts with a separator (it starts with a tag), and text never holds one (they are control characters)
+    '''
+    text = None
+    if entry.startswith(text_separator):
+        text, _, entry = entry[1:].partition(text_separator)
+    if not entry.startswith(links_separator):
+        return entry, [], text
+    links, _, html = entry[1:].partition(links_separator)
+    return html, links.split("\n"), text
@@ -0,0 +1,79 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+
+class BuildProfiler:
+    '''
+    Opt-in instrumentation of a build.
+    Records the wall time of every stage as `(stage, page, start, duration, pid)` events and keeps running totals per block type,
+    so the events of worker processes can be merged back into the profiler of the main process.
+    '''
+    def __init__(self):
+        self.events: list[tuple[str, str | None, float, float, int]] = []
+        # block type => [count, seconds]
+        self.block_totals: dict[str, list] = {}
+
+    @contextmanager
+    def stage(self, name: str, page: str | None = None):
+        'Times the body of the `with` statement as one event of stage `name`, optionally attributed to a page'
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append((name, page, start, time.perf_counter() - start, os.getpid()))
+
+    def add_block(self, block_type: str, duration: float):
+        'Adds the conversion time of a single block to the totals of its block type'
+        totals = self.block_totals.setdefault(block_type, [0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+
+    def merge(self, events: list, block_totals: dict[str, list]):
+        'Merges the events and block totals recorded by another profiler, e.g. in a worker process'
+        self.events.extend(events)
+        for block_type, (count, duration) in block_totals.items():
+            totals = self.block_totals.setdefault(block_type, [0, 0.0])
+            totals[0] += count
+            totals[1] += duration
+
+    def summary(self, top: int = 10) -> str:
+        'Returns a report of the totals per stage, per block type and the `top` slowest pages'
+        stage_totals: dict[str, list] = {}
+        page_totals: dict[str, float] = {}
+        for name, page, _, duration, _ in self.events:
+            totals = stage_totals.setdefault(name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += duration
+            if page is not None:
+                page_totals[page] = page_totals.get(page, 0.0) + duration
+        lines = [f"{'stage':<24}{'count':>8}{'total ms':>12}"]
+        for name, (count, duration) in stage_totals.items():
+            lines.append(f"{name:<24}{count:>8}{duration * 1e3:>12.2f}")
+        lines.append("")
+        lines.append(f"{'block type':<24}{'count':>8}{'total ms':>12}")
+        for block_type, (count, duration) in sorted(self.block_totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{block_type:<24}{count:>8}{duration * 1e3:>12.2f}")
+        lines.append("")
+        lines.append(f"slowest {top} pages:")
+        for page, duration in sorted(page_totals.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"{duration * 1e3:>10.2f} ms  {page}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, trace_path: str):
+        'Writes every event as a Chrome trace (load it in chrome://tracing or https://ui.perfetto.dev)'
+        origin = min((start for _, _, start, _, _ in self.events), default=0.0)
+        trace_events = []
+        for name, page, start, duration, pid in self.events:
+            trace_events.append({
+                "name": name if page is None else f"{name} {page}",
+                "cat": name,
+                "ph": "X",
+                "ts": (start - origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": pid,
+            })
+        with open(trace_path, 'w') as f:
+            json.dump({"traceEvents": trace_events}, f)
@@ -0,0 +1,200 @@
+import os
+import re
+import sys
+import json
+import shutil
+import tempfile
+from collections import Counter
+from sitemodel import page_url
+
+# words of 2 to 32 letters or digits, lowercased
+term_pattern = re.compile(r"\w{2,32}")
+# a term in the title of a page counts as this many occurrences in its body
+title_weight = 10
+# every shard holds the terms starting with the same characters, the browser fetches the one shard of each query term
+default_prefix_length = 2
+# postings held in memory before they are spilled to disk, bounding the memory of a build whatever its page count
+default_max_postings = 500_000
+# page ids per file of the doc table, the browser fetches the files holding the ids of the results it shows
+docs_per_file = 500
+
+
+def count_terms(terms: Counter, text: str):
+    'Adds the terms of `text` to `terms`'
+    terms.update(term_pattern.findall(text.lower()))
+
+
+class PageTerms:
+    'The terms of the pages generated by a worker process, sent back to the parent and added to its `SearchIndex` with `merge`'
+    def __init__(self):
+        self.pages: list[tuple[str, str, dict[str, int]]] = []
+
+    def add_page(self, dst_path: str, title: str, terms: dict[str, int]):
+        self.pages.append((dst_path, title, terms))
+
+
+class SearchIndex:
+    '''
+    Inverted index of the generated pages, written as a static search index under `{public_path}/search`:
+    `shards/<prefix>.json` maps every term starting with `prefix` to its [page id, weight] postings, best first,
+    `docs/<n>.json` lists the url and title of the pages with ids `n * docs_per_file` and up, and `index.json` gives both sizes,
+    so a browser only fetches the shard of each query term and the doc files of the results it shows.
+    The terms come from the text of the TextNodes of each page as it is converted, those of its title count `title_weight` times.
+
+    The index is incremental: with a `state_path`, the id and shards of every page are kept between builds and `save` only rewrites
+    the shards holding terms of the pages added or removed since. Postings waiting to be written are spilled to disk past `max_postings`.
+    '''
+    def __init__(
+            self,
+            public_path: str,
+            state_path: str | None = None,
+            prefix_length: int = default_prefix_length,
+            max_postings: int = default_max_postings
+        ):
+        self.public_path = public_path
+        self.search_path = f"{public_path}/search"
+        self.state_path = state_path
+        self.prefix_length = prefix_length
+        self.max_postings = max_postings
+        # output path => {"id": page id, "shards": space separated prefixes of its terms}, a single string per page keeps 100k pages small
+        self.pages: dict[str, dict] = {}
+        # page id => [url, title], None for a free id
+        self.docs: list[list[str] | None] = []
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                state = json.load(f)
+            if state["prefix_length"] == prefix_length:
+                self.pages = state["pages"]
+                self.docs = state["docs"]
+        # ids free for new pages, ids freed since the last save only become free once their postings are gone
+        self.free = [page_id for page_id, doc in enumerate(self.docs) if doc is None]
+        # ids whose old postings are dropped from the shards on `save`
+        self.changed: set[int] = set()
+        # shards to rewrite on `save`
+        self.dirty: set[str] = set()
+        # prefix => "term\tpage id\tweight\n" postings not written yet, the lines of a spill file
+        self.pending: dict[str, list[str]] = {}
+        self.pending_count = 0
+        self.spill_path: str | None = None
+
+    def add_page(self, dst_path: str, title: str, terms: dict[str, int]):
+        'Adds (or replaces) a page with the term counts of its text'
+        self.remove_page(dst_path)
+        title_terms = Counter()
+        count_terms(title_terms, title)
+        weights = Counter(terms)
+        for term, count in title_terms.items():
+            weights[term] += count * title_weight
+        if self.free:
+            page_id = self.free.pop()
+            self.docs[page_id] = [page_url(self.public_path, dst_path), title]
+        else:
+            page_id = len(self.docs)
+            self.docs.append([page_url(self.public_path, dst_path), title])
+        self.changed.add(page_id)
+        shards: set[str] = set()
+        for term, weight in weights.items():
+            # one string per prefix instead of one per posting
+            prefix = sys.intern(term[:self.prefix_length])
+            shards.add(prefix)
+            self.pending.setdefault(prefix, []).append(f"{term}\t{page_id}\t{weight}\n")
+        self.pending_count += len(weights)
+        self.dirty.update(shards)
+        self.pages[dst_path] = {"id": page_id, "shards": " ".join(sorted(shards))}
+        if self.pending_count > self.max_postings:
+            self.spill()
+
+    def remove_page(self, dst_path: str):
+        'Drops a page, its postings are removed from its shards on `save`'
+        page = self.pages.pop(dst_path, None)
+        if page is None:
+            return
+        self.docs[page["id"]] = None
+        self.changed.add(page["id"])
+        self.dirty.update(page["shards"].split())
+
+    def retain(self, dst_paths: set[str]):
+        'Drops every page that is not among `dst_paths`, e.g. the outputs of the build'
+        for dst_path in [dst for dst in self.pages if dst not in dst_paths]:
+            self.remove_page(dst_path)
+
+    def merge(self, pages: list[tuple[str, str, dict[str, int]]]):
+        'Adds the pages recorded by a `PageTerms`, e.g. in a worker process'
+        for dst_path, title, terms in pages:
+            self.add_page(dst_path, title, terms)
+
+    def spill(self):
+        'Appends the pending postings to one file per shard in a temporary directory and frees them'
+        if self.spill_path is None:
+            self.spill_path = tempfile.mkdtemp(prefix="search-")
+        for prefix, postings in self.pending.items():
+            with open(f"{self.spill_path}/{prefix}.tsv", 'a') as f:
+                f.writelines(postings)
+        self.pending = {}
+        self.pending_count = 0
+
+    def save(self) -> int:
+        '''
+        Rewrites the shards touched since the last save, one at a time: the postings of changed pages are dropped and the new ones merged in.
+        Then writes the doc files holding changed ids (all of them on the first save), `index.json` and the state.
+        Returns the number of shards rewritten.
+        '''
+        os.makedirs(f"{self.search_path}/shards", exist_ok=True)
+        rewritten = len(self.dirty)
+        for prefix in sorted(self.dirty):
+            self.write_shard(prefix)
+        if self.spill_path is not None:
+            shutil.rmtree(self.spill_path)
+            self.spill_path = None
+        if os.path.isdir(f"{self.search_path}/docs"):
+            parts = {page_id // docs_per_file for page_id in self.changed}
+        else:
+            os.makedirs(f"{self.search_path}/docs")
+            # the single doc table of an index written before the doc files
+            if os.path.exists(f"{self.search_path}/docs.json"):
+                os.remove(f"{self.search_path}/docs.json")
+            parts = set(range((len(self.docs) + docs_per_file - 1) // docs_per_file))
+        # `json.dumps` instead of `json.dump`, only the former uses the C encoder
+        for part in sorted(parts):
+            with open(f"{self.search_path}/docs/{part}.json", 'w') as f:
+                f.write(json.dumps(self.docs[part * docs_per_file:(part + 1) * docs_per_file], separators=(",", ":")))
+        with open(f"{self.search_path}/index.json", 'w') as f:
+            f.write(json.dumps({"prefix_length": self.prefix_length, "docs_per_file": docs_per_file, "pages": len(self.pages)}))
+        if self.state_path is not None:
+            with open(self.state_path, 'w') as f:
+                f.write(json.dumps({"prefix_length": self.prefix_length, "pages": self.pages, "docs": self.docs}))
+        self.free = [page_id for page_id, doc in enumerate(self.docs) if doc is None]
+        self.changed = set()
+        self.dirty = set()
+        self.pending = {}
+        self.pending_count = 0
+        return rewritten
+
+    def write_shard(self, prefix: str):
+        shard_path = f"{self.search_path}/shards/{prefix}.json"
+        # term => [[page id, weight], ...]
+        shard: dict[str, list[list[int]]] = {}
+        if os.path.exists(shard_path):
+            with open(shard_path, 'r') as f:
+                for term, postings in json.load(f).items():
+                    postings = [posting for posting in postings if posting[0] not in self.changed]
+                    if postings:
+                        shard[term] = postings
+        new_postings = self.pending.get(prefix, [])
+        if self.spill_path is not None and os.path.exists(f"{self.spill_path}/{prefix}.tsv"):
+            with open(f"{self.spill_path}/{prefix}.tsv", 'r') as f:
+                new_postings = f.readlines() + new_postings
+        for line in new_postings:
+            term, page_id, weight = line.split("\t")
+            page_id = int(page_id)
+            # a page added then removed again before this save
+            if self.docs[page_id] is not None:
+                shard.setdefault(term, []).append([page_id, int(weight)])
+        if not shard:
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+            return
+        for postings in shard.values():
+            postings.sort(key=lambda posting: (-posting[1], posting[0]))
+        with open(shard_path, 'w') as f:
+            f.write(json.dumps(dict(sorted(shard.items())), separators=(",", ":")))
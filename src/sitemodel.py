@@ -0,0 +1,164 @@
+import os
+import time
+from typing import Callable
+from htmlnode import LeafNode, ParentNode
+from frontmatter import read_page_meta
+
+
+class SitePage:
+    'A markdown page of the content dir, with the stat and front matter taken while scanning and its title once loaded'
+    __slots__ = ("src_path", "dst_path", "url", "stat", "meta", "body_start", "title", "parent")
+
+    def __init__(
+            self,
+            src_path: str,
+            dst_path: str,
+            url: str,
+            stat: os.stat_result,
+            parent: 'SiteDir',
+            meta: dict | None = None,
+            body_start: int = 0
+        ):
+        self.src_path = src_path
+        self.dst_path = dst_path
+        self.url = url
+        self.stat = stat
+        self.meta = meta if meta is not None else {}
+        # byte offset of the markdown after the front matter
+        self.body_start = body_start
+        # the front matter title, or None until `SiteModel.load_titles`
+        self.title: str | None = self.meta.get("title")
+        self.parent = parent
+
+    def __repr__(self):
+        return f"SitePage({self.src_path}, {self.url})"
+
+
+class SiteDir:
+    'A directory of the content dir, with its pages and subdirectories in listing order'
+    __slots__ = ("src_path", "dst_path", "url", "pages", "dirs", "parent")
+
+    def __init__(self, src_path: str, dst_path: str, url: str, parent: 'SiteDir | None' = None):
+        self.src_path = src_path
+        self.dst_path = dst_path
+        self.url = url
+        self.pages: list[SitePage] = []
+        self.dirs: list[SiteDir] = []
+        self.parent = parent
+
+    @property
+    def index(self) -> SitePage | None:
+        'The index page of the directory, served at its url'
+        for page in self.pages:
+            if page.url == self.url:
+                return page
+        return None
+
+    def __repr__(self):
+        return f"SiteDir({self.src_path}, {len(self.pages)} pages, {len(self.dirs)} dirs)"
+
+
+class SiteModel:
+    '''
+    The pages and directories of the content dir, discovered by a single `os.scandir` walk:
+    source and output paths, output urls, the stat of every source (mtime and size), its front matter and, once loaded, the titles.
+    Rendering, the sitemap and the navigation slots all use the one model instead of walking or stating the tree again.
+    Only the front matter of each page is read while scanning, pages marked "draft: true" are left out unless `drafts` is set.
+    '''
+    def __init__(self, content_path: str, public_path: str, drafts: bool = False):
+        self.content_path = content_path
+        self.public_path = public_path
+        self.include_drafts = drafts
+        self.root = SiteDir(content_path, public_path, "/")
+        # every page, in the order a serial build generates them
+        self.pages: list[SitePage] = []
+        # src paths of the drafts left out
+        self.drafts: list[str] = []
+        self.scan(self.root)
+
+    def scan(self, site_dir: SiteDir):
+        with os.scandir(site_dir.src_path) as entries:
+            for entry in entries:
+                src_path = f"{site_dir.src_path}/{entry.name}"
+                dst_path = f"{site_dir.dst_path}/{entry.name}"
+                # the file type comes with the directory listing, only files are stated (once, for mtime and size)
+                if entry.is_file():
+                    meta, body_start = read_page_meta(src_path)
+                    if meta.get("draft") and not self.include_drafts:
+                        self.drafts.append(src_path)
+                        continue
+                    dst_path = f"{dst_path[:-3]}.html"
+                    page = SitePage(src_path, dst_path, page_url(self.public_path, dst_path), entry.stat(), site_dir, meta, body_start)
+                    site_dir.pages.append(page)
+                    self.pages.append(page)
+                else:
+                    child = SiteDir(src_path, dst_path, f"{site_dir.url}{entry.name}/", site_dir)
+                    site_dir.dirs.append(child)
+                    self.scan(child)
+
+    def load_titles(self, read_title: Callable[[str, int], str]):
+        'Reads the title of every page without one yet (none in its front matter) with `read_title(src_path, body_start)`'
+        for page in self.pages:
+            if page.title is None:
+                page.title = read_title(page.src_path, page.body_start)
+
+    def nav_html(self, page: SitePage) -> str:
+        '''
+        The navigation of a page: links to the pages and subdirectories of its directory, the page itself marked with aria-current.
+        A subdirectory links to its index page, with its title (or the directory name without one).
+        '''
+        site_dir = page.parent
+        items: list[ParentNode] = []
+        for other in site_dir.pages:
+            if other is page:
+                items.append(ParentNode("li", [LeafNode("a", link_title(other), {"href": other.url, "aria-current": "page"})]))
+            elif other.url != site_dir.url:
+                items.append(ParentNode("li", [LeafNode("a", link_title(other), {"href": other.url})]))
+        for child in site_dir.dirs:
+            index = child.index
+            title = link_title(index) if index is not None else os.path.basename(child.src_path)
+            items.append(ParentNode("li", [LeafNode("a", title, {"href": child.url})]))
+        if not items:
+            return ""
+        return ParentNode("nav", [ParentNode("ul", items)]).to_html()
+
+    def breadcrumbs_html(self, page: SitePage) -> str:
+        'The breadcrumb trail of a page: a link to the index page of every directory above it, then the page itself'
+        trail: list[ParentNode] = []
+        site_dir = page.parent
+        while site_dir is not None:
+            index = site_dir.index
+            if index is not None and index is not page:
+                trail.append(ParentNode("li", [LeafNode("a", link_title(index), {"href": index.url})]))
+            site_dir = site_dir.parent
+        trail.reverse()
+        trail.append(ParentNode("li", [LeafNode(None, link_title(page))], {"aria-current": "page"}))
+        return ParentNode("nav", [ParentNode("ol", trail)], {"aria-label": "breadcrumb"}).to_html()
+
+    def write_sitemap(self, base_url: str, path: str | None = None):
+        'Writes the sitemap.xml of every page, at `base_url`, with its front matter date (or the date of its source) as lastmod'
+        if path is None:
+            path = f"{self.public_path}/sitemap.xml"
+        base_url = base_url.rstrip("/")
+        with open(path, 'w') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for page in self.pages:
+                lastmod = page.meta.get("date") or time.strftime("%Y-%m-%d", time.gmtime(page.stat.st_mtime))
+                f.write(f"<url><loc>{xml_escape(base_url + page.url)}</loc><lastmod>{lastmod}</lastmod></url>\n")
+            f.write("</urlset>\n")
+
+
+def page_url(public_path: str, dst_path: str) -> str:
+    'The url a page is served at, a directory url for index.html pages'
+    url = dst_path[len(public_path):]
+    return url[:-len("index.html")] if url.endswith("/index.html") else url
+
+
+def link_title(page: SitePage) -> str:
+    'The title of a page in links, its file name when it has none'
+    return page.title or os.path.basename(page.src_path)[:-3]
+
+
+def xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
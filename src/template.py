@@ -0,0 +1,118 @@
+import os
+import re
+from typing import Callable, Iterable
+from htmlnode import HTMLNode
+
+# a named slot in the template, e.g. "{{ Title }}" or "{{ Content }}"
+slot_pattern = re.compile(r"\{\{ (\w+) \}\}")
+
+
+class Template:
+    '''
+    An html template compiled once into its static segments and the named slots between them.
+    Rendering fills every slot in a single pass, so a value that happens to contain "{{ Title }}"
+    or "{{ Content }}" is written out as-is instead of being substituted again.
+    '''
+    def __init__(self, source: str, path: str | None = None):
+        self.path = path
+        parts = slot_pattern.split(source)
+        # even indexed parts are the static segments, odd indexed parts are slot names
+        self.segments: list[str] = parts[0::2]
+        self.slots: list[str] = parts[1::2]
+
+    def render(self, **values: str | HTMLNode) -> str:
+        'Returns the template with every slot replaced by its value, slots without a value are left untouched'
+        parts: list[str] = []
+        self.write(parts.append, **values)
+        return "".join(parts)
+
+    def write(self, write: Callable[[str], object], **values: str | HTMLNode):
+        '''
+        Streams the filled template into `write`.
+        A value can be a string or an HTMLNode, which is streamed with `write_html` instead of being rendered to a string first.
+        '''
+        write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            value = values.get(slot, f"{{{{ {slot} }}}}")
+            if isinstance(value, HTMLNode):
+                value.write_html(write)
+            else:
+                write(value)
+            write(segment)
+
+    def __repr__(self):
+        return f"Template({self.path}, slots: {self.slots})"
+
+
+def load_template(template_path: str) -> Template:
+    'Reads and compiles an html template, meant to be called once per build and shared by every page'
+    with open(template_path, 'r') as f:
+        return Template(f.read(), template_path)
+
+
+class TemplateCache:
+    '''
+    The templates of a site, compiled once and kept by path, compiled again only when the mtime (or size) of their file changes,
+    so watch mode reuses them from one rebuild to the next.
+    Pages use the template at `default_path` unless one of the templates under `templates_path` is selected for them (see `select`).
+    '''
+    def __init__(self, default_path: str, templates_path: str | None = None):
+        self.default_path = default_path
+        self.templates_path = templates_path
+        # template path => (mtime_ns, size, compiled template)
+        self.compiled: dict[str, tuple[int, int, Template]] = {}
+        # the template files under `templates_path`, see `scan`
+        self.paths: set[str] = set()
+        self.scan()
+
+    def scan(self):
+        'Lists the template files under `templates_path`, to call again once templates are added or removed'
+        self.paths = set()
+        dirs = [self.templates_path] if self.templates_path is not None and os.path.isdir(self.templates_path) else []
+        while dirs:
+            with os.scandir(dirs.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        dirs.append(entry.path)
+                    elif entry.name.endswith(".html"):
+                        self.paths.add(entry.path)
+
+    def load(self, path: str) -> Template:
+        'The compiled template at `path`, only read and compiled again when its file changed since it was last compiled'
+        stat = os.stat(path)
+        cached = self.compiled.get(path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        template = load_template(path)
+        self.compiled[path] = (stat.st_mtime_ns, stat.st_size, template)
+        return template
+
+    def select(self, page_path: str, meta: dict | None = None) -> str:
+        '''
+        The path of the template of a page, `page_path` being its path in the content dir (e.g. "blog/2024/post.md"):
+        the "template" of its front matter `meta` (a file of `templates_path`, with or without ".html"),
+        else the template named after its closest directory that has one ("blog/2024.html", then "blog.html"),
+        else the default template.
+        '''
+        name = meta.get("template") if meta else None
+        if name:
+            path = f"{self.templates_path}/{name if name.endswith('.html') else name + '.html'}"
+            if path not in self.paths:
+                raise ValueError(f"template {name} not found in {self.templates_path}")
+            return path
+        dirs = page_path.split("/")[:-1]
+        while dirs:
+            path = f"{self.templates_path}/{'/'.join(dirs)}.html"
+            if path in self.paths:
+                return path
+            dirs.pop()
+        return self.default_path
+
+    def is_template(self, path: str) -> bool:
+        'True for the default template and any file under `templates_path`, e.g. a change reported by the watcher'
+        return path == self.default_path or (self.templates_path is not None and path.startswith(f"{self.templates_path}/"))
+
+    def uses_slots(self, slots: Iterable[str]) -> bool:
+        'True when any of the templates has one of `slots`'
+        templates = [self.load(path) for path in [self.default_path, *sorted(self.paths)]]
+        return any(slot in template.slots for template in templates for slot in slots)
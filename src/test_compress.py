@@ -0,0 +1,73 @@
+import io
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from compress import compress_file, compress_outputs, compress_tree
+
+
+class TestCompress(unittest.TestCase):
+
+    def setUp(self):
+        self.public_path = tempfile.mkdtemp()
+        self.page_path = f"{self.public_path}/index.html"
+        self.write(self.page_path, b"<p>compressible</p>" * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.public_path)
+
+    def write(self, path: str, data: bytes):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def test_compress_file(self):
+        size, compressed_size = compress_file(self.page_path)
+        self.assertLess(compressed_size, size)
+        with gzip.open(f"{self.page_path}.gz", 'rb') as f:
+            self.assertEqual(f.read(), b"<p>compressible</p>" * 100)
+        self.assertEqual(os.stat(f"{self.page_path}.gz").st_mtime_ns, os.stat(self.page_path).st_mtime_ns)
+
+    def test_compress_file_incremental(self):
+        compress_file(self.page_path)
+        self.assertIsNone(compress_file(self.page_path))
+        self.write(self.page_path, b"<p>changed</p>" * 100)
+        os.utime(self.page_path, ns=(0, os.stat(self.page_path).st_mtime_ns + 1))
+        self.assertIsNotNone(compress_file(self.page_path))
+        with gzip.open(f"{self.page_path}.gz", 'rb') as f:
+            self.assertEqual(f.read(), b"<p>changed</p>" * 100)
+
+    def test_compress_file_skips(self):
+        # already compressed format
+        self.write(f"{self.public_path}/image.png", b"\0" * 1000)
+        self.assertIsNone(compress_file(f"{self.public_path}/image.png"))
+        # doesn't shrink
+        self.write(f"{self.public_path}/tiny.css", b"a")
+        self.assertIsNone(compress_file(f"{self.public_path}/tiny.css"))
+        self.assertEqual(sorted(os.listdir(self.public_path)), ["image.png", "index.html", "tiny.css"])
+
+    def test_compress_outputs_removed(self):
+        with redirect_stdout(io.StringIO()):
+            compress_outputs([self.page_path])
+            os.remove(self.page_path)
+            compress_outputs([self.page_path])
+        self.assertEqual(os.listdir(self.public_path), [])
+
+    def test_compress_tree(self):
+        os.makedirs(f"{self.public_path}/blog")
+        self.write(f"{self.public_path}/blog/post.html", b"<p>post</p>" * 100)
+        self.write(f"{self.public_path}/gone.html.gz", b"")
+        self.write(f"{self.public_path}/.build-changes.json", b"{}" * 100)
+        with redirect_stdout(io.StringIO()):
+            compress_tree(self.public_path, jobs=2)
+        self.assertEqual(
+            sorted(os.listdir(self.public_path)),
+            [".build-changes.json", "blog", "index.html", "index.html.gz"],
+        )
+        self.assertEqual(sorted(os.listdir(f"{self.public_path}/blog")), ["post.html", "post.html.gz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
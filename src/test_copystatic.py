@@ -0,0 +1,120 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from copystatic import (
+    copy_files_recursively,
+    copy_file,
+    copy_strategy_copy,
+    copy_strategy_changed,
+    copy_strategy_hardlink,
+    copy_strategy_reflink,
+)
+from manifest import BuildManifest
+
+
+class TestCopyStatic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.static_path = f"{self.tmp_dir}/static"
+        self.public_path = f"{self.tmp_dir}/public"
+        os.makedirs(f"{self.static_path}/images")
+        os.makedirs(self.public_path)
+        self.write(f"{self.static_path}/index.css", "body {}")
+        self.write(f"{self.static_path}/images/logo.svg", "<svg></svg>")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path: str, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    def test_copy_drops_gzip_sibling(self):
+        self.write(f"{self.public_path}/index.css", "old")
+        self.write(f"{self.public_path}/index.css.gz", "old compressed")
+        self.assertEqual(copy_file(f"{self.static_path}/index.css", f"{self.public_path}/index.css", copy_strategy_changed), "copied")
+        self.assertFalse(os.path.exists(f"{self.public_path}/index.css.gz"))
+        # an unchanged file keeps it
+        self.write(f"{self.public_path}/index.css.gz", "compressed")
+        self.assertEqual(copy_file(f"{self.static_path}/index.css", f"{self.public_path}/index.css", copy_strategy_changed), "skipped")
+        self.assertTrue(os.path.exists(f"{self.public_path}/index.css.gz"))
+
+    def copy(self, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return copy_files_recursively(self.static_path, self.public_path, **kwargs)
+
+    def test_copy(self):
+        report = self.copy()
+        self.assertEqual(self.read(f"{self.public_path}/index.css"), "body {}")
+        self.assertEqual(self.read(f"{self.public_path}/images/logo.svg"), "<svg></svg>")
+        self.assertEqual(report.totals["copied"], [2, 18])
+
+    def test_copy_parallel(self):
+        report = self.copy(jobs=4)
+        self.assertEqual(self.read(f"{self.public_path}/images/logo.svg"), "<svg></svg>")
+        self.assertEqual(report.totals["copied"], [2, 18])
+
+    def test_hardlink(self):
+        report = self.copy(strategy=copy_strategy_hardlink)
+        self.assertEqual(os.stat(f"{self.public_path}/index.css").st_ino, os.stat(f"{self.static_path}/index.css").st_ino)
+        self.assertEqual(report.totals["linked"], [2, 18])
+        # linking again replaces the existing link
+        self.assertEqual(copy_file(f"{self.static_path}/index.css", f"{self.public_path}/index.css", copy_strategy_hardlink), "linked")
+        self.assertNotIn("index.css.tmp-link", os.listdir(self.public_path))
+
+    def test_switch_from_hardlink(self):
+        # an incremental build after a hardlink build, with another strategy, must not write through the link
+        for strategy in (copy_strategy_copy, copy_strategy_reflink, copy_strategy_changed):
+            manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+            self.copy(manifest=manifest, strategy=copy_strategy_hardlink)
+            manifest.save()
+            with open(f"{self.static_path}/index.css", 'a') as f:
+                f.write("\np {}")
+            manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+            self.copy(manifest=manifest, strategy=strategy)
+            self.assertEqual(self.read(f"{self.static_path}/index.css"), self.read(f"{self.public_path}/index.css"))
+            self.assertTrue(self.read(f"{self.static_path}/index.css").startswith("body {}\np {}"), strategy)
+            self.assertNotEqual(os.stat(f"{self.public_path}/index.css").st_ino, os.stat(f"{self.static_path}/index.css").st_ino)
+            os.remove(f"{self.tmp_dir}/manifest.json")
+
+    def test_reflink(self):
+        self.copy(strategy=copy_strategy_reflink)
+        self.assertEqual(self.read(f"{self.public_path}/images/logo.svg"), "<svg></svg>")
+        self.assertNotEqual(os.stat(f"{self.public_path}/index.css").st_ino, os.stat(f"{self.static_path}/index.css").st_ino)
+
+    def test_changed(self):
+        self.copy(strategy=copy_strategy_changed)
+        report = self.copy(strategy=copy_strategy_changed)
+        self.assertEqual(report.totals["skipped"], [2, 18])
+        self.assertEqual(report.totals["copied"], [0, 0])
+        # same content but a new mtime: hashed and skipped
+        os.utime(f"{self.static_path}/index.css", ns=(0, 0))
+        self.assertEqual(self.copy(strategy=copy_strategy_changed).totals["skipped"], [2, 18])
+        # same size, new content
+        self.write(f"{self.static_path}/index.css", "p    {}")
+        report = self.copy(strategy=copy_strategy_changed)
+        self.assertEqual(report.totals["copied"], [1, 7])
+        self.assertEqual(self.read(f"{self.public_path}/index.css"), "p    {}")
+
+    def test_manifest_skips(self):
+        manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+        self.copy(manifest=manifest)
+        report = self.copy(manifest=manifest)
+        self.assertEqual(report.totals["skipped"], [2, 18])
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            self.copy(strategy="rsync")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from corpus import CorpusGenerator
+from markdown_blocks import markdown_to_html_node
+
+
+class TestCorpusGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def read_all(self, paths: list[str]) -> list[str]:
+        contents = []
+        for path in paths:
+            with open(path, 'r') as f:
+                contents.append(f.read())
+        return contents
+
+    def test_deterministic(self):
+        corpus = CorpusGenerator(pages=12, depth=2, blocks=10, seed=7)
+        first = self.read_all(corpus.write(os.path.join(self.tmp_dir, "first")))
+        second = self.read_all(corpus.write(os.path.join(self.tmp_dir, "second")))
+        self.assertEqual(first, second)
+
+    def test_layout(self):
+        corpus = CorpusGenerator(pages=25, depth=3)
+        paths = corpus.page_paths()
+        self.assertEqual(len(set(paths)), 25)
+        self.assertEqual(paths[13], "section3/section1/section0/page13.md")
+
+    def test_pages_convert(self):
+        corpus = CorpusGenerator(pages=5, blocks=30, inline_density=0.5)
+        for md in self.read_all(corpus.write(self.tmp_dir)):
+            self.assertTrue(markdown_to_html_node(md).to_html().startswith("<div><h1>Page "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import gencontent
+import frontmatter
+from frontmatter import parse_front_matter, read_front_matter, read_page_meta, split_front_matter
+from gencontent import generate_pages_recursive
+from manifest import BuildManifest
+from sitemodel import SiteModel
+
+
+class TestFrontMatter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_path = f"{self.tmp_dir}/content"
+        self.public_path = f"{self.tmp_dir}/public"
+        self.template_path = f"{self.tmp_dir}/template.html"
+        os.makedirs(self.content_path)
+        self.write(self.template_path, "<title>{{ Title }}</title>{{ Nav }}{{ Content }}")
+        self.write(f"{self.content_path}/index.md", "---\ntitle: The Shire\ndate: 2024-01-31\n# a comment, not a title\n---\nWelcome")
+        self.write(f"{self.content_path}/post.md", "---\ntitle: Second breakfast\ntags: [food, hobbits]\n---\n# Elevenses\n\nThe body")
+        self.write(f"{self.content_path}/secret.md", "---\ndraft: yes\n---\n# Secret")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path: str, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    def build(self, **kwargs) -> str:
+        log = io.StringIO()
+        with redirect_stdout(log):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, **kwargs)
+        return log.getvalue()
+
+    def test_parse(self):
+        meta = parse_front_matter([
+            "title: \"There: and back again\"",
+            "# a comment",
+            "",
+            "date: 2024-01-31",
+            "draft: No",
+            "tags:",
+            "  - hobbits",
+            "  - 'second breakfast'",
+            "template: blog",
+        ])
+        self.assertEqual(meta, {
+            "title": "There: and back again",
+            "date": "2024-01-31",
+            "draft": False,
+            "tags": ["hobbits", "second breakfast"],
+            "template": "blog",
+        })
+        self.assertEqual(parse_front_matter(["tags: food, hobbits"])["tags"], ["food", "hobbits"])
+        # only "draft" is a boolean
+        self.assertEqual(parse_front_matter(["title: yes"])["title"], "yes")
+
+    def test_parse_errors(self):
+        with self.assertRaises(ValueError):
+            parse_front_matter(["just some text"])
+        with self.assertRaises(ValueError):
+            parse_front_matter(["date: 31/01/2024"])
+        with self.assertRaises(ValueError):
+            parse_front_matter(["draft: maybe"])
+
+    def test_split(self):
+        meta, body = split_front_matter("---\ntitle: Home\n---\n# Home\n\ntext")
+        self.assertEqual(meta, {"title": "Home"})
+        self.assertEqual(body, "# Home\n\ntext")
+        self.assertEqual(split_front_matter("# Home\n\n---\n"), ({}, "# Home\n\n---\n"))
+        # not a delimiter line
+        self.assertEqual(split_front_matter("----\ntitle: Home\n---\n")[0], {})
+
+    def test_horizontal_rule_is_not_front_matter(self):
+        # never closed, or no "key: value" line: markdown opening with a horizontal rule
+        for markdown in ("---\n\n# Title\n\ntext", "---\n\n# Title\n\n---\n\ntext", "---\ntitle: Home\n"):
+            self.assertEqual(split_front_matter(markdown), ({}, markdown))
+            path = f"{self.content_path}/rule.md"
+            self.write(path, markdown)
+            self.assertEqual(read_page_meta(path), ({}, 0))
+            with open(path, 'rb') as f:
+                self.assertEqual(read_front_matter(f), {})
+                self.assertEqual(f.tell(), 0)
+        self.write(f"{self.content_path}/rule.md", "---\n\n# Title\n\n---\n\ntext")
+        self.build()
+        # the heading is kept and is the title
+        rule = self.read(f"{self.public_path}/rule.html")
+        self.assertTrue(rule.startswith("<title>Title</title>"))
+        self.assertIn("<h1>Title</h1>", rule)
+
+    def test_read_header_only(self):
+        src_path = f"{self.content_path}/post.md"
+        meta, body_start = read_page_meta(src_path)
+        self.assertEqual(meta, {"title": "Second breakfast", "tags": ["food", "hobbits"]})
+        with open(src_path, 'rb') as f:
+            self.assertEqual(read_front_matter(f), meta)
+            # the file is left at the start of the body
+            self.assertEqual(f.tell(), body_start)
+            self.assertEqual(f.read(), b"# Elevenses\n\nThe body")
+        self.assertEqual(read_page_meta(f"{self.tmp_dir}/template.html"), ({}, 0))
+
+    def test_read_long_header(self):
+        # the header spans several reads, "\r\n" line endings and all
+        tags = [f"tag{i}" for i in range(2000)]
+        with open(f"{self.content_path}/long.md", 'wb') as f:
+            f.write(("---\r\ntags:\r\n" + "".join(f"- {tag}\r\n" for tag in tags) + "---\r\n# Long").encode())
+        meta, body_start = read_page_meta(f"{self.content_path}/long.md")
+        self.assertGreater(body_start, frontmatter.header_read_size)
+        self.assertEqual(meta["tags"], tags)
+        with open(f"{self.content_path}/long.md", 'rb') as f:
+            self.assertEqual(f.read()[body_start:], b"# Long")
+        self.write(f"{self.content_path}/bad.md", "---\ntitle: Bad\nnot a key line\n---\n# Bad")
+        with self.assertRaisesRegex(ValueError, "bad.md"):
+            read_page_meta(f"{self.content_path}/bad.md")
+
+    def test_drafts_skipped(self):
+        site = SiteModel(self.content_path, self.public_path)
+        self.assertEqual(site.drafts, [f"{self.content_path}/secret.md"])
+        self.assertEqual(len(site.pages), 2)
+        self.build()
+        self.assertFalse(os.path.exists(f"{self.public_path}/secret.html"))
+        self.assertNotIn("secret", self.read(f"{self.public_path}/index.html"))
+        self.build(drafts=True)
+        secret = self.read(f"{self.public_path}/secret.html")
+        self.assertTrue(secret.startswith("<title>Secret</title>"))
+        self.assertIn("<a href=\"/secret.html\" aria-current=\"page\">Secret</a>", secret)
+
+    def test_draft_pruned(self):
+        manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+        self.build(manifest=manifest, drafts=True)
+        manifest.save()
+        manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+        self.build(manifest=manifest)
+        self.assertEqual(manifest.prune(self.public_path), [f"{self.public_path}/secret.html"])
+
+    def test_title_and_body(self):
+        self.build()
+        # the front matter title wins over the h1, and the front matter is never converted
+        self.assertEqual(
+            self.read(f"{self.public_path}/post.html"),
+            "<title>Second breakfast</title><nav><ul><li><a href=\"/post.html\" aria-current=\"page\">Second breakfast</a></li></ul></nav>"
+            "<div><h1>Elevenses</h1><p>The body</p></div>"
+        )
+        # a comment of the front matter is not a title
+        self.write(f"{self.content_path}/index.md", "---\ndate: 2024-01-31\n# a comment, not a title\n---\nWelcome")
+        self.assertEqual(gencontent.read_title(f"{self.content_path}/index.md", read_page_meta(f"{self.content_path}/index.md")[1]), "")
+        self.build()
+        self.assertTrue(self.read(f"{self.public_path}/index.html").startswith("<title></title>"))
+
+    def test_streamed(self):
+        self.write(f"{self.content_path}/crlf.md", "---\r\ntitle: Windows\r\n---\r\n# Heading\r\n\r\ntext")
+        self.build()
+        expected = {name: self.read(f"{self.public_path}/{name}") for name in ("index.html", "post.html", "crlf.html")}
+        threshold = gencontent.stream_threshold
+        gencontent.stream_threshold = 0
+        try:
+            self.build()
+        finally:
+            gencontent.stream_threshold = threshold
+        for name, html in expected.items():
+            self.assertEqual(self.read(f"{self.public_path}/{name}"), html)
+        self.assertIn("<title>Windows</title>", expected["crlf.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import gencontent
+from gencontent import (
+    generate_pages_recursive,
+    extract_title_lines,
+    extract_title_markdown,
+    extract_title_buffer,
+)
+from parsecache import ParseCache
+from profiling import BuildProfiler
+from sitemodel import SiteModel
+
+
+class TestGenerateContent(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_path = os.path.join(self.tmp_dir, "content")
+        self.public_path = os.path.join(self.tmp_dir, "public")
+        self.template_path = os.path.join(self.tmp_dir, "template.html")
+        os.makedirs(os.path.join(self.content_path, "nested"))
+        os.mkdir(self.public_path)
+        with open(self.template_path, 'w') as f:
+            f.write("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        for i in range(6):
+            self.write_content(f"page{i}.md", f"# Page {i}\n\nThis is **page** {i}")
+        self.write_content("nested/index.md", "# Nested\n\n- a\n- b")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_content(self, name: str, md: str):
+        with open(os.path.join(self.content_path, name), 'w') as f:
+            f.write(md)
+
+    def read_public(self, name: str) -> str:
+        with open(os.path.join(self.public_path, name), 'r') as f:
+            return f.read()
+
+
+# TEST site pages ----------------------------------------------------------------------
+
+    def test_site_pages(self):
+        pages = [(page.src_path, page.dst_path) for page in SiteModel(self.content_path, self.public_path).pages]
+        self.assertEqual(len(pages), 7)
+        self.assertIn(
+            (f"{self.content_path}/nested/index.md", f"{self.public_path}/nested/index.html"),
+            pages
+        )
+
+
+# TEST generate_pages_recursive ---------------------------------------------------------
+
+    def test_parallel_matches_serial(self):
+        serial_log = io.StringIO()
+        with redirect_stdout(serial_log):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path)
+        serial_output = {name: self.read_public(name) for name in ["page0.html", "page5.html", "nested/index.html"]}
+        shutil.rmtree(self.public_path)
+        parallel_log = io.StringIO()
+        with redirect_stdout(parallel_log):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, jobs=3)
+        parallel_output = {name: self.read_public(name) for name in serial_output}
+        self.assertEqual(serial_output, parallel_output)
+        # log lines come out in the same order as a serial build
+        self.assertEqual(serial_log.getvalue(), parallel_log.getvalue())
+
+    def test_parallel_reports_every_failure(self):
+        self.write_content("broken1.md", "an `unclosed code span")
+        self.write_content("broken2.md", "an **unclosed bold span")
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(ValueError) as cm:
+                generate_pages_recursive(self.content_path, self.template_path, self.public_path, jobs=3)
+        self.assertIn("broken1.md", str(cm.exception))
+        self.assertIn("broken2.md", str(cm.exception))
+        # the healthy pages were still written
+        self.assertIn("<h1>Page 3</h1>", self.read_public("page3.html"))
+
+    def test_profiled_matches_unprofiled(self):
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path)
+        expected = self.read_public("nested/index.html")
+        profiler = BuildProfiler()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, jobs=2, profiler=profiler)
+        self.assertEqual(self.read_public("nested/index.html"), expected)
+        # 3 stages for each of the 7 pages, merged back from the workers
+        self.assertEqual(len(profiler.events), 21)
+        self.assertEqual(profiler.block_totals["heading"][0], 7)
+
+    def test_profiled_keeps_cache_and_streaming(self):
+        cache = ParseCache()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, cache=cache)
+        # the profiled build times the same pipeline, pages come from the cache
+        profiler = BuildProfiler()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, profiler=profiler, cache=cache)
+        self.assertEqual(cache.hits["page"], 7)
+        self.assertEqual({event[0] for event in profiler.events}, {"read", "markdown_to_html_node", "write"})
+        threshold = gencontent.stream_threshold
+        gencontent.stream_threshold = 0
+        profiler = BuildProfiler()
+        try:
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content_path, self.template_path, self.public_path, profiler=profiler, cache=cache)
+        finally:
+            gencontent.stream_threshold = threshold
+        self.assertEqual([event[0] for event in profiler.events], ["streamed"] * 7)
+
+    def test_streamed_matches_unstreamed(self):
+        self.write_content("nested/index.md", "# Nested\n\n- a\n- b\n\n# Last title\n\nSome **bold** text\n")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path)
+        expected = self.read_public("nested/index.html")
+        threshold = gencontent.stream_threshold
+        gencontent.stream_threshold = 0
+        try:
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content_path, self.template_path, self.public_path)
+        finally:
+            gencontent.stream_threshold = threshold
+        self.assertEqual(self.read_public("nested/index.html"), expected)
+        self.assertNotIn("index.html.tmp", os.listdir(os.path.join(self.public_path, "nested")))
+
+    def test_streamed_fallbacks(self):
+        # "\r\n" line endings are streamed as text, empty files can't be memory mapped
+        self.write_content("crlf.md", "# Windows\r\n\r\nSome text")
+        self.write_content("empty.md", "")
+        threshold = gencontent.stream_threshold
+        gencontent.stream_threshold = 0
+        try:
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content_path, self.template_path, self.public_path)
+        finally:
+            gencontent.stream_threshold = threshold
+        self.assertEqual(self.read_public("crlf.html"), "<title>Windows</title><article><div><h1>Windows</h1><p>Some text</p></div></article>")
+        self.assertEqual(self.read_public("empty.html"), "<title></title><article><div></div></article>")
+
+    def test_streamed_error_leaves_no_page(self):
+        self.write_content("broken.md", "# Broken\n\nfine\n\nan `unclosed code span")
+        threshold = gencontent.stream_threshold
+        gencontent.stream_threshold = 0
+        try:
+            with redirect_stdout(io.StringIO()), self.assertRaises(ValueError):
+                gencontent.generate_page(
+                    os.path.join(self.content_path, "broken.md"), self.template_path, os.path.join(self.public_path, "broken.html")
+                )
+        finally:
+            gencontent.stream_threshold = threshold
+        self.assertEqual(os.listdir(self.public_path), [])
+
+
+# TEST extract_title --------------------------------------------------------------------
+
+    def test_extract_title(self):
+        def extract_title_split(markdown):
+            # the original implementation
+            title = ""
+            for line in markdown.split("\n"):
+                if line.startswith("# "):
+                    title = line[2:]
+            return title
+        markdowns = ["", "# ", "#", "# Only", "#No", "text\n# a\n# b", "# a\n## b\n", "x\n# last\n", "x\n# ", " # no", "# é\nü"]
+        for markdown in markdowns:
+            self.assertEqual(extract_title_markdown(markdown), extract_title_split(markdown), repr(markdown))
+            for window in (1, 2, 3, 1024):
+                self.assertEqual(extract_title_buffer(markdown.encode(), window), extract_title_split(markdown), repr(markdown))
+
+    def test_extract_title_lines(self):
+        markdown = "# First\ntext\n# Last\n## Sub"
+        self.assertEqual(extract_title_markdown(markdown), "Last")
+        self.assertEqual(extract_title_lines(io.StringIO(markdown)), "Last")
+        self.assertEqual(extract_title_lines(io.StringIO("# Only, no newline")), "Only, no newline")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,12 @@
+import io
 import unittest
 
+import htmlnode
 from htmlnode import (
     HTMLNode,
     LeafNode,
     ParentNode,
+    set_validation,
 )
 
 
@@ -93,6 +96,46 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(node.to_html(),  '<h3>Heading Three</h3>')
 
 
+# TEST write_html ----------------------------------------------------------------------
+
+    def test_write_html_chunks(self):
+        # every node emits its own tags instead of returning its whole subtree as one string
+        chunks = []
+        self.nested_parent_node_1.write_html(chunks.append)
+        self.assertEqual(chunks[0], "<span>")
+        self.assertEqual(chunks[-1], "</span>")
+        self.assertEqual("".join(chunks), self.nested_parent_node_1.to_html())
+
+    def test_write_html_stringio(self):
+        sink = io.StringIO()
+        self.nested_parent_node_2.write_html(sink.write)
+        self.assertEqual(sink.getvalue(), '<div><span><p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p></span></div>')
+
+    def test_write_html_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            self.base_node.to_html()
+
+
+# TEST validation -----------------------------------------------------------------------
+
+    def test_validation_debug_mode(self):
+        # type checks only run in debug mode
+        previous = htmlnode.validate_nodes
+        set_validation(True)
+        try:
+            with self.assertRaises(TypeError):
+                LeafNode("b", 42)  # pyright: ignore[reportArgumentType]
+            with self.assertRaises(TypeError):
+                ParentNode("div", children="not a list")  # pyright: ignore[reportArgumentType]
+        finally:
+            set_validation(previous)
+
+    def test_slots(self):
+        # nodes carry no per-instance __dict__
+        self.assertFalse(hasattr(self.leaf_node, "__dict__"))
+        self.assertFalse(hasattr(self.parent_node, "__dict__"))
+
+
 # TEST __repr__ -------------------------------------------------------------------------
 
     def test_repr(self):
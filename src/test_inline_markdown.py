@@ -5,6 +5,8 @@ from inline_markdown import (
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    split_text_to_textnodes,
+    scan_text_to_textnodes,
 )
 
 from textnode import (
@@ -180,6 +182,32 @@ def test_split_link_2():
     assert split_nodes_link([node]) == [TextNode("`print(Hello world!)`", text_type_code)]
 
 
+def test_split_link_dense():
+    """
+    `split_nodes_link` tested with 1500 links in 1 node (used to hit the recursion limit)
+    """
+    text = " ".join(f"[page {i}](/pages/{i})" for i in range(1500))
+    new_nodes = split_nodes_link([TextNode(text, text_type_text)])
+    assert len(new_nodes) == 2999
+    assert new_nodes[0] == TextNode("page 0", text_type_link, "/pages/0")
+    assert new_nodes[-1] == TextNode("page 1499", text_type_link, "/pages/1499")
+
+
+def test_split_img_skips_code():
+    """
+    `split_nodes_image` tested with an image inside a code node and an empty node
+    """
+    nodes = [
+        TextNode("", text_type_text),
+        TextNode("![image](url1)", text_type_code),
+        TextNode("after", text_type_text),
+    ]
+    assert split_nodes_image(nodes) == [
+        TextNode("![image](url1)", text_type_code),
+        TextNode("after", text_type_text),
+    ]
+
+
 def test_text_to_textnodes_1():
     """
     `text_to_textnodes` tested with multi-line input wuth multiple inline syntax per line
@@ -257,6 +285,47 @@ def test_text_to_textnodes_4():
         TextNode("[link](https://google.com)", text_type_code),
     ]
 
+def test_scan_matches_split():
+    """
+    `scan_text_to_textnodes` produces the same TextNodes as `split_text_to_textnodes`
+    """
+    texts = [
+        "plain text only",
+        "**bold** then *italic* then `code` then ![img](a.png) then [link](/b)",
+        "**bold** next to a [link](/a) and *italic* text",
+        "`*not italic*` and **bold** and **** empty bold",
+        "[first](/1)[second](/2)![third](3.png)",
+        "**a** **b** **c**",
+        "",
+    ]
+    for text in texts:
+        assert scan_text_to_textnodes(text) == split_text_to_textnodes(text)
+
+
+def test_scan_code_suppresses_markup():
+    """
+    `scan_text_to_textnodes` never looks for images inside code spans
+    """
+    text = "see `![image](url)` here"
+    assert scan_text_to_textnodes(text) == [
+        TextNode("see ", text_type_text),
+        TextNode("![image](url)", text_type_code),
+        TextNode(" here", text_type_text),
+    ]
+
+
+def test_scan_unclosed_delimiter():
+    """
+    `scan_text_to_textnodes` rejects a lone delimiter like `split_nodes_delimiter`
+    """
+    for text in ["an `unclosed code span", "an **unclosed bold", "an *unclosed italic"]:
+        try:
+            scan_text_to_textnodes(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"no error raised for {text!r}")
+
+
 # NOTE: test case condition
 # Allow for image links (image nested within a link)
 
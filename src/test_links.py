@@ -0,0 +1,89 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from gencontent import generate_pages_recursive
+from links import LinkIndex, resolve_target
+from parsecache import ParseCache
+
+
+class TestLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_path = f"{self.tmp_dir}/content"
+        self.public_path = f"{self.tmp_dir}/public"
+        self.template_path = f"{self.tmp_dir}/template.html"
+        os.makedirs(f"{self.content_path}/blog")
+        self.write(self.template_path, "{{ Content }}")
+        self.write(f"{self.content_path}/index.md", "# Home\n\nRead the [post](/blog/post.html) or the [blog](/blog)")
+        self.write(f"{self.content_path}/blog/index.md", "# Blog\n\n- [first post](post.html#top)\n- [missing](/blog/missing.html)")
+        self.write(f"{self.content_path}/blog/post.md", "# Post\n\n![logo](../images/logo.png) and [elsewhere](https://boot.dev)")
+        self.write(f"{self.content_path}/lonely.md", "# Nobody links here\n\n[home](/)")
+        self.outputs = {
+            f"{self.public_path}/index.html",
+            f"{self.public_path}/blog/index.html",
+            f"{self.public_path}/blog/post.html",
+            f"{self.public_path}/lonely.html",
+            f"{self.public_path}/images/logo.png",
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path: str, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self, **kwargs) -> LinkIndex:
+        links = LinkIndex()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, links=links, **kwargs)
+        return links
+
+    def test_collected(self):
+        links = self.build()
+        self.assertEqual(links.pages[f"{self.public_path}/blog/index.html"], ["post.html#top", "/blog/missing.html"])
+        self.assertEqual(links.pages[f"{self.public_path}/blog/post.html"], ["../images/logo.png", "https://boot.dev"])
+
+    def test_check(self):
+        broken, orphans = self.build().check(self.public_path, self.outputs)
+        self.assertEqual(broken, [(f"{self.public_path}/blog/index.html", "/blog/missing.html")])
+        self.assertEqual(orphans, [f"{self.public_path}/lonely.html"])
+
+    def test_parallel_and_cached_same_links(self):
+        serial = self.build().pages
+        self.assertEqual(self.build(jobs=2).pages, serial)
+        cache = ParseCache()
+        self.assertEqual(self.build(cache=cache).pages, serial)
+        # second time around every page comes from the cache
+        self.assertEqual(self.build(cache=cache).pages, serial)
+        self.assertEqual(cache.hits["page"], 4)
+
+    def test_removed_pages_dropped(self):
+        links = self.build()
+        self.outputs.discard(f"{self.public_path}/lonely.html")
+        links.check(self.public_path, self.outputs)
+        self.assertNotIn(f"{self.public_path}/lonely.html", links.pages)
+
+    def test_persisted(self):
+        links = self.build()
+        links.path = f"{self.tmp_dir}/links.json"
+        links.save()
+        self.assertEqual(LinkIndex(links.path).pages, links.pages)
+
+    def test_resolve_target(self):
+        known = {"public/index.html": "./public/index.html", "public/blog/index.html": "./public/blog/index.html"}
+        page = "./public/blog/index.html"
+        self.assertEqual(resolve_target("./public", page, "/", known), "./public/index.html")
+        self.assertEqual(resolve_target("./public", page, "..?page=2", known), "./public/index.html")
+        self.assertEqual(resolve_target("./public", page, "#section", known), page)
+        self.assertEqual(resolve_target("./public", page, "mailto:me@example.com", known), page)
+        self.assertIsNone(resolve_target("./public", page, "/blog/post.html", known))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from livereload import notify_build, clear_build_changes, build_changes_file
+
+
+class TestLiveReload(unittest.TestCase):
+
+    def setUp(self):
+        self.public_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.public_path)
+
+    def read_changes(self) -> dict:
+        with open(os.path.join(self.public_path, build_changes_file), 'r') as f:
+            return json.load(f)
+
+    def test_notify_build_urls(self):
+        notify_build(self.public_path, [f"{self.public_path}/index.html", f"{self.public_path}/blog/post.html"])
+        self.assertEqual(self.read_changes()["changed"], ["/index.html", "/blog/post.html"])
+        self.assertFalse(self.read_changes()["full"])
+
+    def test_notify_build_full(self):
+        notify_build(self.public_path, [], full=True)
+        self.assertEqual(self.read_changes()["changed"], [])
+        self.assertTrue(self.read_changes()["full"])
+
+    def test_notify_build_new_build_id(self):
+        notify_build(self.public_path, [f"{self.public_path}/index.css"])
+        first = self.read_changes()["build"]
+        notify_build(self.public_path, [f"{self.public_path}/index.css"])
+        self.assertNotEqual(self.read_changes()["build"], first)
+        # no temporary file left behind
+        self.assertEqual(os.listdir(self.public_path), [build_changes_file])
+
+    def test_clear_build_changes(self):
+        notify_build(self.public_path, [], full=True)
+        clear_build_changes(self.public_path)
+        self.assertEqual(os.listdir(self.public_path), [])
+        # nothing to remove
+        clear_build_changes(self.public_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.tmp_dir, "manifest.json")
+        self.src_path = os.path.join(self.tmp_dir, "page.md")
+        self.dst_path = os.path.join(self.tmp_dir, "public", "nested", "page.html")
+        with open(self.src_path, 'w') as f:
+            f.write("# Page")
+        os.makedirs(os.path.dirname(self.dst_path))
+        with open(self.dst_path, 'w') as f:
+            f.write("<h1>Page</h1>")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+
+# TEST is_current -----------------------------------------------------------------------
+
+    def test_unknown_source_is_not_current(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.is_current(self.src_path, self.dst_path, "template"))
+
+    def test_recorded_source_is_current_after_reload(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        manifest.save()
+        reloaded = BuildManifest(self.manifest_path)
+        self.assertTrue(reloaded.is_current(self.src_path, self.dst_path, "template"))
+
+    def test_changed_template_is_not_current(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        self.assertFalse(manifest.is_current(self.src_path, self.dst_path, "other template"))
+
+    def test_changed_content_is_not_current(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        manifest.save()
+        with open(self.src_path, 'w') as f:
+            f.write("# Edited page")
+        reloaded = BuildManifest(self.manifest_path)
+        self.assertFalse(reloaded.is_current(self.src_path, self.dst_path, "template"))
+
+    def test_missing_output_is_not_current(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        os.remove(self.dst_path)
+        self.assertFalse(manifest.is_current(self.src_path, self.dst_path, "template"))
+
+
+    def test_unhashed_source_is_current_until_changed(self):
+        # a full build records sources without hashing them
+        manifest = BuildManifest(self.manifest_path, hash_content=False)
+        manifest.record(self.src_path, self.dst_path, "template")
+        manifest.save()
+        self.assertIsNone(manifest.entries[self.src_path]["hash"])
+        reloaded = BuildManifest(self.manifest_path)
+        self.assertTrue(reloaded.is_current(self.src_path, self.dst_path, "template"))
+        with open(self.src_path, 'w') as f:
+            f.write("# Changed page")
+        reloaded = BuildManifest(self.manifest_path)
+        self.assertFalse(reloaded.is_current(self.src_path, self.dst_path, "template"))
+        reloaded.record(self.src_path, self.dst_path, "template")
+        self.assertIsNotNone(reloaded.entries[self.src_path]["hash"])
+
+
+# TEST save -----------------------------------------------------------------------------
+
+    def test_save_skipped_when_unchanged(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        manifest.save()
+        os.utime(self.manifest_path, ns=(0, 0))
+        reloaded = BuildManifest(self.manifest_path)
+        self.assertTrue(reloaded.is_current(self.src_path, self.dst_path, "template"))
+        reloaded.record(self.src_path, self.dst_path, "template")
+        reloaded.save()
+        self.assertEqual(os.stat(self.manifest_path).st_mtime_ns, 0)
+        reloaded.record(self.src_path, self.dst_path, "other template")
+        reloaded.save()
+        self.assertNotEqual(os.stat(self.manifest_path).st_mtime_ns, 0)
+        self.assertFalse(os.path.exists(self.manifest_path + ".tmp"))
+
+    def test_unreadable_manifest_starts_empty(self):
+        # e.g. a save interrupted by an older version
+        with open(self.manifest_path, 'w') as f:
+            f.write('{"truncated": {"out')
+        manifest = BuildManifest(self.manifest_path)
+        self.assertEqual(manifest.entries, {})
+        self.assertFalse(manifest.is_current(self.src_path, self.dst_path, "template"))
+        manifest.save()
+        self.assertEqual(BuildManifest(self.manifest_path).entries, {})
+
+
+# TEST prune ----------------------------------------------------------------------------
+
+    def test_prune_removes_vanished_outputs(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        manifest.save()
+        # the next build never sees the source again
+        reloaded = BuildManifest(self.manifest_path)
+        removed = reloaded.prune(os.path.join(self.tmp_dir, "public"))
+        self.assertEqual(removed, [self.dst_path])
+        self.assertFalse(os.path.exists(os.path.dirname(self.dst_path)))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, "public")))
+        self.assertEqual(reloaded.entries, {})
+
+    def test_prune_removes_gzip_sibling(self):
+        with open(self.dst_path + ".gz", 'wb') as f:
+            f.write(b"stale")
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        self.assertEqual(manifest.remove(self.src_path, os.path.join(self.tmp_dir, "public")), self.dst_path)
+        self.assertFalse(os.path.exists(self.dst_path + ".gz"))
+        self.assertFalse(os.path.exists(os.path.dirname(self.dst_path)))
+
+    def test_prune_keeps_seen_outputs(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src_path, self.dst_path, "template")
+        self.assertEqual(manifest.prune(os.path.join(self.tmp_dir, "public")), [])
+        self.assertTrue(os.path.exists(self.dst_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,16 @@
+import io
 import unittest
 from markdown_blocks import (
     markdown_to_blocks,
+    iter_markdown_blocks,
+    iter_buffer_blocks,
     block_to_block_type,
+    classify_block,
+    collect_links,
+    collect_text,
+    block_to_html_node,
     markdown_to_html_node,
+    markdown_stream_to_html_node,
 
     block_type_paragraph,
     block_type_heading,
@@ -124,6 +132,47 @@ over the lazy dog'''
             block = "paragraph"
             self.assertEqual(block_to_block_type(block), block_type_paragraph)
 
+    def test_classify_block_prefix(self):
+        self.assertEqual(classify_block("### heading"), (block_type_heading, 3))
+        self.assertEqual(classify_block("\n# heading\n"), (block_type_heading, 1))
+        self.assertEqual(classify_block("```\ncode\n```"), (block_type_code, 3))
+        self.assertEqual(classify_block("> quote"), (block_type_quote, 2))
+        self.assertEqual(classify_block("- list\n- items"), (block_type_ul, 2))
+        self.assertEqual(classify_block("1) list\n2) items"), (block_type_ol, 3))
+        # same first character, not the block type it would start
+        self.assertEqual(classify_block("####### seven"), (block_type_paragraph, 0))
+        self.assertEqual(classify_block("#hashtag"), (block_type_paragraph, 0))
+        self.assertEqual(classify_block("```\nunclosed"), (block_type_paragraph, 0))
+        self.assertEqual(classify_block("-1 below zero"), (block_type_paragraph, 0))
+        self.assertEqual(classify_block("1984 was a year"), (block_type_paragraph, 0))
+        # other unicode decimal digits start an ordered list too
+        self.assertEqual(classify_block("\u0661. arabic-indic one"), (block_type_ol, 3))
+
+    def test_classify_block_short(self):
+        self.assertEqual(classify_block(""), (block_type_paragraph, 0))
+        self.assertEqual(classify_block("1"), (block_type_paragraph, 0))
+        self.assertEqual(classify_block("-"), (block_type_paragraph, 0))
+
+    def test_collect_links(self):
+        markdown = "A [link](/a.html)\n\n- ![image](/b.png)\n- `[not a link](/c.html)` [last](https://boot.dev)"
+        with collect_links() as targets:
+            markdown_to_html_node(markdown)
+        self.assertEqual(targets, ["/a.html", "/b.png", "https://boot.dev"])
+        # not collecting outside the block
+        markdown_to_html_node(markdown)
+        self.assertEqual(len(targets), 3)
+
+    def test_collect_text(self):
+        texts = []
+        with collect_text(texts.append):
+            markdown_to_html_node("# A **bold** move\n\n![alt text](/a.png)")
+        self.assertEqual(texts, ["A ", "bold", " move", "alt text"])
+
+    def test_block_to_html_node_prefix(self):
+        self.assertEqual(block_to_html_node("#### deep").to_html(), "<h4>deep</h4>")
+        self.assertEqual(block_to_html_node("1. one\n2. two").to_html(), "<ol><li>one</li><li>two</li></ol>")
+        self.assertEqual(block_to_html_node("* one\n* two").to_html(), "<ul><li>one</li><li>two</li></ul>")
+
 
 # FINAL PRODUCT ----------------------------------------------------------------------------------------------
 
@@ -170,6 +219,47 @@ and this should be on the same `line`
         )
 
 
+    def test_markdown_stream_to_html(self):
+        markdown = "# Title\n\nThis is **bolded** paragraph\n\n- item 1\n- item 2\n\n> quote"
+        self.assertEqual(
+            markdown_stream_to_html_node(io.StringIO(markdown)).to_html(),
+            markdown_to_html_node(markdown).to_html()
+        )
+
+
+# STREAMING ----------------------------------------------------------------------------------------------
+
+
+    def test_iter_markdown_blocks_matches(self):
+        markdowns = [
+            "",
+            "\n",
+            "\n\n",
+            "\n\n\n",
+            "a\n\n\nb",
+            "a\n\n\n\nb\n\n",
+            "   \n\n# Title\n\n  para  \nline\n\n\n\n\n- a\n- b\n",
+            "```\ncode\n```\n\n> quote\n\n1. one\n2. two",
+        ]
+        for markdown in markdowns:
+            for chunk_size in (1, 2, 3, 5, 64):
+                self.assertListEqual(
+                    list(iter_markdown_blocks(io.StringIO(markdown), chunk_size)),
+                    markdown_to_blocks(markdown),
+                    f"{markdown!r} in chunks of {chunk_size}"
+                )
+            self.assertListEqual(list(iter_buffer_blocks(markdown.encode())), markdown_to_blocks(markdown), repr(markdown))
+
+    def test_iter_buffer_blocks_utf8(self):
+        markdown = "# Ünïcödé\n\n日本語の段落\n\n- ✓ done"
+        self.assertListEqual(list(iter_buffer_blocks(markdown.encode())), markdown_to_blocks(markdown))
+
+    def test_iter_markdown_blocks_lazy(self):
+        stream = io.StringIO("first\n\n" + "x" * 1000)
+        blocks = iter_markdown_blocks(stream, chunk_size=10)
+        self.assertEqual(next(blocks), "first")
+        # the first block was yielded before the rest of the file was read
+        self.assertLess(stream.tell(), 20)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from gencontent import generate_pages_recursive
+from markdown_blocks import collect_text, markdown_to_html_node
+from parsecache import ParseCache
+
+markdown = '''# Heading
+
+This is **bolded** paragraph with a [link](https://boot.dev)
+
+- item 1
+- item 2
+
+```
+print("Hello world!")
+```
+
+> This is a quote'''
+
+
+class TestParseCache(unittest.TestCase):
+
+    def test_content_html_matches(self):
+        cache = ParseCache()
+        self.assertEqual(cache.content_html(markdown), markdown_to_html_node(markdown).to_html())
+        # second time around, from the page entry
+        self.assertEqual(cache.content_html(markdown), markdown_to_html_node(markdown).to_html())
+        self.assertEqual(cache.hits, {"page": 1, "block": 0})
+        self.assertEqual(cache.misses, {"page": 1, "block": 5})
+
+    def test_shared_blocks(self):
+        cache = ParseCache()
+        cache.content_html(markdown)
+        other = "# Other heading\n\n" + markdown.split("\n\n", 1)[1]
+        self.assertEqual(cache.content_html(other), markdown_to_html_node(other).to_html())
+        self.assertEqual(cache.hits["block"], 4)
+        self.assertEqual(cache.misses["block"], 6)
+
+    def test_links_kept(self):
+        cache = ParseCache()
+        page = "# [Home](/)\n\nA [link](/a.html) and ![image](/b.png)\n\nno links"
+        links: list[str] = []
+        cache.content_html(page, links)
+        self.assertEqual(links, ["/", "/a.html", "/b.png"])
+        # from the page entry
+        links = []
+        self.assertEqual(cache.content_html(page, links), markdown_to_html_node(page).to_html())
+        self.assertEqual(links, ["/", "/a.html", "/b.png"])
+        # from the block entries
+        links = []
+        cache.content_html("# [Home](/)\n\nno links", links)
+        self.assertEqual(links, ["/"])
+
+    def test_text_kept(self):
+        cache = ParseCache()
+        page = "# Home\n\nA [link](/a.html) and ![image](/b.png)"
+        converted: list[str] = []
+        with collect_text(converted.append):
+            html = cache.content_html(page)
+        # one call per block converted, the text of its TextNodes
+        self.assertEqual(converted, ["Home", "A \nlink\n and \nimage"])
+        for _ in range(2):
+            texts: list[str] = []
+            with collect_text(texts.append):
+                self.assertEqual(cache.content_html(page), html)
+            self.assertEqual(texts, ["Home\nA \nlink\n and \nimage"])
+        self.assertEqual(cache.hits["page"], 2)
+        # without a handler, nothing is collected and the entry is still used
+        self.assertEqual(cache.content_html(page), html)
+        self.assertEqual(cache.hits["page"], 3)
+
+    def test_size_bound(self):
+        cache = ParseCache(max_bytes=300)
+        for i in range(20):
+            cache.content_html(f"paragraph number {i}")
+        self.assertLessEqual(cache.size, 300)
+        self.assertEqual(cache.size, sum(len(key) + len(html) for key, html in cache.entries.items()))
+        # the oldest pages were evicted, the latest one is still there
+        self.assertEqual(cache.content_html("paragraph number 19"), "<div><p>paragraph number 19</p></div>")
+        self.assertEqual(cache.hits["page"], 1)
+
+    def test_persisted(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            cache = ParseCache(path=f"{tmp_dir}/cache.json")
+            cache.content_html(markdown)
+            cache.save()
+            loaded = ParseCache(path=f"{tmp_dir}/cache.json")
+            self.assertEqual(loaded.entries, cache.entries)
+            loaded.content_html(markdown)
+            self.assertEqual(loaded.hits["page"], 1)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_take_changes_and_merge(self):
+        worker = ParseCache(track_added=True)
+        worker.content_html("just a paragraph")
+        added, hits, misses = worker.take_changes()
+        self.assertEqual(len(added), 2)
+        self.assertEqual(worker.take_changes(), ([], {"page": 0, "block": 0}, {"page": 0, "block": 0}))
+        cache = ParseCache()
+        cache.merge(added, hits, misses)
+        self.assertEqual(cache.misses, {"page": 1, "block": 1})
+        self.assertEqual(cache.content_html("just a paragraph"), "<div><p>just a paragraph</p></div>")
+
+    def test_parallel_build(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            os.makedirs(f"{tmp_dir}/content")
+            with open(f"{tmp_dir}/template.html", 'w') as f:
+                f.write("{{ Content }}")
+            for i in range(4):
+                with open(f"{tmp_dir}/content/page{i}.md", 'w') as f:
+                    f.write(f"# Page {i}\n\nThe same disclaimer on every page")
+            cache = ParseCache()
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(f"{tmp_dir}/content", f"{tmp_dir}/template.html", f"{tmp_dir}/public", jobs=2, cache=cache)
+            self.assertEqual(cache.misses["page"], 4)
+            self.assertEqual(cache.misses["block"] + cache.hits["block"], 8)
+            # the entries converted by the workers made it back
+            self.assertEqual(len(cache.entries), 4 + 4 + 1)
+            with open(f"{tmp_dir}/public/page2.html", 'r') as f:
+                self.assertEqual(f.read(), "<div><h1>Page 2</h1><p>The same disclaimer on every page</p></div>")
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from profiling import BuildProfiler
+
+
+class TestBuildProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = BuildProfiler()
+        with self.profiler.stage("read", "a.md"):
+            pass
+        with self.profiler.stage("read", "b.md"):
+            pass
+        with self.profiler.stage("static_copy"):
+            pass
+        self.profiler.add_block("paragraph", 0.5)
+        self.profiler.add_block("paragraph", 0.25)
+
+
+# TEST stage / add_block ----------------------------------------------------------------
+
+    def test_events(self):
+        self.assertEqual([event[:2] for event in self.profiler.events], [("read", "a.md"), ("read", "b.md"), ("static_copy", None)])
+        self.assertEqual(self.profiler.block_totals, {"paragraph": [2, 0.75]})
+
+    def test_stage_records_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.profiler.stage("write", "c.md"):
+                raise ValueError("boom")
+        self.assertEqual(self.profiler.events[-1][:2], ("write", "c.md"))
+
+
+# TEST merge ----------------------------------------------------------------------------
+
+    def test_merge(self):
+        worker = BuildProfiler()
+        with worker.stage("read", "c.md"):
+            pass
+        worker.add_block("paragraph", 0.25)
+        worker.add_block("code", 1.0)
+        self.profiler.merge(worker.events, worker.block_totals)
+        self.assertEqual(len(self.profiler.events), 4)
+        self.assertEqual(self.profiler.block_totals, {"paragraph": [3, 1.0], "code": [1, 1.0]})
+
+
+# TEST reports --------------------------------------------------------------------------
+
+    def test_summary(self):
+        summary = self.profiler.summary(top=1)
+        self.assertIn("static_copy", summary)
+        self.assertIn("paragraph", summary)
+        self.assertIn("slowest 1 pages:", summary)
+
+    def test_chrome_trace(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            trace_path = os.path.join(tmp_dir, "trace.json")
+            self.profiler.write_chrome_trace(trace_path)
+            with open(trace_path, 'r') as f:
+                trace = json.load(f)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(len(trace["traceEvents"]), 3)
+        self.assertEqual(trace["traceEvents"][0]["name"], "read a.md")
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+
+
+if __name__ == "__main__":
+    unittest.main()
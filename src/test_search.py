@@ -0,0 +1,163 @@
+import io
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from collections import Counter
+from contextlib import redirect_stdout
+
+from gencontent import generate_pages_recursive
+from parsecache import ParseCache
+import search as search_module
+from search import SearchIndex, count_terms, title_weight
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_path = f"{self.tmp_dir}/content"
+        self.public_path = f"{self.tmp_dir}/public"
+        self.template_path = f"{self.tmp_dir}/template.html"
+        self.state_path = f"{self.tmp_dir}/search-state.json"
+        os.makedirs(f"{self.content_path}/blog")
+        self.write(self.template_path, "{{ Content }}")
+        self.write(f"{self.content_path}/index.md", "# Home\n\nWelcome to the **shire**, read the [blog](/blog)")
+        self.write(f"{self.content_path}/blog/index.md", "# Shire news\n\n- hobbits\n- `second breakfast`\n\n![a hobbit hole](/hole.png)")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path: str, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self, **kwargs) -> SearchIndex:
+        search = SearchIndex(self.public_path, self.state_path)
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, search=search, **kwargs)
+        search.save()
+        return search
+
+    def shard(self, prefix: str) -> dict:
+        # a missing shard has no terms, like a 404 for the browser
+        if not os.path.exists(f"{self.public_path}/search/shards/{prefix}.json"):
+            return {}
+        with open(f"{self.public_path}/search/shards/{prefix}.json", 'r') as f:
+            return json.load(f)
+
+    def docs(self) -> list:
+        'Every doc file, in id order'
+        with open(f"{self.public_path}/search/index.json", 'r') as f:
+            size = json.load(f)["docs_per_file"]
+        docs = []
+        for part in range(len(os.listdir(f"{self.public_path}/search/docs"))):
+            with open(f"{self.public_path}/search/docs/{part}.json", 'r') as f:
+                part_docs = json.load(f)
+            self.assertLessEqual(len(part_docs), size)
+            docs.extend(part_docs)
+        return docs
+
+    def lookup(self, term: str) -> list[tuple[str, int]]:
+        'The (url, weight) of the pages with `term`'
+        docs = self.docs()
+        return [(docs[page_id][0], weight) for page_id, weight in self.shard(term[:2]).get(term, [])]
+
+    def test_count_terms(self):
+        terms = Counter()
+        count_terms(terms, "The Hobbit, or There and Back Again: the hobbit a")
+        self.assertEqual(terms["hobbit"], 2)
+        self.assertEqual(terms["the"], 2)
+        self.assertNotIn("a", terms)
+
+    def test_index(self):
+        self.build()
+        # the title (also the h1 of the body) counts more than the body, best first
+        self.assertEqual(self.lookup("shire"), [("/blog/", title_weight + 1), ("/", 1)])
+        # link text, code and image alt text are all text
+        self.assertEqual(self.lookup("blog"), [("/", 1)])
+        self.assertEqual(self.lookup("breakfast"), [("/blog/", 1)])
+        self.assertEqual(self.lookup("hole"), [("/blog/", 1)])
+        self.assertIn(["/blog/", "Shire news"], self.docs())
+
+    def test_parallel_and_cached_same_index(self):
+        self.build()
+        serial = {prefix: self.shard(prefix[:-5]) for prefix in os.listdir(f"{self.public_path}/search/shards")}
+        for kwargs in ({"jobs": 2}, {"cache": ParseCache()}):
+            shutil.rmtree(self.public_path)
+            os.remove(self.state_path)
+            self.build(**kwargs)
+            self.assertEqual({prefix: self.shard(prefix[:-5]) for prefix in os.listdir(f"{self.public_path}/search/shards")}, serial)
+
+    def test_cached_pages_keep_text(self):
+        self.build()
+        serial = {prefix: self.shard(prefix[:-5]) for prefix in os.listdir(f"{self.public_path}/search/shards")}
+        cache = ParseCache()
+        # filled without --search, its entries have no text and are converted again
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, cache=cache)
+        for hits in (0, 2):
+            shutil.rmtree(self.public_path)
+            os.remove(self.state_path)
+            cache.take_changes()
+            self.build(cache=cache)
+            self.assertEqual(cache.hits["page"], hits)
+            self.assertEqual({prefix: self.shard(prefix[:-5]) for prefix in os.listdir(f"{self.public_path}/search/shards")}, serial)
+
+    def test_incremental(self):
+        self.build()
+        os.utime(f"{self.public_path}/search/shards/ne.json", ns=(0, 0))
+        search = SearchIndex(self.public_path, self.state_path)
+        # the home page again, with new text
+        search.add_page(f"{self.public_path}/index.html", "Home", {"welcome": 1, "to": 1, "bree": 1})
+        # only the shards of its old and new terms are rewritten
+        self.assertEqual(search.dirty, {"ho", "we", "to", "th", "sh", "re", "bl", "br"})
+        search.save()
+        self.assertEqual(os.stat(f"{self.public_path}/search/shards/ne.json").st_mtime_ns, 0)
+        self.assertEqual(self.lookup("bree"), [("/", 1)])
+        self.assertEqual(self.lookup("shire"), [("/blog/", title_weight + 1)])
+        self.assertFalse(os.path.exists(f"{self.public_path}/search/shards/bl.json"))
+        # pages no longer built leave the index
+        search.retain({f"{self.public_path}/index.html"})
+        search.save()
+        self.assertEqual(self.lookup("shire"), [])
+        self.assertEqual(self.docs().count(None), 2)
+
+    def test_doc_files(self):
+        with mock.patch.object(search_module, "docs_per_file", 2):
+            search = SearchIndex(self.public_path, self.state_path)
+            for name in "abcde":
+                search.add_page(f"{self.public_path}/{name}.html", name.upper(), {"hobbit": 1})
+            search.save()
+            self.assertEqual(sorted(os.listdir(f"{self.public_path}/search/docs")), ["0.json", "1.json", "2.json"])
+            self.assertEqual(self.docs(), [[f"/{name}.html", name.upper()] for name in "abcde"])
+            for part in range(3):
+                os.utime(f"{self.public_path}/search/docs/{part}.json", ns=(0, 0))
+            # only the files holding the old and new ids of the changed page are written again
+            search = SearchIndex(self.public_path, self.state_path)
+            search.add_page(f"{self.public_path}/c.html", "Gamma", {"ring": 1})
+            search.save()
+            self.assertEqual(
+                [os.stat(f"{self.public_path}/search/docs/{part}.json").st_mtime_ns != 0 for part in range(3)], [False, True, True]
+            )
+            self.assertEqual(self.docs()[2:], [None, ["/d.html", "D"], ["/e.html", "E"], ["/c.html", "Gamma"]])
+            self.assertEqual(self.lookup("ring"), [("/c.html", 1)])
+
+    def test_spill(self):
+        search = SearchIndex(self.public_path, max_postings=2)
+        search.add_page(f"{self.public_path}/a.html", "Alpha", {"hobbit": 2, "ring": 1})
+        search.add_page(f"{self.public_path}/b.html", "Beta", {"hobbit": 1})
+        self.assertIsNotNone(search.spill_path)
+        search.add_page(f"{self.public_path}/c.html", "Gamma", {"hobbit": 3})
+        # added then removed before the save, its spilled postings are dropped
+        search.remove_page(f"{self.public_path}/b.html")
+        spill_path = search.spill_path
+        search.save()
+        self.assertFalse(os.path.exists(spill_path))
+        self.assertEqual(self.lookup("hobbit"), [("/c.html", 3), ("/a.html", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
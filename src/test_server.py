@@ -0,0 +1,287 @@
+import os
+import sys
+import time
+import gzip
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+import http.client
+
+from livereload import notify_build
+
+# server.py lives at the root of the repository, next to src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server import CachedFile, CORSHTTPRequestHandler, FileCache, LiveReloadHub, PooledHTTPServer, parse_range  # noqa: E402
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.public_path = tempfile.mkdtemp()
+        self.write("index.html", "<html><body><h1>Home</h1></body></html>")
+        self.servers: list[PooledHTTPServer] = []
+        self.sockets: list[socket.socket] = []
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(self.public_path)
+
+    def write(self, name: str, text: str):
+        with open(os.path.join(self.public_path, name), 'w') as f:
+            f.write(text)
+
+    def serve(self, workers: int = 4, max_connections: int = 128, **handler_settings) -> int:
+        'Starts a server of the public dir on a free port, with the given handler class attributes, and returns the port'
+        public_path = self.public_path
+
+        class Handler(CORSHTTPRequestHandler):
+            quiet = True
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=public_path, **kwargs)
+
+        for name, value in handler_settings.items():
+            setattr(Handler, name, value)
+        server = PooledHTTPServer(("localhost", 0), Handler, workers=workers, max_connections=max_connections)
+        self.servers.append(server)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server.server_address[1]
+
+    def get(self, port: int, url: str, headers: dict | None = None) -> tuple[int, dict, bytes]:
+        conn = http.client.HTTPConnection("localhost", port, timeout=5)
+        try:
+            conn.request("GET", url, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    def open_stream(self, port: int) -> socket.socket:
+        'Opens a live reload stream and returns its socket once the headers are read'
+        sock = socket.create_connection(("localhost", port), timeout=5)
+        self.sockets.append(sock)
+        sock.sendall(b"GET /__livereload HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        head = b""
+        while b"\r\n\r\n" not in head:
+            head += sock.recv(4096)
+        self.assertIn(b"text/event-stream", head)
+        return sock
+
+
+# TEST server -------------------------------------------------------------------------
+
+    def test_keep_alive_connection_is_parked(self):
+        port = self.serve(workers=1, timeout=0.2)
+        conn = http.client.HTTPConnection("localhost", port, timeout=5)
+        try:
+            conn.request("GET", "/index.html")
+            conn.getresponse().read()
+            sock = conn.sock
+            # the idle connection holds no worker, the only one serves another client
+            self.assertEqual(self.get(port, "/index.html")[0], 200)
+            conn.request("GET", "/index.html")
+            response = conn.getresponse()
+            self.assertEqual((response.status, response.read()), (200, b"<html><body><h1>Home</h1></body></html>"))
+            self.assertIs(conn.sock, sock)
+            # closed once idle for longer than the timeout
+            sock.settimeout(5)
+            self.assertEqual(sock.recv(1), b"")
+        finally:
+            conn.close()
+
+    def test_connections_over_the_cap_are_refused(self):
+        port = self.serve(max_connections=1)
+        conn = http.client.HTTPConnection("localhost", port, timeout=5)
+        conn.request("GET", "/index.html")
+        conn.getresponse().read()
+        # the parked connection still takes the only slot
+        status, headers, _ = self.get(port, "/index.html")
+        self.assertEqual((status, headers["Connection"]), (503, "close"))
+        conn.close()
+        # the slot is free once the server sees the close
+        deadline = time.monotonic() + 5
+        status = self.get(port, "/index.html")[0]
+        while status == 503 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            status = self.get(port, "/index.html")[0]
+        self.assertEqual(status, 200)
+
+    def test_bind_error_is_raised(self):
+        busy = socket.create_server(("localhost", 0))
+        self.sockets.append(busy)
+        with self.assertRaises(OSError):
+            PooledHTTPServer(("localhost", busy.getsockname()[1]), CORSHTTPRequestHandler)
+
+
+# TEST cache --------------------------------------------------------------------------
+
+    def test_cache_evicts_least_recently_used(self):
+        # 80 bytes in all, 10 bytes at most per file
+        cache = FileCache(80)
+        for name in "abcdefgh":
+            cache.put(name, CachedFile(name.encode() * 10, 0, "text/plain"), cache.generation)
+        self.assertEqual(cache.size, 80)
+        cache.get("a")
+        cache.put("i", CachedFile(b"i" * 10, 0, "text/plain"), cache.generation)
+        self.assertEqual(list(cache.entries), ["c", "d", "e", "f", "g", "h", "a", "i"])
+        self.assertEqual(cache.size, 80)
+        # a file bigger than a tenth or so of the cache is never kept
+        cache.put("big", CachedFile(b"x" * 11, 0, "text/plain"), cache.generation)
+        self.assertIsNone(cache.get("big"))
+        # the gzip sibling counts too
+        cache.put("a", CachedFile(b"a" * 5, 0, "text/plain", b"z" * 4), cache.generation)
+        self.assertEqual(cache.size, 79)
+
+    def test_cache_skips_files_read_before_an_invalidation(self):
+        cache = FileCache(1024)
+        generation = cache.generation
+        # a build rewrites the file while it is being read
+        cache.invalidate(["/public/index.html"])
+        cache.put("/public/index.html", CachedFile(b"old", 0, "text/html"), generation)
+        self.assertIsNone(cache.get("/public/index.html"))
+        cache.put("/public/index.html", CachedFile(b"new", 0, "text/html"), cache.generation)
+        self.assertEqual(cache.get("/public/index.html").body, b"new")
+
+    def test_cache_invalidate_build(self):
+        cache = FileCache(1024)
+        for path in ("blog/post.html", "index.html"):
+            cache.put(os.path.abspath(path), CachedFile(b"page", 0, "text/html"), cache.generation)
+        # urls are resolved against the served (working) directory
+        cache.invalidate_build(["/blog/post.html"], False)
+        self.assertIsNone(cache.get(os.path.abspath("blog/post.html")))
+        self.assertIsNotNone(cache.get(os.path.abspath("index.html")))
+        self.assertEqual(cache.size, 4)
+        cache.invalidate_build([], True)
+        self.assertEqual((cache.entries, cache.size), ({}, 0))
+
+
+# TEST conditional requests -------------------------------------------------------------
+
+    def test_conditional_requests(self):
+        for cache in (None, FileCache(1 << 20)):
+            port = self.serve(cache=cache)
+            status, headers, _ = self.get(port, "/index.html")
+            self.assertEqual(status, 200)
+            etag, last_modified = headers["ETag"], headers["Last-Modified"]
+            for conditions, expected in (
+                ({"If-None-Match": etag}, 304),
+                ({"If-None-Match": f'"other", W/{etag}'}, 304),
+                ({"If-None-Match": "*"}, 304),
+                ({"If-None-Match": '"other"'}, 200),
+                # If-None-Match wins over If-Modified-Since
+                ({"If-None-Match": '"other"', "If-Modified-Since": last_modified}, 200),
+                ({"If-Modified-Since": last_modified}, 304),
+                ({"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}, 200),
+                ({"If-Modified-Since": "not a date"}, 200),
+            ):
+                status, headers, body = self.get(port, "/index.html", conditions)
+                self.assertEqual(status, expected, conditions)
+                if expected == 304:
+                    self.assertEqual((headers["ETag"], body), (etag, b""))
+
+    def test_cache_serves_until_invalidated(self):
+        cache = FileCache(1 << 20)
+        port = self.serve(cache=cache)
+        self.assertEqual(self.get(port, "/index.html")[2], b"<html><body><h1>Home</h1></body></html>")
+        # edited by hand, without a build announcing it
+        self.write("index.html", "<h1>Edited</h1>")
+        self.assertEqual(self.get(port, "/index.html")[2], b"<html><body><h1>Home</h1></body></html>")
+        cache.invalidate([os.path.join(self.public_path, "index.html")])
+        self.assertEqual(self.get(port, "/index.html")[2], b"<h1>Edited</h1>")
+
+
+# TEST ranges -------------------------------------------------------------------------
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=900-5000", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 999))
+        # ignored, the whole file is sent
+        for header in (None, "bytes=0-1,5-6", "items=0-1", "bytes=a-b", "bytes=-", "bytes=9-1"):
+            self.assertIsNone(parse_range(header, 1000), header)
+        for header, size in (("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-10", 0)):
+            with self.assertRaises(ValueError):
+                parse_range(header, size)
+
+    def test_range_requests(self):
+        data = bytes(range(256)) * 4
+        with open(os.path.join(self.public_path, "data.bin"), 'wb') as f:
+            f.write(data)
+        for settings in ({"use_sendfile": True}, {"use_sendfile": False}, {"cache": FileCache(1 << 20)}):
+            port = self.serve(**settings)
+            etag = self.get(port, "/data.bin")[1]["ETag"]
+            status, headers, body = self.get(port, "/data.bin", {"Range": "bytes=10-19"})
+            self.assertEqual((status, headers["Content-Range"], body), (206, "bytes 10-19/1024", data[10:20]), settings)
+            status, headers, body = self.get(port, "/data.bin", {"Range": "bytes=-24"})
+            self.assertEqual((status, headers["Content-Range"], body), (206, "bytes 1000-1023/1024", data[1000:]), settings)
+            status, headers, body = self.get(port, "/data.bin", {"Range": "bytes=1024-"})
+            self.assertEqual((status, headers["Content-Range"], body), (416, "bytes */1024", b""), settings)
+            # If-Range: the range of the current version only, the whole file otherwise
+            status, _, body = self.get(port, "/data.bin", {"Range": "bytes=0-3", "If-Range": etag})
+            self.assertEqual((status, body), (206, data[:4]), settings)
+            status, _, body = self.get(port, "/data.bin", {"Range": "bytes=0-3", "If-Range": '"older"'})
+            self.assertEqual((status, body), (200, data), settings)
+
+
+# TEST precompressed files -------------------------------------------------------------
+
+    def test_gzip_sibling_served_only_while_fresh(self):
+        path = os.path.join(self.public_path, "index.html")
+        with open(path, 'rb') as f:
+            html = f.read()
+        with open(path + ".gz", 'wb') as f:
+            f.write(gzip.compress(html))
+        stat = os.stat(path)
+        os.utime(path + ".gz", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        for cache in (None, FileCache(1 << 20)):
+            port = self.serve(cache=cache)
+            status, headers, body = self.get(port, "/index.html", {"Accept-Encoding": "gzip"})
+            self.assertEqual(headers.get("Content-Encoding"), "gzip")
+            self.assertEqual(gzip.decompress(body), html)
+        # the page is rewritten without --compress, the old sibling is left behind
+        self.write("index.html", "<h1>New</h1>")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        for cache in (None, FileCache(1 << 20)):
+            port = self.serve(cache=cache)
+            status, headers, body = self.get(port, "/index.html", {"Accept-Encoding": "gzip"})
+            self.assertEqual(status, 200)
+            self.assertNotIn("Content-Encoding", headers)
+            self.assertEqual(body, b"<h1>New</h1>")
+
+
+# TEST live reload ----------------------------------------------------------------------
+
+    def test_livereload_streams_hold_no_worker(self):
+        hub = LiveReloadHub(os.path.join(self.public_path, ".build-changes.json"), interval=0.01)
+        port = self.serve(workers=2, livereload=hub)
+        streams = [self.open_stream(port) for _ in range(3)]
+        # more open tabs than workers, pages are still served
+        status, _, body = self.get(port, "/index.html")
+        self.assertEqual(status, 200)
+        self.assertIn(b"/__livereload", body)
+        notify_build(self.public_path, [os.path.join(self.public_path, "index.html")])
+        for sock in streams:
+            data = b""
+            while b"\n\n" not in data:
+                data += sock.recv(4096)
+            self.assertTrue(data.startswith(b"data: "))
+            self.assertIn(b'"changed": ["/index.html"]', data)
+        # a closed tab is dropped by the next write
+        streams[0].close()
+        deadline = time.monotonic() + 5
+        while len(hub.streams) > 2 and time.monotonic() < deadline:
+            hub.broadcast(b": keepalive\n\n")
+            time.sleep(0.01)
+        self.assertEqual(len(hub.streams), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
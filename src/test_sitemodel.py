@@ -0,0 +1,103 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from gencontent import generate_pages_recursive, read_title
+from manifest import BuildManifest
+from sitemodel import SiteModel, page_url
+
+
+class TestSiteModel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_path = f"{self.tmp_dir}/content"
+        self.public_path = f"{self.tmp_dir}/public"
+        self.template_path = f"{self.tmp_dir}/template.html"
+        os.makedirs(f"{self.content_path}/blog/2024")
+        self.write(self.template_path, "{{ Breadcrumbs }}{{ Nav }}{{ Content }}")
+        self.write(f"{self.content_path}/index.md", "# Home")
+        self.write(f"{self.content_path}/blog/index.md", "# Blog")
+        self.write(f"{self.content_path}/blog/post.md", "# A post")
+        self.write(f"{self.content_path}/blog/2024/jan.md", "no title")
+        self.manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path: str, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    def build(self) -> str:
+        log = io.StringIO()
+        with redirect_stdout(log):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, manifest=self.manifest)
+        return log.getvalue()
+
+    def test_scan(self):
+        site = SiteModel(self.content_path, self.public_path)
+        self.assertEqual(sorted(page.url for page in site.pages), ["/", "/blog/", "/blog/2024/jan.html", "/blog/post.html"])
+        blog = site.root.dirs[0]
+        self.assertEqual(blog.url, "/blog/")
+        self.assertEqual(blog.index.src_path, f"{self.content_path}/blog/index.md")
+        self.assertIsNone(blog.dirs[0].index)
+        page = next(page for page in site.pages if page.url == "/blog/post.html")
+        self.assertEqual(page.dst_path, f"{self.public_path}/blog/post.html")
+        self.assertEqual(page.stat.st_size, 8)
+
+    def test_page_url(self):
+        self.assertEqual(page_url("./public", "./public/index.html"), "/")
+        self.assertEqual(page_url("./public", "./public/majesty/index.html"), "/majesty/")
+        self.assertEqual(page_url("./public", "./public/majesty/rings.html"), "/majesty/rings.html")
+
+    def test_read_title(self):
+        self.assertEqual(read_title(f"{self.content_path}/blog/post.md"), "A post")
+        self.write(f"{self.content_path}/crlf.md", "# Windows\r\n\r\ntext")
+        self.assertEqual(read_title(f"{self.content_path}/crlf.md"), "Windows")
+        self.write(f"{self.content_path}/empty.md", "")
+        self.assertEqual(read_title(f"{self.content_path}/empty.md"), "")
+
+    def test_navigation(self):
+        self.build()
+        self.assertEqual(
+            self.read(f"{self.public_path}/blog/post.html"),
+            '<nav aria-label="breadcrumb"><ol><li><a href="/">Home</a></li><li><a href="/blog/">Blog</a></li>'
+            '<li aria-current="page">A post</li></ol></nav>'
+            '<nav><ul><li><a href="/blog/post.html" aria-current="page">A post</a></li><li><a href="/blog/2024/">2024</a></li></ul></nav>'
+            '<div><h1>A post</h1></div>'
+        )
+        # a page without a title is linked by its file name
+        self.assertIn('<li aria-current="page">jan</li>', self.read(f"{self.public_path}/blog/2024/jan.html"))
+
+    def test_navigation_incremental(self):
+        self.build()
+        self.assertEqual(self.build(), "")
+        # the new title shows up in the navigation of the blog index, no other page links to the post
+        self.write(f"{self.content_path}/blog/post.md", "# Renamed post")
+        log = self.build()
+        self.assertIn("blog/post.md", log)
+        self.assertIn("blog/index.md", log)
+        self.assertEqual(log.count(" * "), 2)
+        self.assertIn("Renamed post", self.read(f"{self.public_path}/blog/index.html"))
+
+    def test_sitemap(self):
+        os.utime(f"{self.content_path}/blog/post.md", (0, 86400 * 365))
+        site = SiteModel(self.content_path, self.public_path)
+        os.makedirs(self.public_path)
+        site.write_sitemap("https://example.com/")
+        sitemap = self.read(f"{self.public_path}/sitemap.xml")
+        self.assertTrue(sitemap.startswith('<?xml version="1.0" encoding="UTF-8"?>\n<urlset'))
+        self.assertIn("<url><loc>https://example.com/blog/post.html</loc><lastmod>1971-01-01</lastmod></url>", sitemap)
+        self.assertEqual(sitemap.count("<url>"), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
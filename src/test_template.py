@@ -0,0 +1,136 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from gencontent import generate_pages_recursive
+from htmlnode import LeafNode, ParentNode
+from manifest import BuildManifest
+from template import Template, TemplateCache
+
+
+class TestTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>", "template.html")
+
+
+# TEST compile --------------------------------------------------------------------------
+
+    def test_segments_and_slots(self):
+        self.assertEqual(self.template.segments, ["<title>", "</title><article>", "</article>"])
+        self.assertEqual(self.template.slots, ["Title", "Content"])
+
+    def test_no_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render(Title="ignored"), "<p>static</p>")
+
+
+# TEST render ---------------------------------------------------------------------------
+
+    def test_render(self):
+        self.assertEqual(
+            self.template.render(Title="Hello", Content="<p>world</p>"),
+            "<title>Hello</title><article><p>world</p></article>"
+        )
+
+    def test_render_values_are_not_substituted_again(self):
+        # a title mentioning a slot name and content mentioning another slot are written as-is
+        self.assertEqual(
+            self.template.render(Title="About {{ Content }}", Content="<code>{{ Title }}</code>"),
+            "<title>About {{ Content }}</title><article><code>{{ Title }}</code></article>"
+        )
+
+    def test_render_missing_value(self):
+        self.assertEqual(
+            self.template.render(Content="<p>world</p>"),
+            "<title>{{ Title }}</title><article><p>world</p></article>"
+        )
+
+    def test_write_node_value(self):
+        sink = io.StringIO()
+        content = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])
+        self.template.write(sink.write, Title="Hello", Content=content)
+        self.assertEqual(sink.getvalue(), "<title>Hello</title><article><p><b>bold</b> text</p></article>")
+
+    def test_repeated_slot(self):
+        template = Template("{{ Title }} | {{ Title }}")
+        self.assertEqual(template.render(Title="Hi"), "Hi | Hi")
+
+
+
+class TestTemplateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_path = f"{self.tmp_dir}/content"
+        self.public_path = f"{self.tmp_dir}/public"
+        self.template_path = f"{self.tmp_dir}/template.html"
+        self.templates_path = f"{self.tmp_dir}/templates"
+        os.makedirs(f"{self.content_path}/blog/2024")
+        os.makedirs(f"{self.content_path}/docs")
+        os.makedirs(f"{self.templates_path}/blog")
+        self.write(self.template_path, "<main>{{ Content }}</main>")
+        self.write(f"{self.templates_path}/blog.html", "<article>{{ Content }}</article>")
+        self.write(f"{self.templates_path}/blog/2024.html", "<article class=\"2024\">{{ Content }}</article>")
+        self.write(f"{self.templates_path}/landing.html", "<section>{{ Content }}</section>")
+        self.write(f"{self.content_path}/index.md", "---\ntemplate: landing\n---\n# Home")
+        self.write(f"{self.content_path}/blog/post.md", "# Post")
+        self.write(f"{self.content_path}/blog/2024/jan.md", "# January")
+        self.write(f"{self.content_path}/docs/guide.md", "# Guide")
+        self.templates = TemplateCache(self.template_path, self.templates_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path: str, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    def build(self, manifest: BuildManifest) -> str:
+        log = io.StringIO()
+        with redirect_stdout(log):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, manifest=manifest, templates=self.templates)
+        return log.getvalue()
+
+    def test_select(self):
+        self.assertEqual(self.templates.select("blog/2024/jan.md"), f"{self.templates_path}/blog/2024.html")
+        self.assertEqual(self.templates.select("blog/2023/dec.md"), f"{self.templates_path}/blog.html")
+        self.assertEqual(self.templates.select("docs/guide.md"), self.template_path)
+        # the front matter wins over the directory
+        self.assertEqual(self.templates.select("blog/post.md", {"template": "landing.html"}), f"{self.templates_path}/landing.html")
+        with self.assertRaises(ValueError):
+            self.templates.select("index.md", {"template": "missing"})
+
+    def test_load_cached(self):
+        template = self.templates.load(self.template_path)
+        self.assertIs(self.templates.load(self.template_path), template)
+        # compiled again once the file changes
+        self.write(self.template_path, "<body>{{ Content }}</body>")
+        os.utime(self.template_path, ns=(0, 0))
+        changed = self.templates.load(self.template_path)
+        self.assertIsNot(changed, template)
+        self.assertEqual(changed.segments, ["<body>", "</body>"])
+
+    def test_incremental_template_change(self):
+        manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+        self.build(manifest)
+        self.assertEqual(self.read(f"{self.public_path}/index.html"), "<section><div><h1>Home</h1></div></section>")
+        self.assertEqual(self.read(f"{self.public_path}/blog/post.html"), "<article><div><h1>Post</h1></div></article>")
+        self.assertEqual(self.read(f"{self.public_path}/docs/guide.html"), "<main><div><h1>Guide</h1></div></main>")
+        manifest.save()
+        # only the pages using the changed template are rendered again
+        self.write(f"{self.templates_path}/blog.html", "<article class=\"post\">{{ Content }}</article>")
+        manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+        log = self.build(manifest)
+        self.assertEqual(log, f" * [{self.templates_path}/blog.html]: {self.content_path}/blog/post.md -> {self.public_path}/blog/post.html\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
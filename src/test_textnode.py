@@ -1,7 +1,10 @@
 import unittest
 
+import htmlnode
+from htmlnode import set_validation
 from textnode import (
     TextNode,
+    text_node_to_html_node,
     # text_type_text,
     # text_type_bold,
     text_type_italic,
@@ -80,6 +83,22 @@ class TestTextNode(unittest.TestCase):
         self.assertIsNone(node.url)
 
 
+    def test_text_type_interned(self):
+        # a text_type built at runtime still matches the constants by identity
+        node = TextNode("This is a text node", "".join(["ita", "lic"]))
+        self.assertIs(node.text_type, text_type_italic)
+        self.assertEqual(text_node_to_html_node(node).to_html(), "<i>This is a text node</i>")
+
+    def test_validation_debug_mode(self):
+        previous = htmlnode.validate_nodes
+        set_validation(True)
+        try:
+            with self.assertRaises(TypeError):
+                TextNode(42, text_type_italic)  # pyright: ignore[reportArgumentType]
+        finally:
+            set_validation(previous)
+
+
     # TODO: feat: url format check
     # first implement URL format checking in TextNode class
 
@@ -0,0 +1,133 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from gencontent import generate_pages_recursive
+from manifest import BuildManifest
+from template import TemplateCache
+from watch import TreeWatcher, rebuild_changes
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.content_path = f"{self.tmp_dir}/content"
+        self.static_path = f"{self.tmp_dir}/static"
+        self.public_path = f"{self.tmp_dir}/public"
+        self.template_path = f"{self.tmp_dir}/template.html"
+        os.makedirs(f"{self.content_path}/blog")
+        os.makedirs(self.static_path)
+        os.makedirs(self.public_path)
+        self.write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(f"{self.content_path}/index.md", "# Home")
+        self.write(f"{self.content_path}/blog/post.md", "# Post")
+        self.write(f"{self.static_path}/index.css", "body {}")
+        self.manifest = BuildManifest(f"{self.tmp_dir}/manifest.json")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content_path, self.template_path, self.public_path, manifest=self.manifest)
+        self.watcher = TreeWatcher([self.content_path, self.static_path, self.template_path])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path: str, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    def rebuild(self) -> list[str]:
+        changed, removed = self.watcher.poll()
+        with redirect_stdout(io.StringIO()):
+            return rebuild_changes(
+                changed, removed, self.content_path, self.static_path, self.template_path, self.public_path, self.manifest
+            )
+
+
+# TEST TreeWatcher ----------------------------------------------------------------------
+
+    def test_poll_no_changes(self):
+        self.assertEqual(self.watcher.poll(), ([], []))
+
+    def test_poll_changes(self):
+        self.write(f"{self.content_path}/index.md", "# Home, edited")
+        self.write(f"{self.content_path}/blog/new.md", "# New")
+        os.remove(f"{self.static_path}/index.css")
+        changed, removed = self.watcher.poll()
+        self.assertEqual(sorted(changed), [f"{self.content_path}/blog/new.md", f"{self.content_path}/index.md"])
+        self.assertEqual(removed, [f"{self.static_path}/index.css"])
+        # changes are only reported once
+        self.assertEqual(self.watcher.poll(), ([], []))
+
+
+# TEST rebuild_changes ------------------------------------------------------------------
+
+    def test_rebuild_only_changed_page(self):
+        self.write(f"{self.content_path}/blog/post.md", "# Post, edited")
+        outputs = self.rebuild()
+        self.assertEqual(outputs, [f"{self.public_path}/blog/post.html"])
+        self.assertIn("<h1>Post, edited</h1>", self.read(f"{self.public_path}/blog/post.html"))
+
+    def test_rebuild_template_change(self):
+        self.write(self.template_path, "<main>{{ Content }}</main>")
+        outputs = self.rebuild()
+        self.assertEqual(sorted(outputs), [f"{self.public_path}/blog/post.html", f"{self.public_path}/index.html"])
+        self.assertTrue(self.read(f"{self.public_path}/index.html").startswith("<main>"))
+
+    def test_rebuild_static_and_removed(self):
+        self.write(f"{self.static_path}/index.css", "body { color: red; }")
+        os.remove(f"{self.content_path}/blog/post.md")
+        outputs = self.rebuild()
+        self.assertEqual(sorted(outputs), [f"{self.public_path}/blog/post.html", f"{self.public_path}/index.css"])
+        self.assertEqual(self.read(f"{self.public_path}/index.css"), "body { color: red; }")
+        self.assertFalse(os.path.exists(f"{self.public_path}/blog"))
+
+    def test_rebuild_keeps_going_on_error(self):
+        self.write(f"{self.content_path}/index.md", "an `unclosed code span")
+        self.write(f"{self.content_path}/blog/post.md", "# Post, edited")
+        self.assertEqual(self.rebuild(), [f"{self.public_path}/blog/post.html"])
+
+    def test_rebuild_draft_taken_down(self):
+        self.write(f"{self.content_path}/blog/post.md", "---\ndraft: true\n---\n# Post, edited")
+        self.assertEqual(self.rebuild(), [f"{self.public_path}/blog/post.html"])
+        self.assertFalse(os.path.exists(f"{self.public_path}/blog/post.html"))
+        self.assertNotIn(f"{self.content_path}/blog/post.md", self.manifest.entries)
+        # published again
+        self.write(f"{self.content_path}/blog/post.md", "---\ndraft: false\n---\n# Post, edited")
+        self.assertEqual(self.rebuild(), [f"{self.public_path}/blog/post.html"])
+        self.assertIn("<h1>Post, edited</h1>", self.read(f"{self.public_path}/blog/post.html"))
+
+
+    def test_rebuild_templates(self):
+        templates = TemplateCache(self.template_path, f"{self.tmp_dir}/templates")
+        watcher = TreeWatcher([self.content_path, self.template_path, f"{self.tmp_dir}/templates"])
+        # a new template for the blog only renders the blog again
+        os.makedirs(f"{self.tmp_dir}/templates")
+        self.write(f"{self.tmp_dir}/templates/blog.html", "<article>{{ Content }}</article>")
+        changed, removed = watcher.poll()
+        with redirect_stdout(io.StringIO()):
+            outputs = rebuild_changes(
+                changed, removed, self.content_path, self.static_path, self.template_path, self.public_path, self.manifest,
+                templates=templates
+            )
+        self.assertEqual(outputs, [f"{self.public_path}/blog/post.html"])
+        self.assertEqual(self.read(f"{self.public_path}/blog/post.html"), "<article><div><h1>Post</h1></div></article>")
+        # an edited page keeps its template
+        self.write(f"{self.content_path}/blog/post.md", "# Post, edited")
+        changed, removed = watcher.poll()
+        with redirect_stdout(io.StringIO()):
+            rebuild_changes(
+                changed, removed, self.content_path, self.static_path, self.template_path, self.public_path, self.manifest,
+                templates=templates
+            )
+        self.assertEqual(self.read(f"{self.public_path}/blog/post.html"), "<article><div><h1>Post, edited</h1></div></article>")
+
+
+if __name__ == "__main__":
+    unittest.main()
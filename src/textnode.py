@@ -1,3 +1,5 @@
+from sys import intern
+import htmlnode
 from htmlnode import LeafNode
 
 text_type_text = "text"
@@ -9,15 +11,21 @@ text_type_image = "image"
 
 
 class TextNode:
+    # no per-instance __dict__, every inline span of every page becomes a TextNode
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: str, url: str | None = None):
-        if not isinstance(text, str):
-            raise TypeError("text must be a string")
-        if not isinstance(text_type, str):
-            raise TypeError("text_type must be a string")
-        if not isinstance(url, str) and url is not None:
-            raise TypeError("url must be a list")
+        # only validated in debug mode, see `htmlnode.set_validation()`
+        if htmlnode.validate_nodes:
+            if not isinstance(text, str):
+                raise TypeError("text must be a string")
+            if not isinstance(text_type, str):
+                raise TypeError("text_type must be a string")
+            if not isinstance(url, str) and url is not None:
+                raise TypeError("url must be a list")
         self.text = text
-        self.text_type = text_type
+        # interned so that `text_node_to_html_node` can compare it against the text_type constants by identity
+        self.text_type = intern(text_type)
         self.url = url
 
     # built-in equality operator used by unittest methods (.assertEqual, .assertNotEqual)
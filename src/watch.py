@@ -0,0 +1,208 @@
+import os
+import time
+from copystatic import copy_file, copy_strategy_copy
+from gencontent import generate_page, render_plan, navigation_slots
+from manifest import BuildManifest
+from parsecache import ParseCache
+from links import LinkIndex
+from search import SearchIndex
+from sitemodel import SiteModel
+from frontmatter import read_page_meta
+from template import Template, TemplateCache
+
+
+class TreeWatcher:
+    '''
+    Polls files and directory trees for changes using nothing but `os.scandir` and `os.stat`.
+    A snapshot maps every watched file to its (mtime_ns, size); comparing two snapshots gives the changed and removed files.
+
+    On a large site a full scan stats every file, so between full scans only the recently changed ("hot") files are polled:
+    a writer saving the page they are working on gets picked up within one `interval`, not one full scan.
+    '''
+    # number of recently changed files polled between full scans
+    hot_size = 64
+
+    def __init__(self, paths: list[str]):
+        self.paths = paths
+        self.snapshot = self.scan()
+        self.hot: list[str] = []
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        'Returns the current (mtime_ns, size) of every file under the watched paths'
+        snapshot: dict[str, tuple[int, int]] = {}
+        dirs: list[str] = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                dirs.append(path)
+            elif os.path.exists(path):
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        # iterative walk, `entry.path` gives the same "dir/name" format as `SiteModel` and `copy_files_recursively`
+        while dirs:
+            with os.scandir(dirs.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        dirs.append(entry.path)
+                    else:
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> tuple[list[str], list[str]]:
+        'Rescans the watched paths and returns the (changed or added, removed) files since the previous poll'
+        snapshot = self.scan()
+        changed = [path for path, info in snapshot.items() if self.snapshot.get(path) != info]
+        removed = [path for path in self.snapshot if path not in snapshot]
+        self.snapshot = snapshot
+        return changed, removed
+
+    def poll_paths(self, paths) -> tuple[list[str], list[str]]:
+        'Like `poll`, but only stats the given files'
+        changed: list[str] = []
+        removed: list[str] = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if self.snapshot.pop(path, None) is not None:
+                    removed.append(path)
+                continue
+            info = (stat.st_mtime_ns, stat.st_size)
+            if self.snapshot.get(path) != info:
+                self.snapshot[path] = info
+                changed.append(path)
+        return changed, removed
+
+    def wait_for_changes(self, interval: float = 0.05, debounce: float = 0.05) -> tuple[list[str], list[str]]:
+        '''
+        Blocks until something changes, then keeps re-checking the changed files until they have been stable for `debounce` seconds,
+        so a burst of writes to a file (editors often truncate then write) is handled as a single rebuild.
+        Full scans are spaced out to at most a third of the time, hot files are checked every `interval` in between.
+        '''
+        next_scan = 0.0
+        while True:
+            if time.monotonic() >= next_scan:
+                start = time.monotonic()
+                changed, removed = self.poll()
+                next_scan = time.monotonic() + max(interval, (time.monotonic() - start) * 2)
+            else:
+                changed, removed = self.poll_paths(self.hot)
+            if changed or removed:
+                break
+            time.sleep(interval)
+        pending = set(changed) | set(removed)
+        while True:
+            time.sleep(debounce)
+            new_changed, new_removed = self.poll_paths(pending)
+            if not new_changed and not new_removed:
+                break
+            changed = list(dict.fromkeys(changed + new_changed))
+            removed = list(dict.fromkeys(removed + new_removed))
+        changed = sorted(path for path in changed if path in self.snapshot)
+        removed = sorted(path for path in removed if path not in self.snapshot)
+        self.hot = list(dict.fromkeys(changed + self.hot))[:self.hot_size]
+        return changed, removed
+
+
+def rebuild_changes(
+        changed: list[str],
+        removed: list[str],
+        content_path: str,
+        static_path: str,
+        template_path: str,
+        public_path: str,
+        manifest: BuildManifest,
+        *,
+        copy_strategy: str = copy_strategy_copy,
+        cache: ParseCache | None = None,
+        links: LinkIndex | None = None,
+        search: SearchIndex | None = None,
+        drafts: bool = False,
+        templates: TemplateCache | None = None
+    ) -> list[str]:
+    '''
+    Applies a batch of changes reported by `TreeWatcher` to the public dir: only the affected pages are regenerated and only the affected static files are copied.
+    Pages get their template from `templates`, kept from one rebuild to the next so only changed templates are compiled again
+    (all of them `template_path` when not given).
+    A change to a template regenerates the pages using it, with a parse `cache` the pages themselves are not converted again.
+    With navigation slots in the templates, the content dir is scanned again and every page whose navigation changed is regenerated too.
+    With a `links` index, the link targets of the regenerated pages are recorded and the removed pages are dropped, the same goes for a `search` index.
+    A page saved as a draft is removed like a deleted one, unless `drafts` are built too.
+    Returns the output paths that were written or removed. The `manifest` is left to the caller to save, once the browsers are told.
+    '''
+    outputs: list[str] = []
+    if templates is None:
+        templates = TemplateCache(template_path)
+    template_changes = [path for path in changed + removed if templates.is_template(path)]
+    if template_changes:
+        # a template may have been added or removed, which changes the template of the pages it's named after
+        templates.scan()
+    for path in changed + removed:
+        manifest.forget_digest(path)
+    for path in removed:
+        if not templates.is_template(path):
+            remove_output(path, public_path, manifest, outputs, links, search)
+    # dict as an ordered set, a page can be both edited and affected by a template change
+    pages: dict[str, None] = {}
+    # src path => template, navigation slots and template key of the page, when the whole site was planned
+    plan: dict[str, tuple[Template, dict[str, str], str | None]] = {}
+    if template_changes or templates.uses_slots(navigation_slots):
+        # the pages of a changed template have a new key, and so do pages whose navigation changed
+        # (adding, removing or retitling a page changes the navigation of others)
+        try:
+            for page, template, slots, page_key in render_plan(SiteModel(content_path, public_path, drafts), templates, manifest):
+                plan[page.src_path] = (template, slots, page_key)
+                entry = manifest.entries.get(page.src_path)
+                if entry is not None and entry["template"] != page_key:
+                    pages[page.src_path] = None
+        except ValueError as e:
+            # e.g. a page naming a template that doesn't exist, edited pages are still regenerated one by one below
+            print(f" ! {e}")
+    for path in changed:
+        if path.startswith(f"{static_path}/"):
+            dst_path = f"{public_path}/{path[len(static_path) + 1:]}"
+            print(f" * {path} -> {dst_path}")
+            copy_file(path, dst_path, copy_strategy)
+            manifest.record(path, dst_path)
+            outputs.append(dst_path)
+        elif path.startswith(f"{content_path}/"):
+            pages[path] = None
+    for src_path in pages:
+        dst_path = f"{public_path}/{src_path[len(content_path) + 1:-3]}.html"
+        try:
+            if src_path in plan:
+                template, slots, page_key = plan[src_path]
+            else:
+                meta = read_page_meta(src_path)[0]
+                if meta.get("draft") and not drafts:
+                    remove_output(src_path, public_path, manifest, outputs, links, search)
+                    continue
+                template = templates.load(templates.select(src_path[len(content_path) + 1:], meta))
+                slots, page_key = None, manifest.digest(template.path)
+            generate_page(src_path, template, dst_path, cache=cache, links=links, search=search, slots=slots)
+        except Exception as e:
+            # keep watching, the writer will fix the page and save again
+            print(f" ! {src_path}: {type(e).__name__}: {e}")
+            continue
+        manifest.record(src_path, dst_path, page_key)
+        outputs.append(dst_path)
+    return outputs
+
+
+def remove_output(
+        src_path: str,
+        public_path: str,
+        manifest: BuildManifest,
+        outputs: list[str],
+        links: LinkIndex | None = None,
+        search: SearchIndex | None = None
+    ):
+    'Removes the output of a deleted source (or a page turned draft) from the public dir, the manifest, and the `links` and `search` indexes'
+    dst_path = manifest.remove(src_path, public_path)
+    if dst_path is not None:
+        print(f" * removed {dst_path}")
+        outputs.append(dst_path)
+        if links is not None:
+            links.forget(dst_path)
+        if search is not None:
+            search.remove_page(dst_path)
@@ -0,0 +1,39 @@
+// Client for the search index written by `src/main.py --search`:
+// `siteSearch("hobbit ring")` resolves to the best `limit` matching pages, best first, as [{url, title, score}].
+// Only /search/index.json, the shard of each query term and the doc files holding the ids of the results are fetched, each of them once.
+const searchFiles = new Map();
+
+function fetchSearchFile(path) {
+    if (!searchFiles.has(path)) {
+        searchFiles.set(path, fetch(path).then((response) => (response.ok ? response.json() : {})));
+    }
+    return searchFiles.get(path);
+}
+
+async function siteSearch(query, limit = 20) {
+    const index = await fetchSearchFile("/search/index.json");
+    // same terms as the build: words of 2 to 32 letters or digits, lowercased
+    const terms = query.toLowerCase().match(/[\p{L}\p{N}_]{2,32}/gu) || [];
+    const scores = new Map();
+    const matched = new Map();
+    for (const term of terms) {
+        const shard = await fetchSearchFile(`/search/shards/${encodeURIComponent(term.slice(0, index.prefix_length))}.json`);
+        for (const [id, weight] of shard[term] || []) {
+            scores.set(id, (scores.get(id) || 0) + weight);
+            matched.set(id, (matched.get(id) || 0) + 1);
+        }
+    }
+    // pages with every term of the query
+    const results = [...scores.entries()]
+        .filter(([id]) => matched.get(id) === terms.length)
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .slice(0, limit);
+    const docFile = (id) => `/search/docs/${Math.floor(id / index.docs_per_file)}.json`;
+    const docs = new Map(await Promise.all(
+        [...new Set(results.map(([id]) => docFile(id)))].map(async (path) => [path, await fetchSearchFile(path)])
+    ));
+    return results
+        .map(([id, score]) => [docs.get(docFile(id))[id % index.docs_per_file], score])
+        .filter(([doc]) => doc)
+        .map(([doc, score]) => ({ url: doc[0], title: doc[1], score }));
+}